@@ -0,0 +1,192 @@
+"""
+Activity Log Archive
+Moves old activity entries into gzip NDJSON files per user per month and reads them back
+
+Usage:
+    python -m activity_archive [--days 90] [--batch-size 5000] [--max-batches N] [--compact]
+"""
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+import argparse
+import glob
+import gzip
+import os
+import re
+import time
+import orjson
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from models import ActivityLog
+
+load_dotenv()
+
+ACTIVITY_RETENTION_DAYS = int(os.getenv("ACTIVITY_RETENTION_DAYS", "90"))
+ACTIVITY_ARCHIVE_DIR = os.getenv("ACTIVITY_ARCHIVE_DIR", os.path.join("archives", "activity"))
+ARCHIVE_BATCH_SIZE = 5000
+
+ACTIVITY_COLUMNS = ["id", "action", "details", "timestamp"]
+
+_MONTH_FILE = re.compile(r"^(\d{4}-\d{2})\.ndjson\.gz$")
+
+
+def user_archive_dir(user_id: int, directory: str = ACTIVITY_ARCHIVE_DIR) -> str:
+    return os.path.join(directory, f"user_{user_id}")
+
+
+def archive_path(user_id: int, month: str, directory: str = ACTIVITY_ARCHIVE_DIR) -> str:
+    return os.path.join(user_archive_dir(user_id, directory), f"{month}.ndjson.gz")
+
+
+def _append_entries(path: str, entries: List[Dict]):
+    """Append entries as a new gzip member and flush it to disk
+
+    gzip readers treat concatenated members as one stream, so appending
+    never rewrites what is already archived.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = b"".join(orjson.dumps(entry) + b"\n" for entry in entries)
+    with open(path, "ab") as f:
+        f.write(gzip.compress(payload))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_archive(path: str) -> List[Dict]:
+    """Entries in an archive file, newest first, without duplicates
+
+    A run interrupted between writing a batch and deleting its rows
+    archives those rows again on the next run, so ids are de-duplicated.
+    """
+    with gzip.open(path, "rb") as f:
+        entries = {entry["id"]: entry for entry in map(orjson.loads, f)}
+    return sorted(entries.values(), key=lambda entry: entry["id"], reverse=True)
+
+
+def archived_months(user_id: int, directory: str = ACTIVITY_ARCHIVE_DIR) -> List[str]:
+    """Archived months for a user, newest first"""
+    try:
+        names = os.listdir(user_archive_dir(user_id, directory))
+    except FileNotFoundError:
+        return []
+    return sorted((match.group(1) for match in map(_MONTH_FILE.match, names) if match), reverse=True)
+
+
+def iter_archived_activity(user_id: int, before: Optional[int] = None,
+                           directory: str = ACTIVITY_ARCHIVE_DIR) -> Iterator[Dict]:
+    """Archived entries for a user newest first, optionally only ids below `before`"""
+    for month in archived_months(user_id, directory):
+        for entry in read_archive(archive_path(user_id, month, directory)):
+            if before is None or entry["id"] < before:
+                yield entry
+
+
+def activity_page(db: Session, user_id: int, limit: int = 50, before: Optional[int] = None,
+                  directory: str = ACTIVITY_ARCHIVE_DIR) -> Tuple[List[Dict], Optional[int]]:
+    """A page of activity newest first, continuing into the archives when the table runs out
+
+    Returns the entries and the cursor for the next page (None at the end).
+    """
+    query = db.query(
+        ActivityLog.id, ActivityLog.action, ActivityLog.details, ActivityLog.timestamp
+    ).filter(ActivityLog.user_id == user_id)
+    if before is not None:
+        query = query.filter(ActivityLog.id < before)
+    rows = query.order_by(ActivityLog.id.desc()).limit(limit + 1).all()
+    entries = [dict(zip(ACTIVITY_COLUMNS, row)) for row in rows]
+
+    if len(entries) <= limit:
+        cursor = entries[-1]["id"] if entries else before
+        for entry in iter_archived_activity(user_id, cursor, directory):
+            entries.append({col: entry[col] for col in ACTIVITY_COLUMNS})
+            if len(entries) > limit:
+                break
+
+    if len(entries) > limit:
+        entries = entries[:limit]
+        return entries, entries[-1]["id"]
+    return entries, None
+
+
+def archive_activity(
+    db: Session,
+    older_than_days: int = ACTIVITY_RETENTION_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+    directory: str = ACTIVITY_ARCHIVE_DIR
+) -> Dict:
+    """Move entries older than the retention window into the archives, one batch at a time
+
+    Each batch is written to its archive files and flushed before its rows
+    are deleted, so an interruption can only leave entries duplicated in
+    the archive (which readers ignore), never lost.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = batches = 0
+
+    while max_batches is None or batches < max_batches:
+        rows = db.query(
+            ActivityLog.id, ActivityLog.user_id, ActivityLog.action, ActivityLog.details, ActivityLog.timestamp
+        ).filter(ActivityLog.timestamp < cutoff).order_by(ActivityLog.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        partitions: Dict[Tuple[int, str], List[Dict]] = {}
+        for row_id, user_id, action, details, timestamp in rows:
+            partitions.setdefault((user_id, f"{timestamp:%Y-%m}"), []).append({
+                "id": row_id, "user_id": user_id, "action": action, "details": details,
+                "timestamp": timestamp.isoformat(),
+            })
+        for (user_id, month), entries in partitions.items():
+            _append_entries(archive_path(user_id, month, directory), entries)
+
+        db.query(ActivityLog).filter(
+            ActivityLog.id.in_([row[0] for row in rows])
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        archived += len(rows)
+        batches += 1
+
+    return {"archived": archived, "batches": batches, "cutoff": cutoff.isoformat()}
+
+
+def compact_archives(directory: str = ACTIVITY_ARCHIVE_DIR) -> int:
+    """Rewrite multi-member archive files as one sorted, de-duplicated member each"""
+    compacted = 0
+    for path in glob.glob(os.path.join(directory, "user_*", "*.ndjson.gz")):
+        entries = read_archive(path)
+        entries.reverse()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(gzip.compress(b"".join(orjson.dumps(entry) + b"\n" for entry in entries)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        compacted += 1
+    return compacted
+
+
+if __name__ == "__main__":
+    from database import engine, Base, SessionLocal
+
+    parser = argparse.ArgumentParser(description="Archive old activity log entries")
+    parser.add_argument("--days", type=int, default=ACTIVITY_RETENTION_DAYS,
+                        help="Archive entries older than this many days")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, help="Stop after this many batches (default: until done)")
+    parser.add_argument("--dir", default=ACTIVITY_ARCHIVE_DIR, help="Archive directory")
+    parser.add_argument("--compact", action="store_true", help="Also rewrite archive files into single members")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        result = archive_activity(db, args.days, args.batch_size, args.max_batches, args.dir)
+        print(f"✓ Archived {result['archived']:,} entries older than {result['cutoff']} "
+              f"in {result['batches']} batches ({time.perf_counter() - started:.1f}s)")
+        if args.compact:
+            print(f"✓ Compacted {compact_archives(args.dir)} archive files")
+    finally:
+        db.close()
@@ -2,9 +2,10 @@
 Add sample transactions for demo user
 """
 from database import SessionLocal
-from models import User, Transaction
+from models import User
+from bulk_loader import load_frames, print_summary
 from datetime import datetime, timedelta
-import random
+import pandas as pd
 
 db = SessionLocal()
 
@@ -57,22 +58,14 @@ try:
         {"description": "Team Building Event", "amount": -22000, "category": "HR", "vendor": None, "days_ago": 20},
     ]
     
-    # Add transactions
-    for idx, txn_data in enumerate(sample_transactions):
-        transaction = Transaction(
-            user_id=demo_user.id,
-            transaction_id=f"txn_{10000 + idx}",
-            date=datetime.now() - timedelta(days=txn_data["days_ago"]),
-            description=txn_data["description"],
-            amount=txn_data["amount"],
-            category=txn_data["category"],
-            vendor=txn_data["vendor"]
-        )
-        db.add(transaction)
+    # Fixed ids keep re-runs from adding the same rows twice
+    df = pd.DataFrame(sample_transactions)
+    df['transaction_id'] = [f"txn_{10000 + idx}" for idx in range(len(df))]
+    df['date'] = [datetime.now() - timedelta(days=days) for days in df.pop('days_ago')]
     
-    db.commit()
+    result = load_frames(db, demo_user.id, [df], source="add_sample_data")
+    print_summary(result)
     
-    print(f"✓ Successfully added {len(sample_transactions)} sample transactions!")
     print(f"\nTransaction Summary:")
     print(f"  Total Expenses: ₹{sum(t['amount'] for t in sample_transactions if t['amount'] < 0):,.0f}")
     print(f"  Total Revenue: ₹{sum(t['amount'] for t in sample_transactions if t['amount'] > 0):,.0f}")
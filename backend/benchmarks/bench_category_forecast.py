@@ -0,0 +1,84 @@
+"""
+Category Forecast Benchmark
+Compares fitting every category one after another with the parallel process pool
+
+Run from the backend directory:
+    python -m benchmarks.bench_category_forecast [--workers N]
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import multiprocessing
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from category_forecast import fit_category_forecasts, split_categories, quiet_worker
+from logic import fit_forecast
+
+quiet_worker()
+
+# (category, transactions per day) - a few heavy categories and a long tail
+CATEGORIES = [
+    ("Salaries", 2.0), ("Cloud Services", 1.5), ("Marketing", 1.0), ("Software", 0.8),
+    ("Office", 0.5), ("Travel", 0.4), ("Legal", 0.2), ("Insurance", 0.1),
+    ("Training", 0.02), ("Donations", 0.01),
+]
+
+
+def make_history(days: int = 730, seed: int = 5) -> pd.DataFrame:
+    """Expense rows for a multi-category tenant"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2023-01-01", periods=days, freq="D")
+    frames = []
+    for category, rate in CATEGORIES:
+        counts = rng.poisson(rate, size=days)
+        frames.append(pd.DataFrame({
+            "ds": np.repeat(dates, counts),
+            "y": rng.lognormal(7, 1, size=counts.sum()),
+            "category": category,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def fit_sequential(history: pd.DataFrame, resolution: str):
+    fitted, _ = split_categories(history)
+    for series in fitted.values():
+        fit_forecast(series, resolution)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    history = make_history()
+    fitted, thin = split_categories(history)
+    print(f"{len(history):,} expense rows, {len(fitted)} fitted categories, "
+          f"{thin['category'].nunique()} thin, {args.workers} workers")
+
+    spawn = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(args.workers, mp_context=spawn, initializer=quiet_worker) as pool:
+        # Start the workers and load Prophet in each before timing
+        list(pool.map(fit_forecast, [fitted["Insurance"]] * args.workers))
+
+        print("=" * 72)
+        print(f"{'resolution':<12} {'largest':>10} {'sequential':>12} {'parallel':>10} {'speedup':>9}")
+        print("=" * 72)
+        for resolution in ["daily", "weekly"]:
+            started = time.perf_counter()
+            fit_forecast(fitted["Salaries"], resolution)
+            largest = time.perf_counter() - started
+
+            started = time.perf_counter()
+            fit_sequential(history, resolution)
+            sequential = time.perf_counter() - started
+
+            started = time.perf_counter()
+            result = fit_category_forecasts(history, resolution, pool=pool)
+            parallel = time.perf_counter() - started
+
+            # Wall clock should approach the largest single fit given enough cores
+            assert not result["failed"], result["failed"]
+            print(f"{resolution:<12} {largest * 1000:>8.0f}ms {sequential * 1000:>10.0f}ms "
+                  f"{parallel * 1000:>8.0f}ms {sequential / parallel:>8.2f}x")
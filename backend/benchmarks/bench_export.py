@@ -0,0 +1,93 @@
+"""
+Export Memory Benchmark
+Checks that streaming exports keep a flat memory profile as history grows
+
+Run from the backend directory:
+    python -m benchmarks.bench_export [rows ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway database before it is imported
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/export_bench.db"
+os.environ["RESULT_CACHE_PATH"] = ""
+
+from sqlalchemy import insert
+
+from database import engine, Base, SessionLocal
+from models import User, Transaction
+from exporter import stream_export
+
+DEFAULT_SIZES = [1_000, 100_000, 500_000]
+
+
+def seed_user(company: str, rows: int) -> int:
+    """Create a user with `rows` synthetic transactions"""
+    db = SessionLocal()
+    user = User(company_name=company, email=f"{company}@bench.local", password_hash="x")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    start = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, 50_000):
+            conn.execute(insert(Transaction), [
+                {
+                    "user_id": user_id,
+                    "transaction_id": f"{company}_{i}",
+                    "date": start + timedelta(minutes=i * 7),
+                    "description": f"Vendor {i % 300} invoice",
+                    "amount": -float(i % 9000 + 100),
+                    "category": ("Salaries", "Cloud Services", "Software", "Marketing")[i % 4],
+                    "vendor": f"Vendor {i % 300}",
+                    "notes": None,
+                }
+                for i in range(offset, min(offset + 50_000, rows))
+            ])
+    return user_id
+
+
+def consume(user_id: int, fmt: str) -> int:
+    return sum(len(chunk) for chunk in stream_export(user_id, fmt))
+
+
+def measure(user_id: int, fmt: str):
+    """Consume an export stream, returning (bytes, seconds, peak traced memory)"""
+    started = time.perf_counter()
+    total = consume(user_id, fmt)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    consume(user_id, fmt)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return total, elapsed, peak
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    Base.metadata.create_all(bind=engine)
+    users = {rows: seed_user(f"tenant{rows}", rows) for rows in sizes}
+
+    print("=" * 72)
+    print(f"{'format':<8} {'rows':>10} {'output':>12} {'time':>10} {'peak memory':>14}")
+    print("=" * 72)
+    for fmt in ["csv", "ndjson", "parquet"]:
+        # Warm up so lazy imports are not counted against the first size
+        consume(users[sizes[0]], fmt)
+        peaks = []
+        for rows, user_id in users.items():
+            total, elapsed, peak = measure(user_id, fmt)
+            peaks.append(peak)
+            print(f"{fmt:<8} {rows:>10,} {total / 1e6:>10.1f}MB {elapsed:>9.2f}s {peak / 1e6:>12.1f}MB")
+
+        # Peak memory should be bounded by the batch size, not the history
+        assert peaks[-1] < 1.5 * peaks[-2] + 2e6, f"{fmt} export memory grows with history: {peaks}"
+    print("Memory stayed flat across history sizes")
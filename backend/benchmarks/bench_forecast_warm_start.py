@@ -0,0 +1,58 @@
+"""
+Forecast Warm-Start Benchmark
+Compares cold Prophet fits with fits initialised from the previous parameters
+
+Run from the backend directory:
+    python -m benchmarks.bench_forecast_warm_start
+"""
+import logging
+import time
+import numpy as np
+import pandas as pd
+
+from logic import fit_forecast
+
+logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+REPEAT = 3
+
+
+def make_history(days: int, seed: int = 11) -> pd.DataFrame:
+    """Expense history with monthly salary batches, recurring bills and daily spend"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2022-01-01", periods=days, freq="D")
+    rows = []
+    for day in dates:
+        if day.day == 1:
+            rows += [(day, amount) for amount in rng.normal(120000, 15000, 8)]
+        if day.day == 5:
+            rows.append((day, rng.normal(45000, 4000)))
+        for _ in range(rng.poisson(3)):
+            rows.append((day, rng.lognormal(8, 1)))
+    return pd.DataFrame(rows, columns=["ds", "y"])
+
+
+def timed(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+if __name__ == "__main__":
+    print("=" * 72)
+    print(f"{'history':<10} {'rows':>7} {'cold fit':>12} {'warm fit':>12} {'speedup':>9}")
+    print("=" * 72)
+
+    for days in [180, 365, 730]:
+        full = make_history(days + 7)
+        previous = full[full["ds"] < full["ds"].max() - pd.Timedelta(days=6)]
+
+        # The previous night's fit whose parameters seed the warm start
+        _, params = fit_forecast(previous)
+
+        cold = timed(lambda: fit_forecast(full))
+        warm = timed(lambda: fit_forecast(full, init=params))
+        print(f"{days:>4} days {len(full):>9,} {cold * 1000:>10.0f}ms {warm * 1000:>10.0f}ms {cold / warm:>8.2f}x")
@@ -0,0 +1,59 @@
+"""
+Recurring Payment Detection Benchmark
+Full detection over a large synthetic tenant against the incremental update after new transactions
+
+Run from the backend directory:
+    python -m benchmarks.bench_recurring [--rows 1000000] [--append 100]
+"""
+import argparse
+import time
+from datetime import timedelta
+
+from snapshot import TransactionSnapshot
+from synthetic_data import generate_transactions
+from recurring import detect_series, snapshot_series
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def rows_of(df, first_id: int = 0) -> list:
+    return list(zip(
+        range(first_id, first_id + len(df)), df["date"].dt.to_pydatetime(), df["amount"].tolist(),
+        df["category"].tolist(), df["vendor"].tolist(), df["description"].tolist()
+    ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--append", type=int, default=100, help="Transactions added before the incremental update")
+    args = parser.parse_args()
+
+    df = generate_transactions(args.rows, seed=5)
+    snapshot = TransactionSnapshot.from_rows(0, rows_of(df))
+    detected = snapshot_series(snapshot)
+    series = [entry for entries in detected.values() for entry in entries]
+    print(f"{args.rows:,} transactions, {len(set(snapshot.payees))} payees")
+    print(f"  {len(series)} recurring series: "
+          + ", ".join(f"{sum(e['period'] == p for e in series)} {p}" for p in sorted({e['period'] for e in series})))
+    print(f"  full detection            {best_of(lambda: detect_series(snapshot)) * 1000:8.1f} ms")
+
+    # More transactions, up to a month past the analysed history
+    later = generate_transactions(args.append, seed=6, end=df["date"].max() + timedelta(days=31))
+    appended = snapshot.append(1, rows_of(later, first_id=args.rows))
+
+    def incremental():
+        appended._derived.clear()
+        return snapshot_series(appended)
+
+    touched = len(set(appended.payees[snapshot.size:]))
+    print(f"  incremental               {best_of(incremental) * 1000:8.1f} ms (+{args.append} rows, {touched} payees)")
+    assert incremental() == detect_series(appended)
+    print("  matches a full detection: yes")
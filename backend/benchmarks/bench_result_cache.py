@@ -0,0 +1,73 @@
+"""
+Shared Result Cache Benchmark
+Computes financials and a forecast in one process and times the same calls from fresh worker processes
+
+Run from the backend directory:
+    python -m benchmarks.bench_result_cache [--rows 100000] [--workers 4]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+# Scratch database and cache file, set before any backend module is imported;
+# spawned workers re-import this module and inherit the parent's directory
+_DIR = os.environ.get("FINSIGHT_BENCH_DIR") or tempfile.mkdtemp(prefix="finsight-result-cache-")
+os.environ["FINSIGHT_BENCH_DIR"] = _DIR
+os.environ["DATABASE_URL"] = f"sqlite:///{_DIR}/bench.db"
+os.environ["RESULT_CACHE_PATH"] = f"{_DIR}/results.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def timed_calls(user_id: int) -> dict:
+    """Run in a fresh process: nothing is cached in memory here"""
+    from database import SessionLocal
+    from logic import calculate_financials, generate_forecast
+
+    db = SessionLocal()
+    try:
+        timings = {}
+        for name, call in (("financials", lambda: calculate_financials(db, user_id)),
+                           ("forecast", lambda: generate_forecast(db, user_id, resolution="weekly"))):
+            started = time.perf_counter()
+            result = call()
+            timings[name] = time.perf_counter() - started
+            assert "error" not in result, result
+        return timings
+    finally:
+        db.close()
+
+
+def report(label: str, timings: dict):
+    print(f"  {label:<28} financials {timings['financials'] * 1000:8.1f} ms   "
+          f"forecast {timings['forecast'] * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    from database import engine, Base, SessionLocal
+    from synthetic_data import generate_transactions, load_tenant, create_tenant
+    from result_cache import result_cache
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = create_tenant(db, "cache@finsight.ai", "Cache Bench", password_hash="-")
+    load_tenant(db, user.id, generate_transactions(args.rows, seed=3))
+    user_id = user.id
+    db.close()
+    print(f"{args.rows:,} transactions, cache file {result_cache.path}\n")
+
+    spawn = multiprocessing.get_context("spawn")
+    with spawn.Pool(1) as pool:
+        report("first worker (cold)", pool.apply(timed_calls, (user_id,)))
+    with spawn.Pool(args.workers) as pool:
+        for n, timings in enumerate(pool.map(timed_calls, [user_id] * args.workers)):
+            report(f"other worker {n + 1} (shared)", timings)
+
+    stats = result_cache.stats()
+    print(f"\n{stats['entries']} entries, {stats['bytes'] / 1024:.1f} KB of {stats['max_bytes'] / 1024 / 1024:.0f} MB")
@@ -0,0 +1,90 @@
+"""
+Response Serialization Benchmark
+Compares FastAPI's default encoding against orjson records and columnar payloads
+
+Run from the backend directory:
+    python -m benchmarks.bench_serialization
+"""
+import gzip
+import json
+import time
+import random
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+
+from responses import FastJSONResponse, frame_payload, rows_payload
+
+HISTORY_DAYS = 730
+HORIZON_DAYS = 180
+TRANSACTION_ROWS = 10_000
+COLUMNS = ["id", "transaction_id", "date", "description", "amount", "category", "vendor", "notes"]
+
+
+def make_forecast() -> pd.DataFrame:
+    """Forecast frame shaped like Prophet's output"""
+    periods = HISTORY_DAYS + HORIZON_DAYS
+    rng = np.random.default_rng(42)
+    yhat = rng.normal(50000, 5000, periods)
+    return pd.DataFrame({
+        'ds': pd.date_range('2023-01-01', periods=periods, freq='D'),
+        'yhat': yhat,
+        'yhat_lower': yhat - 8000,
+        'yhat_upper': yhat + 8000,
+    })
+
+
+def make_transaction_rows():
+    """Result rows shaped like a transactions page"""
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+    return [
+        (i, f"txn_{i:08d}", start + timedelta(days=rng.randint(0, 700)),
+         f"Vendor {rng.randint(1, 200)} invoice", -round(rng.uniform(100, 90000), 2),
+         rng.choice(["Salaries", "Cloud Services", "Software", "Marketing", "Office"]),
+         f"Vendor {rng.randint(1, 200)}", None)
+        for i in range(TRANSACTION_ROWS)
+    ]
+
+
+def default_encode(content) -> bytes:
+    """What FastAPI does for a plain dict/list return value"""
+    return json.dumps(jsonable_encoder(content), separators=(',', ':')).encode('utf-8')
+
+
+def timed(fn, repeat: int = 5):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def report(label: str, fn):
+    seconds, body = timed(fn)
+    compressed = len(gzip.compress(body, compresslevel=9))
+    print(f"  {label:<28} {seconds * 1000:8.2f} ms   {len(body) / 1024:8.1f} KiB   gzip {compressed / 1024:7.1f} KiB")
+
+
+if __name__ == "__main__":
+    forecast = make_forecast()
+    print("=" * 80)
+    print(f"Forecast payload ({len(forecast)} rows)")
+    print("=" * 80)
+    report("to_dict + jsonable_encoder", lambda: default_encode(forecast.to_dict('records')))
+    report("orjson records", lambda: FastJSONResponse(frame_payload(forecast)).body)
+    report("orjson columnar", lambda: FastJSONResponse(frame_payload(forecast, columnar=True)).body)
+
+    rows = make_transaction_rows()
+    print()
+    print("=" * 80)
+    print(f"Transactions page ({TRANSACTION_ROWS:,} rows)")
+    print("=" * 80)
+    report("dicts + jsonable_encoder", lambda: default_encode([
+        {**dict(zip(COLUMNS, row)), "date": row[2].isoformat()} for row in rows
+    ]))
+    report("orjson records", lambda: FastJSONResponse(rows_payload(rows, COLUMNS)).body)
+    report("orjson columnar", lambda: FastJSONResponse(rows_payload(rows, COLUMNS, columnar=True)).body)
@@ -0,0 +1,94 @@
+"""
+Transaction Snapshot Benchmark
+Memory footprint and build time of a columnar snapshot against the per-request DataFrame it replaces
+
+Run from the backend directory:
+    python -m benchmarks.bench_snapshot [--rows 100000] [--tenants 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+# Scratch database, set before any backend module creates the engine
+_DB_DIR = tempfile.mkdtemp(prefix="finsight-snapshot-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/bench.db"
+os.environ["RESULT_CACHE_PATH"] = ""
+
+import pandas as pd
+
+from database import engine, Base, SessionLocal
+from models import Transaction
+from synthetic_data import generate_transactions, load_tenant, create_tenant
+from snapshot import SnapshotCache, build_snapshot
+from logic import calculate_financials, load_financial_baseline
+
+
+def mb(nbytes: float) -> str:
+    return f"{nbytes / 1024 / 1024:8.2f} MB"
+
+
+def legacy_frame(db, user_id: int) -> pd.DataFrame:
+    """What calculate_financials loaded on every request before snapshots"""
+    rows = db.query(Transaction.date, Transaction.amount, Transaction.category).filter(
+        Transaction.user_id == user_id
+    ).all()
+    return pd.DataFrame(rows, columns=['date', 'amount', 'category'])
+
+
+def timed(fn, *args, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000, help="Transactions per tenant")
+    parser.add_argument("--tenants", type=int, default=3)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    users = []
+    for n in range(args.tenants):
+        user = create_tenant(db, f"snapshot-{n}@finsight.ai", f"Snapshot {n}", password_hash="-")
+        load_tenant(db, user.id, generate_transactions(args.rows, seed=n))
+        users.append(user.id)
+    print(f"{args.tenants} tenants x {args.rows:,} transactions\n")
+
+    user_id = users[0]
+    tracemalloc.start()
+    snapshot = build_snapshot(db, user_id, version=0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_100k = snapshot.nbytes / snapshot.size * 100_000
+
+    frame = legacy_frame(db, user_id)
+    print("Memory")
+    print(f"  snapshot              {mb(snapshot.nbytes)}  ({mb(per_100k).strip()} per 100k rows)")
+    print(f"    arrays              {mb(snapshot.array_nbytes)}")
+    print(f"    categories/payees   {len(snapshot.categories)} / {len(set(snapshot.payees))} distinct")
+    print(f"  build peak (traced)   {mb(peak)}")
+    print(f"  legacy DataFrame      {mb(frame.memory_usage(deep=True).sum())}")
+
+    print("\nTime (best of 5)")
+    print(f"  build snapshot        {timed(build_snapshot, db, user_id, 0) * 1000:8.1f} ms")
+    print(f"  legacy query+frame    {timed(legacy_frame, db, user_id) * 1000:8.1f} ms")
+    calculate_financials(db, user_id)
+    print(f"  calculate_financials  {timed(calculate_financials, db, user_id) * 1000:8.1f} ms (warm snapshot)")
+    baseline = load_financial_baseline(db, user_id)
+    print(f"    arithmetic only     {timed(calculate_financials, db, user_id, baseline) * 1000:8.1f} ms")
+
+    # Budget for two tenants: the third build evicts the least recently used
+    cache = SnapshotCache(max_bytes=int(snapshot.nbytes * 2.5))
+    for uid in users:
+        cache.put(uid, build_snapshot(db, uid, version=0))
+    print(f"\nLRU with a {mb(cache.max_bytes).strip()} budget holds {len(cache)} of {len(users)} tenants "
+          f"({mb(cache.nbytes).strip()})")
+
+    db.close()
@@ -0,0 +1,136 @@
+"""
+Backend Benchmark Suite
+pytest-benchmark timings for the hot paths over synthetic tenants
+
+Requires pytest and pytest-benchmark. Run from the backend directory:
+    python -m pytest benchmarks/suite [--tenant-sizes 1k,100k,1m] [--analyzer-sizes 1k,10k]
+
+Every run is saved as JSON under .benchmarks/ (pytest-benchmark autosave).
+Compare against an earlier run with --benchmark-compare[=NNNN], or write a
+specific file with --benchmark-json=results.json.
+"""
+from fastapi import Request, Response
+import pytest
+
+from models import Forecast
+from logic import calculate_financials, generate_forecast
+from main import get_category_stats
+from snapshot import build_snapshot
+from recurring import detect_series
+from upload_handler import CSVUploadHandler
+from ml_analyzer import TransactionAnalyzer
+
+# Prophet fits are slow; a few rounds are enough
+FORECAST_ROUNDS = 3
+
+# detect_duplicates compares every new row with every existing row
+DUPLICATE_BATCH = 1000
+
+
+def _request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/api/stats/categories", "headers": []})
+
+
+# --- Database-backed endpoints and logic ---
+def bench_build_snapshot(benchmark, db, tenant):
+    """Cold path behind every snapshot read: the lean select and column encoding"""
+    snapshot = benchmark(build_snapshot, db, tenant.id, tenant.data_version)
+    assert snapshot.size > 0
+
+
+def bench_detect_recurring(benchmark, db, tenant):
+    """Full recurring-payment detection over a built snapshot"""
+    snapshot = build_snapshot(db, tenant.id, tenant.data_version)
+    detected = benchmark(detect_series, snapshot)
+    assert detected
+
+
+def bench_calculate_financials(benchmark, db, tenant):
+    result = benchmark(calculate_financials, db, tenant.id)
+    assert "error" not in result
+
+
+def bench_get_category_stats(benchmark, db, tenant):
+    result = benchmark(
+        lambda: get_category_stats(request=_request(), response=Response(), current_user=tenant, db=db)
+    )
+    assert result["categories"]
+
+
+def bench_generate_forecast_fit(benchmark, db, tenant):
+    """Cold path: the stored forecast is dropped before every round"""
+    def clear_stored():
+        db.query(Forecast).filter(Forecast.user_id == tenant.id).delete()
+        db.commit()
+
+    result = benchmark.pedantic(
+        generate_forecast, args=(db, tenant.id), setup=clear_stored, rounds=FORECAST_ROUNDS, iterations=1
+    )
+    assert "error" not in result
+
+
+def bench_generate_forecast_stored(benchmark, db, tenant):
+    """Warm path: the fingerprint matches and the stored result is served"""
+    generate_forecast(db, tenant.id)
+    result = benchmark(generate_forecast, db, tenant.id)
+    assert "error" not in result
+
+
+# --- CSV parsing ---
+def bench_parse_csv(benchmark, statement):
+    handler = CSVUploadHandler()
+    df, metadata = benchmark(handler.parse_csv, statement)
+    assert len(df) == metadata["total_rows"] > 0
+
+
+# --- TransactionAnalyzer ---
+@pytest.fixture
+def trained_analyzer(analyzer_rows):
+    analyzer = TransactionAnalyzer()
+    analyzer.train_categorizer(analyzer_rows)
+    return analyzer
+
+
+def bench_train_categorizer(benchmark, analyzer_rows):
+    assert benchmark(TransactionAnalyzer().train_categorizer, analyzer_rows)
+
+
+def bench_predict_category(benchmark, trained_analyzer, analyzer_rows):
+    descriptions = [row["description"] for row in analyzer_rows[:1000]]
+    benchmark(lambda: [trained_analyzer.predict_category(d) for d in descriptions])
+
+
+def bench_keyword_categorize(benchmark, analyzer_rows):
+    analyzer = TransactionAnalyzer()
+    descriptions = [row["description"] for row in analyzer_rows]
+    benchmark(lambda: [analyzer.predict_category(d) for d in descriptions])
+
+
+def bench_detect_anomalies(benchmark, analyzer_rows):
+    anomalies = benchmark(TransactionAnalyzer().detect_anomalies, analyzer_rows)
+    assert anomalies
+
+
+def bench_extract_vendor(benchmark, analyzer_rows):
+    analyzer = TransactionAnalyzer()
+    descriptions = [row["description"] for row in analyzer_rows]
+    benchmark(lambda: [analyzer.extract_vendor(d) for d in descriptions])
+
+
+def bench_detect_duplicates(benchmark, analyzer_rows):
+    existing = analyzer_rows[:DUPLICATE_BATCH]
+    incoming = [dict(row, id=len(analyzer_rows) + i) for i, row in enumerate(analyzer_rows[-DUPLICATE_BATCH:])]
+    benchmark(TransactionAnalyzer().detect_duplicates, incoming, existing)
+
+
+def bench_analyze_upload(benchmark, analyzer_rows):
+    incoming = analyzer_rows[-DUPLICATE_BATCH:]
+    existing = analyzer_rows[:DUPLICATE_BATCH]
+
+    def analyze():
+        # analyze_upload fills in category and vendor in place
+        rows = [dict(row, category=None, vendor=None) for row in incoming]
+        return TransactionAnalyzer().analyze_upload(rows, existing)
+
+    result = benchmark(analyze)
+    assert result["total_transactions"] == len(incoming)
@@ -0,0 +1,87 @@
+"""
+Benchmark suite fixtures: a throwaway SQLite database with synthetic tenants
+"""
+import os
+import tempfile
+
+# Point the app at a scratch database before any backend module is imported
+_DB_DIR = tempfile.mkdtemp(prefix="finsight-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/bench.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Time the computations, not the shared result cache in front of them
+os.environ["RESULT_CACHE_PATH"] = ""
+
+import logging
+import pytest
+
+from database import engine, Base, SessionLocal
+from synthetic_data import SIZES, BANK_FORMATS, generate_transactions, write_statement, load_tenant, create_tenant
+
+logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+SEED = 1234
+
+
+def pytest_addoption(parser):
+    parser.addoption("--tenant-sizes", default="1k,100k",
+                     help=f"Comma-separated tenant sizes for the database benchmarks ({', '.join(SIZES)})")
+    parser.addoption("--analyzer-sizes", default="1k,10k",
+                     help="Comma-separated row counts for the TransactionAnalyzer benchmarks")
+
+
+def _sizes(config, option):
+    return [size.strip().lower() for size in config.getoption(option).split(",") if size.strip()]
+
+
+def pytest_generate_tests(metafunc):
+    if "tenant_size" in metafunc.fixturenames:
+        metafunc.parametrize("tenant_size", _sizes(metafunc.config, "--tenant-sizes"), scope="session")
+    if "analyzer_size" in metafunc.fixturenames:
+        metafunc.parametrize("analyzer_size", _sizes(metafunc.config, "--analyzer-sizes"), scope="session")
+    if "bank_format" in metafunc.fixturenames:
+        metafunc.parametrize("bank_format", list(BANK_FORMATS), scope="session")
+
+
+@pytest.fixture(scope="session")
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def tenant_frames():
+    """Generated histories, shared by the database and CSV fixtures"""
+    return {}
+
+
+def _frame(tenant_frames, size):
+    if size not in tenant_frames:
+        tenant_frames[size] = generate_transactions(SIZES[size], SEED)
+    return tenant_frames[size]
+
+
+@pytest.fixture(scope="session")
+def tenant(db, tenant_size, tenant_frames):
+    """A user loaded with tenant_size synthetic transactions"""
+    user = create_tenant(db, f"bench-{tenant_size}@finsight.ai", f"Bench {tenant_size}", password_hash="-")
+    load_tenant(db, user.id, _frame(tenant_frames, tenant_size))
+    return user
+
+
+@pytest.fixture(scope="session")
+def statement(tmp_path_factory, tenant_size, bank_format, tenant_frames):
+    """The tenant's history written as a bank statement CSV"""
+    path = tmp_path_factory.mktemp("statements") / f"{tenant_size}-{bank_format}.csv"
+    write_statement(_frame(tenant_frames, tenant_size), path, bank_format)
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def analyzer_rows(analyzer_size):
+    """Transaction dicts in the shape TransactionAnalyzer receives from the upload flow"""
+    df = generate_transactions(SIZES[analyzer_size], SEED)
+    df["date"] = df["date"].dt.strftime("%Y-%m-%d")
+    df = df.astype(object).where(df.notna(), None)
+    return [{"id": i, **row} for i, row in enumerate(df.drop(columns="transaction_id").to_dict("records"))]
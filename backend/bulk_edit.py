@@ -0,0 +1,200 @@
+"""
+Bulk Transaction Edits
+Delete or update every transaction matching a filter with a single statement
+
+Each edit is one DELETE or UPDATE scoped to the user and committed with the
+data_version bump, so ETags, the result cache and other workers' snapshots
+all see it at once. Where the database supports RETURNING (SQLite 3.35+,
+PostgreSQL) the affected rows come back from the same statement and this
+worker's snapshot is patched rather than rebuilt. The search index follows
+through its triggers (SQLite) or generated column (PostgreSQL).
+"""
+from typing import Dict, List, Optional
+from datetime import date, datetime, timedelta
+import json
+import time
+from pydantic import BaseModel, Field
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from models import Transaction, Upload
+from logic import bump_data_version, log_activity
+from snapshot import SNAPSHOT_COLUMNS, snapshot_cache
+from log_config import get_logger
+
+logger = get_logger("bulk_edit")
+
+MAX_FILTER_IDS = 10000
+
+# Changes that alter what a snapshot holds (payees come from vendor)
+SNAPSHOT_FIELDS = {"category", "vendor"}
+
+
+class TransactionFilter(BaseModel):
+    ids: Optional[List[int]] = Field(None, max_length=MAX_FILTER_IDS)
+    upload_id: Optional[int] = None
+    vendor: Optional[str] = None  # exact match, ignoring case
+    category: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None  # inclusive
+
+    def is_empty(self) -> bool:
+        return not self.model_dump(exclude_none=True)
+
+    def summary(self) -> Dict:
+        """The filter for the activity log, with the id list reduced to its length"""
+        summary = self.model_dump(mode="json", exclude_none=True)
+        if "ids" in summary:
+            summary["ids"] = len(summary["ids"])
+        return summary
+
+
+class TransactionChanges(BaseModel):
+    """Fields to set; only those present in the request are written (null clears vendor or notes)"""
+    category: Optional[str] = Field(None, min_length=1, max_length=100)
+    vendor: Optional[str] = Field(None, max_length=255)
+    notes: Optional[str] = None
+
+    def values(self) -> Dict:
+        values = {name: getattr(self, name) for name in self.model_fields_set}
+        if "category" in values and values["category"] is None:
+            raise ValueError("category cannot be cleared")
+        return values
+
+
+class BulkDeleteRequest(BaseModel):
+    filter: TransactionFilter
+    dry_run: bool = False
+
+
+class BulkUpdateRequest(BaseModel):
+    filter: TransactionFilter
+    changes: TransactionChanges
+    dry_run: bool = False
+
+
+def filter_conditions(user_id: int, criteria: TransactionFilter) -> list:
+    conditions = [Transaction.user_id == user_id]
+    if criteria.ids is not None:
+        conditions.append(Transaction.id.in_(criteria.ids))
+    if criteria.upload_id is not None:
+        conditions.append(Transaction.upload_id == criteria.upload_id)
+    if criteria.vendor is not None:
+        conditions.append(func.lower(Transaction.vendor) == criteria.vendor.lower())
+    if criteria.category is not None:
+        conditions.append(Transaction.category == criteria.category)
+    if criteria.start_date:
+        conditions.append(Transaction.date >= datetime.combine(criteria.start_date, datetime.min.time()))
+    if criteria.end_date:
+        conditions.append(Transaction.date < datetime.combine(criteria.end_date + timedelta(days=1), datetime.min.time()))
+    return conditions
+
+
+def count_matching(db: Session, conditions: list) -> int:
+    return db.execute(select(func.count()).select_from(Transaction).where(*conditions)).scalar_one()
+
+
+def release_emptied_uploads(db: Session, user_id: int, upload_ids) -> int:
+    """Return imported uploads that no longer have any transactions to the staged state
+
+    Deleting every row of a bad import makes the upload confirmable again
+    (and an identical re-upload hands it back) instead of staying "imported".
+    Runs inside the caller's transaction; returns the number of uploads reset.
+    """
+    upload_ids = {upload_id for upload_id in upload_ids if upload_id is not None}
+    if not upload_ids:
+        return 0
+    remaining = select(Transaction.id).where(Transaction.upload_id == Upload.id).exists()
+    return db.execute(
+        update(Upload).where(
+            Upload.user_id == user_id, Upload.id.in_(upload_ids), Upload.status == "imported", ~remaining
+        ).values(status="completed", imported_count=0).execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def _returning(db: Session) -> bool:
+    dialect = db.get_bind().dialect
+    return dialect.delete_returning and dialect.update_returning
+
+
+def bulk_delete(db: Session, user_id: int, data_version: int, criteria: TransactionFilter,
+                dry_run: bool = False) -> Dict:
+    """Delete the matching transactions; data_version is the user's version before the write"""
+    conditions = filter_conditions(user_id, criteria)
+    if dry_run:
+        return {"success": True, "dry_run": True, "matched": count_matching(db, conditions)}
+
+    started = time.perf_counter()
+    stmt = delete(Transaction).where(*conditions).execution_options(synchronize_session=False)
+    deleted_ids: Optional[List[int]] = None
+    if _returning(db):
+        rows = db.execute(stmt.returning(Transaction.id, Transaction.upload_id)).all()
+        deleted_ids = [row[0] for row in rows]
+        upload_ids = {row[1] for row in rows}
+        deleted = len(rows)
+    else:
+        deleted = db.execute(stmt).rowcount
+        upload_ids = {criteria.upload_id}
+    if not deleted:
+        db.rollback()
+        return {"success": True, "deleted": 0}
+
+    released = release_emptied_uploads(db, user_id, upload_ids)
+    bump_data_version(db, user_id)
+    db.commit()
+    if deleted_ids is not None:
+        snapshot_cache.apply(user_id, data_version, deleted=deleted_ids)
+    else:
+        snapshot_cache.invalidate(user_id)
+
+    logger.info("transactions.bulk_delete", extra={
+        "user_id": user_id, "deleted": deleted, "seconds": round(time.perf_counter() - started, 3)
+    })
+    log_activity(db, user_id, "BULK_DELETE_TRANSACTIONS",
+                 json.dumps({"filter": criteria.summary(), "deleted": deleted}))
+    return {"success": True, "deleted": deleted, "uploads_released": released}
+
+
+def bulk_update(db: Session, user_id: int, data_version: int, criteria: TransactionFilter,
+                changes: TransactionChanges, dry_run: bool = False) -> Dict:
+    """Set category, vendor and/or notes on the matching transactions
+
+    Raises ValueError when there is nothing to set.
+    """
+    values = changes.values()
+    if not values:
+        raise ValueError("Give at least one of category, vendor or notes to set")
+    conditions = filter_conditions(user_id, criteria)
+    if dry_run:
+        return {"success": True, "dry_run": True, "matched": count_matching(db, conditions)}
+
+    started = time.perf_counter()
+    stmt = update(Transaction).where(*conditions).values(**values).execution_options(synchronize_session=False)
+    affects_snapshot = bool(SNAPSHOT_FIELDS & values.keys())
+    rows = None
+    if affects_snapshot and _returning(db):
+        rows = [tuple(row) for row in db.execute(stmt.returning(*SNAPSHOT_COLUMNS))]
+        updated = len(rows)
+    else:
+        updated = db.execute(stmt).rowcount
+    if not updated:
+        db.rollback()
+        return {"success": True, "updated": 0}
+
+    bump_data_version(db, user_id)
+    db.commit()
+    if not affects_snapshot:
+        snapshot_cache.apply(user_id, data_version)
+    elif rows is not None:
+        # Swap the changed rows for their new values
+        snapshot_cache.apply(user_id, data_version, added=rows, deleted=[row[0] for row in rows])
+    else:
+        snapshot_cache.invalidate(user_id)
+
+    logger.info("transactions.bulk_update", extra={
+        "user_id": user_id, "updated": updated, "fields": sorted(values),
+        "seconds": round(time.perf_counter() - started, 3)
+    })
+    log_activity(db, user_id, "BULK_UPDATE_TRANSACTIONS",
+                 json.dumps({"filter": criteria.summary(), "changes": values, "updated": updated}))
+    return {"success": True, "updated": updated}
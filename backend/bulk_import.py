@@ -0,0 +1,167 @@
+"""
+Bulk Transaction Import
+Validates incoming transaction rows in batches and inserts them chunk by chunk
+"""
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from datetime import datetime
+import json
+import time
+import uuid
+import orjson
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models import Transaction
+from date_formats import parse_date_string
+from logic import bump_data_version, log_activity
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 10000
+
+# Cap on per-row errors echoed back in the response
+MAX_REPORTED_ERRORS = 1000
+
+
+class TransactionCreate(BaseModel):
+    date: Optional[str] = None
+    description: str
+    amount: float
+    category: str
+    vendor: Optional[str] = None
+    notes: Optional[str] = None
+
+
+def new_transaction_id() -> str:
+    """Collision-free transaction id for generated rows"""
+    return f"txn_{uuid.uuid4().hex[:16]}"
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a streamed body into non-empty lines
+
+    The unfinished tail is kept as a list of pieces and joined once its newline
+    arrives, so a long line spread over many chunks is copied only once.
+    """
+    partial: List[bytes] = []
+    async for chunk in chunks:
+        lines = chunk.split(b"\n")
+        if len(lines) == 1:
+            partial.append(chunk)
+            continue
+        partial.append(lines[0])
+        lines[0] = b"".join(partial)
+        partial = [lines.pop()]
+        for line in lines:
+            if line.strip():
+                yield line
+    line = b"".join(partial)
+    if line.strip():
+        yield line
+
+
+class BulkTransactionImporter:
+    """Accumulates raw rows and writes them in chunks, one transaction per chunk"""
+
+    def __init__(self, db: Session, user_id: int, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.db = db
+        self.user_id = user_id
+        self.chunk_size = max(1, min(chunk_size, MAX_CHUNK_SIZE))
+        self.pending: List[tuple] = []  # (row number, raw row)
+        self.row_count = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[Dict] = []
+        self.started = time.perf_counter()
+
+    def add(self, raw) -> bool:
+        """Queue a raw row (dict or NDJSON line); returns True when a chunk is ready"""
+        self.pending.append((self.row_count, raw))
+        self.row_count += 1
+        return len(self.pending) >= self.chunk_size
+
+    def add_many(self, raws: Iterable):
+        for raw in raws:
+            if self.add(raw):
+                self.flush()
+
+    def _record_error(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def _validate(self, row: int, raw) -> Optional[Dict]:
+        """Turn a raw row into insert parameters, or record why it was rejected"""
+        try:
+            if isinstance(raw, (bytes, str)):
+                raw = orjson.loads(raw)
+            txn = TransactionCreate.model_validate(raw)
+            txn_date = parse_date_string(txn.date) if txn.date else datetime.utcnow()
+        except orjson.JSONDecodeError as e:
+            self._record_error(row, f"Invalid JSON: {e}")
+            return None
+        except ValidationError as e:
+            self._record_error(row, "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+            ))
+            return None
+        except ValueError as e:
+            self._record_error(row, str(e))
+            return None
+
+        return {
+            "user_id": self.user_id,
+            "transaction_id": new_transaction_id(),
+            "date": txn_date,
+            "description": txn.description,
+            "amount": txn.amount,
+            "category": txn.category,
+            "vendor": txn.vendor,
+            "notes": txn.notes,
+            "created_at": datetime.utcnow(),
+        }
+
+    def flush(self):
+        """Validate and insert the pending chunk with a single executemany"""
+        batch, self.pending = self.pending, []
+        valid = []
+        rows = []
+        for row, raw in batch:
+            params = self._validate(row, raw)
+            if params is not None:
+                valid.append(params)
+                rows.append(row)
+
+        if not valid:
+            return
+
+        try:
+            self.db.execute(insert(Transaction), valid)
+            bump_data_version(self.db, self.user_id)
+            self.db.commit()
+            self.inserted += len(valid)
+        except Exception as e:
+            self.db.rollback()
+            for row in rows:
+                self._record_error(row, f"Insert failed: {e}")
+
+    def finish(self) -> Dict:
+        """Flush the remainder, log one summary activity and build the report"""
+        if self.pending:
+            self.flush()
+
+        elapsed = time.perf_counter() - self.started
+        summary = {
+            "received": self.row_count,
+            "inserted": self.inserted,
+            "failed": self.failed,
+        }
+        log_activity(self.db, self.user_id, "BULK_ADD_TRANSACTIONS", json.dumps(summary))
+
+        return {
+            **summary,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_sec": round(self.inserted / elapsed, 1) if elapsed > 0 else None,
+        }
@@ -0,0 +1,348 @@
+"""
+Bulk Transaction Loader
+Streams a transaction CSV into the database in chunks, one commit per chunk
+
+Loading is idempotent on transaction_id: rows whose id this user already has
+are skipped, and rows without an id get one derived from their content and
+line number, so re-running a load never duplicates anything. Ids that belong
+to another user are not loaded and are reported as conflicts. Progress is
+kept in a checkpoint file next to the CSV, and an interrupted load resumes
+from the last committed chunk.
+
+Usage:
+    python -m bulk_loader FILE (--email EMAIL | --user-id ID) [--chunk-size 10000] [--restart]
+"""
+from typing import Callable, Dict, Iterable, Iterator, Optional
+from datetime import datetime
+import argparse
+import hashlib
+import json
+import os
+import time
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models import Transaction
+from date_formats import infer_date_format, parse_dates
+from logic import bump_data_version, log_activity
+from log_config import get_logger
+
+logger = get_logger("bulk_loader")
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# Header variations accepted for each column, matched case-insensitively
+COLUMN_ALIASES = {
+    "transaction_id": ["transaction id", "transaction_id", "txn id", "txn_id"],
+    "date": ["date", "transaction date", "txn date", "transaction_date", "txn_date"],
+    "description": ["description", "desc", "details", "particulars"],
+    "amount": ["amount", "value", "transaction amount"],
+    "category": ["category"],
+    "vendor": ["vendor", "merchant", "payee"],
+    "notes": ["notes", "memo", "remarks"],
+}
+REQUIRED_COLUMNS = ("date", "description", "amount")
+
+DEFAULT_CATEGORY = "Uncategorized"
+
+# Ids per IN (...) lookup, well under SQLite's bound-parameter limit
+LOOKUP_BATCH_SIZE = 5000
+
+# Cap on conflicting ids echoed back in the report
+MAX_REPORTED_CONFLICTS = 100
+
+INSERT_COLUMNS = [
+    "user_id", "transaction_id", "date", "description", "amount",
+    "category", "vendor", "notes", "created_at",
+]
+
+
+def checkpoint_path(path: str, user_id: int) -> str:
+    return f"{path}.user_{user_id}.checkpoint.json"
+
+
+def file_fingerprint(path: str) -> Dict:
+    """Size and mtime identify the file a checkpoint was written for"""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def read_checkpoint(path: str, user_id: int) -> int:
+    """Rows already committed for this file, or 0 when there is no usable checkpoint"""
+    try:
+        with open(checkpoint_path(path, user_id)) as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return 0
+    if checkpoint.get("file") != file_fingerprint(path):
+        logger.warning("bulk_loader.stale_checkpoint", extra={"path": path})
+        return 0
+    return int(checkpoint.get("rows_done", 0))
+
+
+def write_checkpoint(path: str, user_id: int, rows_done: int):
+    """Record progress atomically so a crash never leaves a half-written checkpoint"""
+    target = checkpoint_path(path, user_id)
+    tmp_path = target + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"file": file_fingerprint(path), "rows_done": rows_done,
+                   "updated_at": datetime.utcnow().isoformat()}, f)
+    os.replace(tmp_path, target)
+
+
+def clear_checkpoint(path: str, user_id: int):
+    try:
+        os.remove(checkpoint_path(path, user_id))
+    except FileNotFoundError:
+        pass
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename recognised headers to model columns and drop the rest"""
+    lookup = {alias: name for name, aliases in COLUMN_ALIASES.items() for alias in aliases}
+    renames = {}
+    for col in df.columns:
+        name = lookup.get(str(col).lower().strip())
+        if name and name not in renames.values():
+            renames[col] = name
+    missing = [col for col in REQUIRED_COLUMNS if col not in renames.values()]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    return df[list(renames)].rename(columns=renames)
+
+
+def derived_transaction_ids(user_id: int, df: pd.DataFrame) -> list:
+    """Stable ids for rows without one, so reloading the same file matches them again"""
+    keys = (f"{user_id}|" + df["line"].astype(str) + "|" + df["date"].astype(str) + "|"
+            + df["description"] + "|" + df["amount"].astype(str))
+    return [f"txn_{hashlib.sha1(key.encode()).hexdigest()[:16]}" for key in keys]
+
+
+def existing_owners(db: Session, ids: list) -> Dict[str, int]:
+    """Owner user_id of each id in ids that is already stored
+
+    transaction_id is unique across all users, so an id can be taken by
+    another account as well as by an earlier load into this one.
+    """
+    owners = {}
+    for start in range(0, len(ids), LOOKUP_BATCH_SIZE):
+        batch = ids[start:start + LOOKUP_BATCH_SIZE]
+        owners.update(db.query(Transaction.transaction_id, Transaction.user_id)
+                      .filter(Transaction.transaction_id.in_(batch)))
+    return owners
+
+
+class BulkLoader:
+    """Cleans DataFrame chunks and writes them with executemany, committing per chunk"""
+
+    def __init__(self, db: Session, user_id: int, date_format: Optional[str] = None,
+                 progress: Optional[Callable[[Dict], None]] = None):
+        self.db = db
+        self.user_id = user_id
+        self.date_format = date_format
+        self.progress = progress
+        self.rows_read = 0
+        self.inserted = 0
+        self.skipped = 0
+        self.conflicts = 0
+        self.conflicting_ids: list = []
+        self.failed = 0
+        self.total_expenses = 0.0
+        self.total_revenue = 0.0
+        self.category_totals: Dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    def _prepare(self, chunk: pd.DataFrame, first_line: int) -> pd.DataFrame:
+        df = normalize_columns(chunk)
+        if self.date_format is None:
+            self.date_format = infer_date_format(df["date"])
+
+        df["date"] = parse_dates(df["date"], self.date_format)
+        if df["amount"].dtype == "object":
+            df["amount"] = df["amount"].astype(str).str.replace(r"[₹$,]", "", regex=True)
+        df["amount"] = pd.to_numeric(df["amount"], errors="coerce")
+        df["description"] = df["description"].astype(str).str.strip()
+
+        for col in ("transaction_id", "category", "vendor", "notes"):
+            if col not in df.columns:
+                df[col] = None
+        df["category"] = df["category"].fillna(DEFAULT_CATEGORY)
+
+        # Line numbers count from the first data row of the file, not the chunk
+        df["line"] = range(first_line, first_line + len(df))
+        valid = df["date"].notna() & df["amount"].notna() & (df["description"] != "")
+        self.failed += int((~valid).sum())
+        df = df[valid].copy()
+
+        missing_ids = df["transaction_id"].isna()
+        if missing_ids.any():
+            df.loc[missing_ids, "transaction_id"] = derived_transaction_ids(self.user_id, df[missing_ids])
+        df["transaction_id"] = df["transaction_id"].astype(str).str.strip()
+        return df
+
+    def load_chunk(self, chunk: pd.DataFrame, first_line: int) -> int:
+        """Insert one chunk in its own transaction; returns rows inserted"""
+        self.rows_read += len(chunk)
+        df = self._prepare(chunk, first_line)
+        if df.empty:
+            return 0
+
+        owners = existing_owners(self.db, df["transaction_id"].unique().tolist())
+        owner = df["transaction_id"].map(owners)
+        foreign = owner.notna() & (owner != self.user_id)
+        if foreign.any():
+            conflicting = df.loc[foreign, "transaction_id"].unique().tolist()
+            logger.warning("bulk_loader.id_conflicts", extra={"user_id": self.user_id, "count": int(foreign.sum())})
+            room = MAX_REPORTED_CONFLICTS - len(self.conflicting_ids)
+            self.conflicting_ids.extend(conflicting[:max(room, 0)])
+        fresh = df[owner.isna() & ~df["transaction_id"].duplicated()]
+
+        created_at = datetime.utcnow()
+        records = fresh.assign(user_id=self.user_id, created_at=created_at)[INSERT_COLUMNS]
+        records = records.astype(object).where(records.notna(), None).to_dict("records")
+        for record in records:
+            record["date"] = record["date"].to_pydatetime()
+
+        try:
+            if records:
+                self.db.execute(insert(Transaction), records)
+                bump_data_version(self.db, self.user_id)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        inserted = len(records)
+        self.inserted += inserted
+        self.conflicts += int(foreign.sum())
+        self.skipped += len(df) - inserted - int(foreign.sum())
+        amounts = fresh["amount"]
+        self.total_expenses += float(amounts[amounts < 0].sum())
+        self.total_revenue += float(amounts[amounts > 0].sum())
+        for category, amount in fresh.groupby("category")["amount"].sum().items():
+            self.category_totals[category] = self.category_totals.get(category, 0.0) + float(amount)
+
+        if self.progress:
+            self.progress(self.stats())
+        return inserted
+
+    def stats(self) -> Dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "rows_read": self.rows_read,
+            "inserted": self.inserted,
+            "skipped": self.skipped,
+            "conflicts": self.conflicts,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_sec": round(self.rows_read / elapsed, 1) if elapsed > 0 else None,
+        }
+
+    def finish(self, source: str) -> Dict:
+        """Log one summary activity and build the report"""
+        summary = self.stats()
+        if self.inserted:
+            log_activity(self.db, self.user_id, "BULK_LOAD_TRANSACTIONS",
+                         json.dumps({"source": source, **summary}))
+        return {
+            **summary,
+            "conflicting_ids": self.conflicting_ids,
+            "total_expenses": self.total_expenses,
+            "total_revenue": self.total_revenue,
+            "category_totals": self.category_totals,
+        }
+
+
+def load_frames(db: Session, user_id: int, frames: Iterable[pd.DataFrame], source: str = "frames",
+                progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """Load already-built DataFrames, one commit per frame"""
+    loader = BulkLoader(db, user_id, progress=progress)
+    line = 0
+    for frame in frames:
+        loader.load_chunk(frame, line)
+        line += len(frame)
+    return loader.finish(source)
+
+
+def load_csv(
+    db: Session,
+    user_id: int,
+    path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    resume: bool = True,
+    date_format: Optional[str] = None,
+    progress: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """Stream a CSV into a user's transactions, resuming from its checkpoint
+
+    The checkpoint is written after each committed chunk; if the process
+    dies between the commit and the checkpoint write, the repeated chunk is
+    skipped by the transaction_id check. The checkpoint is removed once the
+    whole file has loaded.
+    """
+    rows_done = read_checkpoint(path, user_id) if resume else 0
+    if rows_done:
+        logger.info("bulk_loader.resume", extra={"path": path, "rows_done": rows_done})
+
+    loader = BulkLoader(db, user_id, date_format=date_format, progress=progress)
+    reader: Iterator[pd.DataFrame] = pd.read_csv(
+        path, chunksize=chunk_size, skiprows=range(1, rows_done + 1), dtype=str,
+        keep_default_na=False, na_values=[""]
+    )
+    line = rows_done
+    with reader:
+        for chunk in reader:
+            loader.load_chunk(chunk, line)
+            line += len(chunk)
+            write_checkpoint(path, user_id, line)
+
+    clear_checkpoint(path, user_id)
+    result = loader.finish(os.path.basename(path))
+    result["resumed_from"] = rows_done
+    return result
+
+
+def print_progress(stats: Dict):
+    print(f"  {stats['rows_read']:>10,} rows read  {stats['inserted']:>10,} inserted  "
+          f"{stats['skipped']:>8,} skipped  {stats['rows_per_sec'] or 0:>10,.0f} rows/s", flush=True)
+
+
+def print_summary(result: Dict):
+    print(f"✓ Loaded {result['inserted']:,} transactions "
+          f"({result['skipped']:,} already present, {result['failed']:,} invalid) "
+          f"in {result['elapsed_seconds']:.1f}s")
+    if result["conflicts"]:
+        print(f"⚠ {result['conflicts']:,} rows not loaded: their transaction ids belong to another account "
+              f"(e.g. {', '.join(result['conflicting_ids'][:5])})")
+
+
+if __name__ == "__main__":
+    from database import engine, Base, SessionLocal
+    from models import User
+
+    parser = argparse.ArgumentParser(description="Bulk load transactions from a CSV file")
+    parser.add_argument("file", help="CSV file with date, description and amount columns")
+    owner = parser.add_mutually_exclusive_group(required=True)
+    owner.add_argument("--email", help="Load into this user's account")
+    owner.add_argument("--user-id", type=int, help="Load into this user id")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--date-format", help="strptime format of the date column (default: inferred)")
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and start from the top")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        query = db.query(User.id)
+        user = (query.filter(User.email == args.email) if args.email else query.filter(User.id == args.user_id)).first()
+        if not user:
+            raise SystemExit(f"User not found: {args.email or args.user_id}")
+
+        result = load_csv(db, user.id, args.file, args.chunk_size, resume=not args.restart,
+                          date_format=args.date_format, progress=print_progress)
+        if result["resumed_from"]:
+            print(f"  (resumed after {result['resumed_from']:,} rows)")
+        print_summary(result)
+    finally:
+        db.close()
@@ -0,0 +1,231 @@
+"""
+Category Forecasts
+Fits one expense model per category across a process pool and reconciles them into a total
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+import orjson
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from logic import (
+    FORECAST_COLUMNS, FORECAST_RESOLUTIONS, DEFAULT_FORECAST_HORIZONS, MAX_FORECAST_HORIZONS,
+    aggregate_history, fit_forecast, expense_history_summary, forecast_fingerprint,
+    get_stored_forecast, save_forecast
+)
+from models import Transaction
+from responses import columns_to_records
+from snapshot import get_snapshot
+
+# Categories with fewer expense rows than this are folded into "Other"
+MIN_CATEGORY_RECORDS = int(os.getenv("MIN_CATEGORY_RECORDS", "10"))
+
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", "0")) or os.cpu_count()
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def quiet_worker():
+    """Pool initializer: keep cmdstanpy's per-fit chatter out of the server log"""
+    from cmdstanpy.utils import get_logger
+    get_logger().setLevel(logging.WARNING)
+
+
+def forecast_pool() -> ProcessPoolExecutor:
+    """Shared worker pool, started on first use
+
+    Workers are spawned rather than forked so they never inherit the
+    server's threads or database connections.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=FORECAST_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=quiet_worker
+            )
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def reset_forecast_pool():
+    """Drop a broken pool so the next request starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def load_category_history(db: Session, user_id: int) -> pd.DataFrame:
+    """Expense history as ds/y/category rows"""
+    snapshot = get_snapshot(db, user_id)
+    expenses = snapshot.amounts < 0
+    return pd.DataFrame({
+        'ds': snapshot.datetimes(expenses),
+        'y': -snapshot.amounts[expenses],
+        'category': snapshot.category_names(expenses)
+    })
+
+
+def split_categories(history: pd.DataFrame):
+    """Per-category ds/y frames for categories with enough history, plus the thin ones
+
+    Every category series is padded with a zero row at the overall last date
+    so all of them end in the same period and forecast the same dates.
+    """
+    last = history['ds'].max()
+    counts = history['category'].value_counts()
+    fitted = {}
+    for category in counts[counts >= MIN_CATEGORY_RECORDS].index:
+        series = history.loc[history['category'] == category, ['ds', 'y']]
+        fitted[category] = pd.concat(
+            [series, pd.DataFrame({'ds': [last], 'y': [0.0]})], ignore_index=True
+        )
+    thin = history[~history['category'].isin(fitted.keys())]
+    return fitted, thin
+
+
+def run_rate_series(thin: pd.DataFrame, history: pd.DataFrame, resolution: str, horizon: int) -> Dict[str, List]:
+    """Flat forecast for thin categories at their average spend per period"""
+    periods = aggregate_history(history[['ds', 'y']], resolution)['ds']
+    # Spend within the complete periods only, like the fitted series
+    end = periods.iloc[-1] + to_offset(FORECAST_RESOLUTIONS[resolution])
+    rate = float(thin.loc[thin['ds'] < end, 'y'].sum()) / len(periods)
+    # Same dates Prophet produces: the periods after the last observed one
+    ds = pd.date_range(periods.iloc[-1], periods=horizon + 1, freq=FORECAST_RESOLUTIONS[resolution])[1:]
+    return {
+        'ds': ds.strftime('%Y-%m-%dT%H:%M:%S').tolist(),
+        'yhat': [rate] * horizon,
+        'yhat_lower': [rate] * horizon,
+        'yhat_upper': [rate] * horizon,
+    }
+
+
+def reconcile_total(series: List[Dict[str, List]]) -> Dict[str, List]:
+    """Bottom-up total: the sum of every component's forecast per date
+
+    Interval bounds are summed too, which treats the categories as perfectly
+    correlated and so gives a conservative band.
+    """
+    frames = [pd.DataFrame(payload) for payload in series if payload['ds']]
+    if not frames:
+        return {col: [] for col in FORECAST_COLUMNS}
+    total = pd.concat(frames).groupby('ds', sort=True)[FORECAST_COLUMNS[1:]].sum().reset_index()
+    return {col: total[col].tolist() for col in FORECAST_COLUMNS}
+
+
+def fit_category_forecasts(history: pd.DataFrame, resolution: str = "daily", horizon: int = None, pool=None) -> Dict:
+    """Fit every category with enough history in parallel and reconcile the results
+
+    Largest categories are submitted first so the slowest fit starts
+    immediately and bounds the wall-clock time.
+    """
+    horizon = horizon or DEFAULT_FORECAST_HORIZONS[resolution]
+    fitted, thin = split_categories(history)
+
+    pool = pool or forecast_pool()
+    jobs = {
+        category: pool.submit(fit_forecast, series, resolution, horizon)
+        for category, series in sorted(fitted.items(), key=lambda item: -len(item[1]))
+    }
+
+    categories = {}
+    failed = {}
+    for category, job in jobs.items():
+        try:
+            categories[category], _ = job.result()
+        except BrokenProcessPool:
+            reset_forecast_pool()
+            raise
+        except Exception as e:
+            failed[category] = str(e)
+
+    other = None
+    skipped = sorted(set(thin['category']) | set(failed))
+    if skipped:
+        thin = pd.concat([thin, history[history['category'].isin(failed.keys())]])
+        other = run_rate_series(thin, history, resolution, horizon)
+
+    components = list(categories.values()) + ([other] if other else [])
+    return {
+        "resolution": resolution,
+        "horizon": horizon,
+        "min_category_records": MIN_CATEGORY_RECORDS,
+        "categories": categories,
+        "other": other,
+        "skipped": skipped,
+        "failed": failed,
+        "total": reconcile_total(components),
+    }
+
+
+def _as_records(payload: Dict) -> Dict:
+    """Convert every series in a category forecast payload to records"""
+    return {
+        **payload,
+        "categories": {name: columns_to_records(series) for name, series in payload["categories"].items()},
+        "other": columns_to_records(payload["other"]) if payload["other"] else None,
+        "total": columns_to_records(payload["total"]),
+    }
+
+
+def category_history_summary(db: Session, user_id: int) -> dict:
+    """Expense history summary plus each category's count and total
+
+    Recategorizing leaves the overall count and sum unchanged, so the
+    per-category figures are what mark stored category forecasts as stale.
+    """
+    summary = expense_history_summary(db, user_id)
+    summary["categories"] = [tuple(row) for row in db.query(
+        Transaction.category, func.count(Transaction.id), func.sum(Transaction.amount)
+    ).filter(
+        Transaction.user_id == user_id,
+        Transaction.amount < 0
+    ).group_by(Transaction.category).order_by(Transaction.category).all()]
+    return summary
+
+
+def generate_category_forecast(
+    db: Session,
+    user_id: int,
+    columnar: bool = False,
+    resolution: str = "daily",
+    horizon: int = None
+):
+    """Per-category forecasts with a reconciled total, stored like the aggregate forecast"""
+    try:
+        if resolution not in FORECAST_RESOLUTIONS:
+            return {"error": f"Unknown resolution: {resolution}"}
+        horizon = horizon or DEFAULT_FORECAST_HORIZONS[resolution]
+        if not 1 <= horizon <= MAX_FORECAST_HORIZONS[resolution]:
+            return {"error": f"horizon must be between 1 and {MAX_FORECAST_HORIZONS[resolution]} for {resolution} forecasts"}
+
+        variant = f"categories:{resolution}:{horizon}"
+        summary = category_history_summary(db, user_id)
+        stored = get_stored_forecast(db, user_id, variant)
+
+        if stored and stored.data_fingerprint == forecast_fingerprint(summary):
+            payload = orjson.loads(stored.result)
+        else:
+            history = load_category_history(db, user_id)
+            if history.empty:
+                return {"error": "Not enough transaction data for forecasting. Need at least 2 expense records."}
+            payload = fit_category_forecasts(history, resolution, horizon)
+            if not payload["failed"]:
+                save_forecast(db, user_id, variant, summary, payload)
+
+        return payload if columnar else _as_records(payload)
+
+    except Exception as e:
+        return {"error": str(e)}
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, literal, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -29,3 +29,59 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Tables that only hold derived data (stored forecasts); an older layout is
+# dropped and recreated rather than migrated
+DERIVED_TABLES = {"forecasts"}
+
+def _default(column):
+    """The column's scalar Python-side default, or None"""
+    if column.default is not None and column.default.is_scalar:
+        return column.default.arg
+    return None
+
+def add_missing_columns(bind=engine, metadata=Base.metadata):
+    """Bring tables created by an older version up to the current models
+
+    create_all only creates missing tables, so columns added to an existing
+    model (users.data_version, uploads.file_hash, transactions.upload_id,
+    forecasts.variant) are added here with ALTER TABLE ... ADD COLUMN, along
+    with their indexes. A NOT NULL column without a scalar default cannot be
+    added that way; derived tables are recreated instead. Returns the
+    "table.column" names that were added.
+    """
+    inspector = inspect(bind)
+    added = []
+    with bind.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            missing = [column for column in table.columns if column.name not in existing]
+            if not missing:
+                continue
+            if table.name in DERIVED_TABLES and any(not column.nullable and _default(column) is None for column in missing):
+                table.drop(conn)
+                table.create(conn)
+                added.extend(f"{table.name}.{column.name}" for column in missing)
+                continue
+            for column in missing:
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}"
+                if column.foreign_keys:
+                    target = next(iter(column.foreign_keys)).column
+                    ddl += f" REFERENCES {target.table.name} ({target.name})"
+                default = _default(column)
+                if default is not None:
+                    ddl += " DEFAULT " + str(literal(default, column.type).compile(
+                        dialect=conn.dialect, compile_kwargs={"literal_binds": True}
+                    ))
+                if not column.nullable:
+                    if default is None:
+                        raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} without a default")
+                    ddl += " NOT NULL"
+                conn.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+            for index in table.indexes:
+                if any(column in missing for column in index.columns):
+                    index.create(conn, checkfirst=True)
+    return added
@@ -0,0 +1,176 @@
+"""
+Date Format Detection
+Infers the date format of a statement once from a sample and parses with it explicitly
+"""
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+import threading
+import pandas as pd
+from dateutil import parser as dateutil_parser
+
+# Candidate formats in priority order. Day-first variants come before their
+# month-first counterparts so ambiguous dates (04/02/2024) follow the
+# convention used by Indian bank statements.
+DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y/%m/%d',
+    '%d/%m/%Y',
+    '%d-%m-%Y',
+    '%d.%m.%Y',
+    '%d/%m/%y',
+    '%d-%m-%y',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d-%m-%Y %H:%M:%S',
+    '%d-%b-%Y',
+    '%d %b %Y',
+    '%d-%b-%y',
+    '%d %b %y',
+    '%d %B %Y',
+    '%m/%d/%Y',
+    '%m-%d-%Y',
+    '%m/%d/%y',
+    '%b %d, %Y',
+    '%B %d, %Y',
+]
+
+SAMPLE_SIZE = 50
+
+
+def _non_empty(values: pd.Series) -> pd.Series:
+    values = values.dropna().astype(str).str.strip()
+    return values[values != '']
+
+
+def _sample_values(values: pd.Series, sample_size: int = SAMPLE_SIZE) -> List[str]:
+    """Pick up to sample_size non-empty values spread evenly across the column"""
+    values = _non_empty(values)
+    if len(values) > sample_size:
+        step = len(values) // sample_size
+        values = values.iloc[::step]
+    return values.tolist()
+
+
+def _matches(sample: List[str], fmt: str) -> bool:
+    """Check whether every sampled value parses with the given format"""
+    try:
+        for value in sample:
+            datetime.strptime(value, fmt)
+    except ValueError:
+        return False
+    return True
+
+
+def fits_column(values: pd.Series, fmt: str) -> bool:
+    """Check whether every non-empty value in the column parses with the given format"""
+    distinct = pd.unique(_non_empty(values))
+    return not pd.to_datetime(pd.Series(distinct, dtype=object), format=fmt, errors='coerce').isna().any()
+
+
+def infer_date_format(values: pd.Series, sample_size: int = SAMPLE_SIZE) -> Optional[str]:
+    """Infer a strptime format for the column, or None if no candidate fits
+
+    A sample narrows the candidates cheaply; the first one that also parses
+    every distinct value wins, so a sample of only ambiguous dates (04/02)
+    cannot pick day-first for a month-first file.
+    """
+    sample = _sample_values(values, sample_size)
+    if not sample:
+        return None
+
+    for fmt in DATE_FORMATS:
+        if _matches(sample, fmt) and fits_column(values, fmt):
+            return fmt
+
+    return None
+
+
+def parse_dates(values: pd.Series, fmt: Optional[str]) -> pd.Series:
+    """Parse a column of dates, coercing invalid values to NaT"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    if fmt:
+        # Statements repeat the same few hundred dates across many rows, so
+        # parse each distinct string once and broadcast back
+        codes, uniques = pd.factorize(values.astype(str).str.strip())
+        parsed = pd.to_datetime(uniques, format=fmt, errors='coerce')
+        return pd.Series(parsed.take(codes), index=values.index)
+
+    # Unknown layout: let pandas guess element by element, still day-first
+    return pd.to_datetime(values, errors='coerce', dayfirst=True, format='mixed')
+
+
+def parse_date_string(value: str) -> datetime:
+    """Parse a single free-form date string (manual entry)"""
+    value = value.strip()
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+
+    # Free text such as "Jan 5 2024"
+    try:
+        return dateutil_parser.parse(value)
+    except (ValueError, OverflowError) as e:
+        raise ValueError(f"Unrecognised date: {value}") from e
+
+
+class DateFormatCache:
+    """Remembers the inferred date format per user and column layout"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._formats: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(user_id: Optional[int], column_map: Dict[str, str]) -> Tuple:
+        return (user_id, tuple(sorted(column_map.items())))
+
+    def resolve(self, user_id: Optional[int], column_map: Dict[str, str], values: pd.Series) -> Optional[str]:
+        """Return the date format for this column, reusing a remembered one when it still fits
+
+        The remembered format is only served when it parses every value in
+        the column; otherwise (a bank changed its export layout, or an earlier
+        file held only ambiguous dates) the column is re-detected and the
+        entry replaced.
+        """
+        key = self._key(user_id, column_map)
+
+        with self._lock:
+            fmt = self._formats.get(key)
+            if fmt is not None:
+                self._formats.move_to_end(key)
+
+        if fmt is not None and fits_column(values, fmt):
+            return fmt
+
+        fmt = infer_date_format(values)
+        with self._lock:
+            if fmt is None:
+                self._formats.pop(key, None)
+            else:
+                self._formats[key] = fmt
+                self._formats.move_to_end(key)
+                while len(self._formats) > self.max_entries:
+                    self._formats.popitem(last=False)
+
+        return fmt
+
+    def clear(self):
+        with self._lock:
+            self._formats.clear()
+
+
+# Shared cache used by the upload paths
+date_format_cache = DateFormatCache()
@@ -0,0 +1,160 @@
+"""
+Transaction Export
+Streams a user's transactions as CSV, NDJSON or Parquet without loading the full history
+"""
+from typing import Iterator, List, Optional, Sequence
+from datetime import date, datetime, time, timedelta
+import csv
+import io
+import orjson
+from sqlalchemy import select
+
+from database import SessionLocal
+from models import Transaction
+
+EXPORT_COLUMNS = ["transaction_id", "date", "description", "amount", "category", "vendor", "notes"]
+
+# Rows fetched per server-side cursor batch (one Parquet row group each)
+EXPORT_BATCH_SIZE = 5000
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def export_statement(
+    user_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    categories: Optional[List[str]] = None
+):
+    """Lean column select for a user's transactions, oldest first"""
+    stmt = select(*[getattr(Transaction, col) for col in EXPORT_COLUMNS]).where(
+        Transaction.user_id == user_id
+    )
+    if start:
+        stmt = stmt.where(Transaction.date >= datetime.combine(start, time.min))
+    if end:
+        # End date is inclusive
+        stmt = stmt.where(Transaction.date < datetime.combine(end + timedelta(days=1), time.min))
+    if categories:
+        stmt = stmt.where(Transaction.category.in_(categories))
+    return stmt.order_by(Transaction.date, Transaction.id)
+
+
+def iter_batches(stmt, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Sequence]:
+    """Yield lists of rows from a server-side cursor using its own session"""
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            yield batch
+    finally:
+        db.close()
+
+
+def stream_csv(batches: Iterator[Sequence]) -> Iterator[bytes]:
+    """Encode row batches as CSV chunks"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue().encode('utf-8')
+
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            (txn_id, txn_date.isoformat(), description, amount, category, vendor, notes)
+            for txn_id, txn_date, description, amount, category, vendor, notes in batch
+        )
+        yield buffer.getvalue().encode('utf-8')
+
+
+def stream_ndjson(batches: Iterator[Sequence]) -> Iterator[bytes]:
+    """Encode row batches as newline-delimited JSON chunks"""
+    for batch in batches:
+        yield b"".join(
+            orjson.dumps(dict(zip(EXPORT_COLUMNS, row))) + b"\n"
+            for row in batch
+        )
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_parquet(batches: Iterator[Sequence]) -> Iterator[bytes]:
+    """Encode row batches as a Parquet file, one row group per batch"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("transaction_id", pa.string()),
+        ("date", pa.timestamp("us")),
+        ("description", pa.string()),
+        ("amount", pa.float64()),
+        ("category", pa.string()),
+        ("vendor", pa.string()),
+        ("notes", pa.string()),
+    ])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for batch in batches:
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {
+    "csv": stream_csv,
+    "ndjson": stream_ndjson,
+    "parquet": stream_parquet,
+}
+
+
+def stream_export(
+    user_id: int,
+    fmt: str = "csv",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    categories: Optional[List[str]] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[bytes]:
+    """Encoded export chunks for a user's filtered transactions"""
+    stmt = export_statement(user_id, start, end, categories)
+    return ENCODERS[fmt](iter_batches(stmt, batch_size))
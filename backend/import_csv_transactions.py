@@ -2,9 +2,8 @@
 Import transactions from CSV file for demo user
 """
 from database import SessionLocal
-from models import User, Transaction
-import pandas as pd
-from datetime import datetime
+from models import User
+from bulk_loader import load_csv, print_progress, print_summary
 
 db = SessionLocal()
 
@@ -18,34 +17,12 @@ try:
     
     print(f"Importing transactions from CSV for {demo_user.company_name}...")
     
-    # Read CSV
-    df = pd.read_csv('sample_transactions.csv')
-    
-    print(f"Found {len(df)} transactions in CSV")
-    
-    # Add transactions
-    added = 0
-    for _, row in df.iterrows():
-        transaction = Transaction(
-            user_id=demo_user.id,
-            transaction_id=row['Transaction ID'],
-            date=pd.to_datetime(row['Date']),
-            description=row['Description'],
-            amount=float(row['Amount']),
-            category=row['Category'],
-            vendor=row['Vendor'] if pd.notna(row['Vendor']) else None,
-            notes=row['Notes'] if pd.notna(row['Notes']) else None
-        )
-        db.add(transaction)
-        added += 1
-    
-    db.commit()
-    
-    print(f"✓ Successfully imported {added} transactions!")
+    result = load_csv(db, demo_user.id, 'sample_transactions.csv', progress=print_progress)
+    print_summary(result)
     
     # Calculate summary
-    total_expenses = df[df['Amount'] < 0]['Amount'].sum()
-    total_revenue = df[df['Amount'] > 0]['Amount'].sum()
+    total_expenses = result['total_expenses']
+    total_revenue = result['total_revenue']
     
     print(f"\nImport Summary:")
     print(f"  Total Expenses: ₹{total_expenses:,.0f}")
@@ -54,8 +31,7 @@ try:
     
     # Category breakdown
     print(f"\nCategory Breakdown:")
-    category_totals = df.groupby('Category')['Amount'].sum().sort_values()
-    for category, amount in category_totals.items():
+    for category, amount in sorted(result['category_totals'].items(), key=lambda item: item[1]):
         if amount < 0:
             print(f"  {category}: ₹{amount:,.0f}")
     
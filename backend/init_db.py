@@ -2,10 +2,10 @@
 Database Migration Script
 Creates initial database and migrates data from transactions.csv if it exists
 """
-from database import engine, Base, SessionLocal
-from models import User, Transaction
+from database import engine, Base, SessionLocal, add_missing_columns
+from models import User
 from auth import get_password_hash
-import pandas as pd
+from bulk_loader import load_csv, print_progress, print_summary
 import os
 from datetime import datetime
 
@@ -13,6 +13,8 @@ def init_database():
     """Initialize database tables"""
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    for column in add_missing_columns(engine):
+        print(f"✓ Added column {column}")
     print("✓ Database tables created successfully!")
 
 def create_demo_user():
@@ -54,31 +56,16 @@ def migrate_csv_data(user_id: int):
     
     db = SessionLocal()
     try:
-        print(f"Reading {csv_file}...")
-        df = pd.read_csv(csv_file)
-        
-        print(f"Migrating {len(df)} transactions...")
-        for _, row in df.iterrows():
-            transaction = Transaction(
-                user_id=user_id,
-                transaction_id=row.get('Transaction ID', f"txn_{_}"),
-                date=pd.to_datetime(row['Date']),
-                description=row['Description'],
-                amount=float(row['Amount']),
-                category=row['Category'],
-                vendor=row.get('Vendor', None) if pd.notna(row.get('Vendor')) else None
-            )
-            db.add(transaction)
-        
-        db.commit()
-        print(f"✓ Successfully migrated {len(df)} transactions!")
+        print(f"Migrating {csv_file}...")
+        result = load_csv(db, user_id, csv_file, progress=print_progress)
+        print_summary(result)
         
         # Rename CSV file to indicate it's been migrated
         os.rename(csv_file, f"{csv_file}.migrated")
         print(f"✓ Renamed {csv_file} to {csv_file}.migrated")
         
     except Exception as e:
-        print(f"✗ Error migrating CSV data: {e}")
+        print(f"✗ Error migrating CSV data (re-run to resume): {e}")
         db.rollback()
     finally:
         db.close()
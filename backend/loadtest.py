@@ -0,0 +1,308 @@
+"""
+Load Test Harness
+Replays a weighted scenario mix against the API with async virtual users
+
+By default it seeds a scratch SQLite database with synthetic tenants, starts
+main:app under uvicorn on it, runs the scenario and stops the server. Point
+it at an already running deployment with --url instead.
+
+Usage:
+    python -m loadtest [--scenario loadtest_scenarios.json] [--users 20] [--duration 60]
+                       [--tenants 5] [--tenant-size 10k] [--workers 1] [--json results.json]
+    python -m loadtest --url http://127.0.0.1:8000 --password synthetic123 ...
+"""
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+import numpy as np
+
+DEFAULT_SCENARIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "loadtest_scenarios.json")
+TENANT_PASSWORD = "synthetic123"
+
+# Same presets as synthetic_data.SIZES, which cannot be imported before the database is chosen
+TENANT_SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+_PLACEHOLDER = re.compile(r"\{(rand_int|rand_amount):(-?[\d.]+):(-?[\d.]+)\}|\{(\w+)\}")
+
+
+def render(value, variables: Dict, rng: random.Random):
+    """Fill {rand_int:a:b}, {rand_amount:a:b} and captured {name} placeholders
+
+    A string that is exactly one random placeholder becomes a number.
+    """
+    if isinstance(value, dict):
+        return {key: render(item, variables, rng) for key, item in value.items()}
+    if isinstance(value, list):
+        return [render(item, variables, rng) for item in value]
+    if not isinstance(value, str):
+        return value
+
+    def substitute(match):
+        kind, low, high, name = match.groups()
+        if kind == "rand_int":
+            return rng.randint(int(low), int(high))
+        if kind == "rand_amount":
+            return round(rng.uniform(float(low), float(high)), 2)
+        return variables.get(name, match.group(0))
+
+    whole = _PLACEHOLDER.fullmatch(value)
+    if whole and whole.group(1):
+        return substitute(whole)
+    return _PLACEHOLDER.sub(lambda match: str(substitute(match)), value)
+
+
+def request_label(spec: Dict) -> str:
+    """Stats bucket for a request: its method and templated path without the query"""
+    return spec.get("label") or f"{spec['method']} {spec['path'].split('?', 1)[0]}"
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.error_samples: Dict[str, str] = {}
+
+    def record(self, label: str, seconds: float, error: Optional[str] = None):
+        self.latencies.setdefault(label, []).append(seconds)
+        if error:
+            self.errors[label] = self.errors.get(label, 0) + 1
+            self.error_samples.setdefault(label, error)
+
+    def summary(self, elapsed: float) -> Dict:
+        routes = {}
+        for label, samples in sorted(self.latencies.items()):
+            ms = np.asarray(samples) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            routes[label] = {
+                "requests": len(samples),
+                "rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(float(p50), 1),
+                "p95_ms": round(float(p95), 1),
+                "p99_ms": round(float(p99), 1),
+                "max_ms": round(float(ms.max()), 1),
+                "errors": self.errors.get(label, 0),
+                "error_rate": round(self.errors.get(label, 0) / len(samples), 4),
+                "first_error": self.error_samples.get(label),
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        errors = sum(self.errors.values())
+        return {
+            "elapsed_seconds": round(elapsed, 1),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0,
+            "error_rate": round(errors / total, 4) if total else 0,
+            "routes": routes,
+        }
+
+
+def statement_csv(rows: int, seed: int) -> bytes:
+    """A synthetic bank statement in the layout the upload endpoint expects"""
+    from synthetic_data import generate_transactions, write_statement
+    buffer = io.StringIO()
+    write_statement(generate_transactions(rows, seed), buffer, "finsight")
+    return buffer.getvalue().encode("utf-8")
+
+
+async def run_request(client: httpx.AsyncClient, spec: Dict, variables: Dict, rng: random.Random,
+                      stats: Stats, uploads: Dict[int, bytes]):
+    label = request_label(spec)
+    kwargs = {}
+    if "json" in spec:
+        kwargs["json"] = render(spec["json"], variables, rng)
+    if "upload" in spec:
+        rows = spec["upload"].get("rows", 200)
+        if rows not in uploads:
+            uploads[rows] = statement_csv(rows, seed=rows)
+        kwargs["files"] = {"file": ("loadtest.csv", uploads[rows], "text/csv")}
+
+    started = time.perf_counter()
+    try:
+        response = await client.request(spec["method"], render(spec["path"], variables, rng), **kwargs)
+        await response.aread()
+    except httpx.HTTPError as e:
+        stats.record(label, time.perf_counter() - started, f"{type(e).__name__}: {e}")
+        return False
+    elapsed = time.perf_counter() - started
+
+    if response.status_code >= 400:
+        stats.record(label, elapsed, f"HTTP {response.status_code}: {response.text[:200]}")
+        return False
+    stats.record(label, elapsed)
+
+    for name, field in spec.get("capture", {}).items():
+        try:
+            variables[name] = response.json()[field]
+        except (ValueError, KeyError, TypeError):
+            return False
+    return True
+
+
+async def virtual_user(base_url: str, email: str, password: str, scenario: Dict, deadline: float,
+                       stats: Stats, seed: int, uploads: Dict[int, bytes], limits: httpx.Limits):
+    """Log in, then replay weighted flows with think time until the deadline"""
+    rng = random.Random(seed)
+    flows = scenario["flows"]
+    weights = [flow.get("weight", 1) for flow in flows]
+    think_low, think_high = scenario.get("think_time_ms", [0, 0])
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        login = {"method": "POST", "path": "/api/auth/login", "json": {"email": email, "password": password}}
+        if not await run_request(client, {**login, "capture": {"token": "access_token"}}, variables := {},
+                                 rng, stats, uploads):
+            return
+        client.headers["Authorization"] = f"Bearer {variables['token']}"
+
+        while time.monotonic() < deadline:
+            flow = rng.choices(flows, weights)[0]
+            variables = {"token": variables["token"]}
+            for spec in flow["requests"]:
+                if time.monotonic() >= deadline:
+                    return
+                if not await run_request(client, spec, variables, rng, stats, uploads):
+                    break
+            await asyncio.sleep(rng.uniform(think_low, think_high) / 1000)
+
+
+async def run_load(base_url: str, emails: List[str], password: str, scenario: Dict,
+                   users: int, duration: float, max_connections: int, seed: int = 0) -> Dict:
+    stats = Stats()
+    uploads: Dict[int, bytes] = {}
+    limits = httpx.Limits(max_connections=max_connections)
+    started = time.monotonic()
+    deadline = started + duration
+    await asyncio.gather(*[
+        virtual_user(base_url, emails[i % len(emails)], password, scenario, deadline,
+                     stats, seed + i, uploads, limits)
+        for i in range(users)
+    ])
+    return stats.summary(time.monotonic() - started)
+
+
+def seed_database(database_url: str, tenants: int, size: int, seed: int) -> List[str]:
+    """Create synthetic tenants in a scratch database and return their emails
+
+    Must run before anything imports the database module, which binds its
+    engine to DATABASE_URL on import.
+    """
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["RESULT_CACHE_PATH"] = ""
+    from database import engine, Base, SessionLocal
+    from auth import get_password_hash
+    from synthetic_data import generate_transactions, load_tenant, create_tenant
+
+    Base.metadata.create_all(bind=engine)
+    password_hash = get_password_hash(TENANT_PASSWORD)
+    db = SessionLocal()
+    emails = []
+    try:
+        for tenant in range(tenants):
+            email = f"synthetic-{seed + tenant}@finsight.ai"
+            user = create_tenant(db, email, f"Synthetic Tenant {seed + tenant}", password_hash)
+            load_tenant(db, user.id, generate_transactions(size, seed + tenant))
+            emails.append(email)
+    finally:
+        db.close()
+    engine.dispose()
+    return emails
+
+
+def start_server(database_url: str, port: int, workers: int, result_cache_path: str = "") -> subprocess.Popen:
+    env = {**os.environ, "DATABASE_URL": database_url, "RESULT_CACHE_PATH": result_cache_path,
+           "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING")}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            if httpx.get(f"{url}/openapi.json", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not become ready within 60s")
+
+
+def print_report(summary: Dict):
+    print("=" * 100)
+    print(f"{'route':<44} {'reqs':>7} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>8}")
+    print("=" * 100)
+    for label, route in summary["routes"].items():
+        print(f"{label[:44]:<44} {route['requests']:>7} {route['rps']:>7} {route['p50_ms']:>6}ms "
+              f"{route['p95_ms']:>6}ms {route['p99_ms']:>6}ms {route['error_rate']:>7.1%}")
+    print("-" * 100)
+    print(f"{summary['requests']} requests in {summary['elapsed_seconds']}s: "
+          f"{summary['throughput_rps']} req/s, error rate {summary['error_rate']:.2%}")
+    for label, route in summary["routes"].items():
+        if route["first_error"]:
+            print(f"  {label}: {route['first_error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the FinSight API")
+    parser.add_argument("--scenario", default=DEFAULT_SCENARIO, help="Scenario JSON file")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run")
+    parser.add_argument("--max-connections", type=int, default=100, help="Connection cap per virtual user")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--emails", help="Comma-separated tenant logins when using --url")
+    parser.add_argument("--password", default=TENANT_PASSWORD, help="Tenant password when using --url")
+    parser.add_argument("--tenants", type=int, default=5, help="Synthetic tenants to seed")
+    parser.add_argument("--tenant-size", default="10k", help="Transactions per seeded tenant (1k, 10k, 100k, ...)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--json", help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    with open(args.scenario) as f:
+        scenario = json.load(f)
+
+    server = None
+    if args.url:
+        if not args.emails:
+            parser.error("--emails is required with --url")
+        base_url, emails = args.url, args.emails.split(",")
+    else:
+        scratch = tempfile.mkdtemp(prefix="finsight-load-")
+        database_url = f"sqlite:///{scratch}/loadtest.db"
+        size = TENANT_SIZES.get(args.tenant_size.lower()) or int(args.tenant_size)
+        print(f"Seeding {args.tenants} tenants x {size:,} transactions into {scratch}...")
+        emails = seed_database(database_url, args.tenants, size, args.seed)
+        print(f"Starting uvicorn on port {args.port} with {args.workers} worker(s)...")
+        # A fresh result cache beside the scratch database, so runs never share results
+        server = start_server(database_url, args.port, args.workers, f"{scratch}/results.db")
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        print(f"Running '{os.path.basename(args.scenario)}' with {args.users} users for {args.duration:.0f}s...")
+        summary = asyncio.run(run_load(
+            base_url, emails, args.password, scenario, args.users, args.duration, args.max_connections, args.seed
+        ))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+    summary.update({"scenario": args.scenario, "users": args.users, "target": base_url})
+    print_report(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"✓ Summary written to {args.json}")
@@ -0,0 +1,62 @@
+"""
+Logging Setup
+Leveled, structured log events: an event name plus key=value (or JSON) fields
+"""
+import logging
+import os
+import orjson
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text | json
+
+# LogRecord attributes that are not user supplied fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RESERVED}
+
+
+class KeyValueFormatter(logging.Formatter):
+    """`time level logger event key=value ...` lines"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = " ".join(f"{key}={value}" for key, value in _fields(record).items())
+        line = f"{self.formatTime(record)} {record.levelname} {record.name} {record.getMessage()}"
+        if fields:
+            line += " " + fields
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line for log shippers"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+            **_fields(record),
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(payload, default=str).decode("utf-8")
+
+
+def get_logger(module: str) -> logging.Logger:
+    """Application logger for a module, under the shared "finsight" parent"""
+    return logging.getLogger(f"finsight.{module}")
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT):
+    """Install the structured formatter on the application's "finsight" loggers"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(JSONFormatter() if fmt == "json" else KeyValueFormatter())
+
+    logger = logging.getLogger("finsight")
+    logger.handlers = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
@@ -1,80 +1,199 @@
+import numpy as np
 import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from models import User, Transaction, ActivityLog
-from datetime import datetime
+from models import User, Transaction, ActivityLog, Forecast
+from datetime import date, datetime
+import hashlib
 import json
+import math
+import orjson
+
+from log_config import get_logger
+from metrics import FORECAST_FIT_TIME, FORECAST_PREDICT_TIME
+from snapshot import TransactionSnapshot, get_snapshot
+from result_cache import result_cache
+from recurring import recurring_payments
+from responses import frame_payload, columns_to_records
+
+logger = get_logger(__name__)
 
 # --- Core Logic Function (The "Brain") ---
-def calculate_financials(db: Session, user_id: int):
+def load_financial_baseline(db: Session, user_id: int):
+    """Load a user and their transaction snapshot"""
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        return None, None
+    
+    return user, get_snapshot(db, user_id, user.data_version)
+
+
+def monthly_cash_flows(snapshot: TransactionSnapshot) -> pd.DataFrame:
+    """Per-month expense (positive) and revenue totals for the months with activity"""
+    months, inverse, valid = snapshot.month_index()
+    amounts = snapshot.amounts[valid]
+    return pd.DataFrame({
+        'expenses': np.bincount(inverse, weights=-np.minimum(amounts, 0), minlength=len(months)),
+        'revenue': np.bincount(inverse, weights=np.maximum(amounts, 0), minlength=len(months))
+    }, index=pd.PeriodIndex(months, freq='M'))
+
+
+def calculate_financials(db: Session, user_id: int, baseline=None):
     """Calculate financial runway for a specific user"""
-    print(f"--- CHECKPOINT 1: Starting runway calculation for user {user_id}... ---")
+    logger.debug("financials.start", extra={"user_id": user_id})
     
     try:
-        # Get user
-        user = db.query(User).filter(User.id == user_id).first()
+        # Get user and transactions (callers may pass an already loaded baseline)
+        user, snapshot = baseline or (db.query(User).filter(User.id == user_id).first(), None)
         if not user:
             return {"error": "User not found"}
         
-        cash_on_hand = user.cash_on_hand
+        # Another worker (or an earlier run) may already have computed this version
+        cached = result_cache.get("financials", user_id, user.data_version)
+        if cached is not None:
+            return cached
+        if snapshot is None:
+            snapshot = get_snapshot(db, user_id, user.data_version)
         
-        # Get all transactions for this user
-        transactions = db.query(Transaction).filter(Transaction.user_id == user_id).all()
-        print(f"--- CHECKPOINT 2: Found {len(transactions)} transactions. ---")
+        cash_on_hand = user.cash_on_hand
+        logger.debug("financials.loaded", extra={"user_id": user_id, "transactions": snapshot.size})
         
-        if not transactions:
+        if snapshot.size == 0:
             return {
                 "runway_months": float('inf'), 
                 "avg_monthly_burn": 0, 
                 "cash_on_hand": cash_on_hand,
                 "total_expenses": 0,
-                "total_revenue": 0
+                "total_revenue": 0,
+                "avg_monthly_revenue": 0
             }
         
-        # Convert to DataFrame for analysis
-        df = pd.DataFrame([{
-            'date': t.date,
-            'amount': t.amount,
-            'category': t.category
-        } for t in transactions])
-        
-        df['date'] = pd.to_datetime(df['date'])
-        print("--- CHECKPOINT 3: Date column converted. ---")
-        
-        num_months = df['date'].dt.to_period('M').nunique()
-        print(f"--- CHECKPOINT 4: Found {num_months} unique months. ---")
+        num_months = len(snapshot.month_index()[0])
         
         if num_months == 0:
             num_months = 1  # Avoid division by zero
         
-        total_expenses = df[df['amount'] < 0]['amount'].sum()
-        total_revenue = df[df['amount'] > 0]['amount'].sum()
-        print(f"--- CHECKPOINT 5: Total expenses: {total_expenses}, Total revenue: {total_revenue}. ---")
+        amounts = snapshot.amounts
+        total_expenses = float(amounts[amounts < 0].sum())
+        total_revenue = float(amounts[amounts > 0].sum())
         
         avg_monthly_burn = abs(total_expenses / num_months)
-        print(f"--- CHECKPOINT 6: Average monthly burn calculated: {avg_monthly_burn}. ---")
         
         if avg_monthly_burn > 0:
             runway_months = round(cash_on_hand / avg_monthly_burn, 1)
         else:
             runway_months = float('inf')
         
-        print("--- CHECKPOINT 7: Runway calculation complete. ---")
+        logger.debug("financials.done", extra={
+            "user_id": user_id,
+            "months": num_months,
+            "total_expenses": total_expenses,
+            "total_revenue": total_revenue,
+            "avg_monthly_burn": avg_monthly_burn,
+            "runway_months": runway_months,
+        })
         
-        return {
+        result = {
             "runway_months": runway_months, 
             "avg_monthly_burn": avg_monthly_burn, 
             "cash_on_hand": cash_on_hand,
             "total_expenses": abs(total_expenses),
-            "total_revenue": total_revenue
+            "total_revenue": total_revenue,
+            "avg_monthly_revenue": total_revenue / num_months
         }
+        result_cache.put("financials", user_id, user.data_version, result)
+        return result
     except Exception as e:
-        print(f"--- AN ERROR OCCURRED: {e} ---")
+        logger.exception("financials.error", extra={"user_id": user_id})
         return {"error": str(e)}
 
 
+def window_financials(db: Session, user_id: int, months: int):
+    """Burn, revenue and runway over the trailing `months` calendar months
+
+    The window ends with the month of the latest transaction, so imported
+    statements that stop before today still have a full window. Averages
+    divide by the window length, or by the months since the first
+    transaction when the history is shorter.
+    """
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        return {"error": "User not found"}
+    
+    params = f"window={months}"
+    cached = result_cache.get("financials", user_id, user.data_version, params)
+    if cached is not None:
+        return cached
+    
+    index = get_snapshot(db, user_id, user.data_version).prefix_index()
+    if index.size == 0:
+        return {
+            "runway_months": float('inf'),
+            "avg_monthly_burn": 0,
+            "cash_on_hand": user.cash_on_hand,
+            "total_expenses": 0,
+            "total_revenue": 0,
+            "avg_monthly_revenue": 0,
+            "window_months": months,
+            "window_start": None,
+            "window_end": None
+        }
+    
+    first_month, last_month = index.month_span()
+    start = last_month - (months - 1)
+    end = last_month + 1
+    span = min(months, int((last_month - first_month).astype(int)) + 1)
+    total_expenses, total_revenue, _ = index.totals(start, end)
+    
+    avg_monthly_burn = total_expenses / span
+    if avg_monthly_burn > 0:
+        runway_months = round(user.cash_on_hand / avg_monthly_burn, 1)
+    else:
+        runway_months = float('inf')
+    
+    result = {
+        "runway_months": runway_months,
+        "avg_monthly_burn": avg_monthly_burn,
+        "cash_on_hand": user.cash_on_hand,
+        "total_expenses": total_expenses,
+        "total_revenue": total_revenue,
+        "avg_monthly_revenue": total_revenue / span,
+        "window_months": months,
+        "window_start": str(start.astype('datetime64[D]')),
+        "window_end": str(end.astype('datetime64[D]') - 1)
+    }
+    result_cache.put("financials", user_id, user.data_version, result, params)
+    return result
+
+
+def range_totals(db: Session, user_id: int, start: date, end: date, data_version: int = None):
+    """Expense and revenue totals for transactions dated start through end (inclusive)"""
+    index = get_snapshot(db, user_id, data_version).prefix_index()
+    total_expenses, total_revenue, count = index.totals(
+        np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1
+    )
+    # Differences of running sums carry float noise; report whole cents
+    total_expenses, total_revenue = round(total_expenses, 2), round(total_revenue, 2)
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "total_expenses": total_expenses,
+        "total_revenue": total_revenue,
+        "net": round(total_revenue - total_expenses, 2),
+        "transactions": count
+    }
+
+
 # This is the function for the what-if scenario
 def simulate_hiring_scenario(db: Session, user_id: int, new_hires: int, avg_salary: float):
-    """Simulate hiring scenario for a specific user"""
+    """Simulate hiring scenario for a specific user
+
+    The baseline burn is the historical average, but never less than the
+    recurring payments (payroll, subscriptions, rent) the user is already
+    committed to. The committed runway is how long cash lasts if only those
+    payments and the new salaries continue.
+    """
     # First, get the current financial state
     current_financials = calculate_financials(db, user_id)
     
@@ -85,12 +204,13 @@ def simulate_hiring_scenario(db: Session, user_id: int, new_hires: int, avg_sala
     current_burn = current_financials["avg_monthly_burn"]
     cash_on_hand = current_financials["cash_on_hand"]
     current_runway = current_financials["runway_months"]
+    committed_burn = recurring_payments(db, user_id)["committed_monthly_spend"]
     
     # Calculate the additional monthly cost from the new hires
     new_monthly_cost = new_hires * avg_salary
     
     # Calculate the new, simulated burn rate
-    simulated_burn = current_burn + new_monthly_cost
+    simulated_burn = max(current_burn, committed_burn) + new_monthly_cost
     
     # Calculate the new, simulated runway
     if simulated_burn > 0:
@@ -98,6 +218,11 @@ def simulate_hiring_scenario(db: Session, user_id: int, new_hires: int, avg_sala
     else:
         simulated_runway = float('inf')
     
+    if committed_burn + new_monthly_cost > 0:
+        committed_runway = round(cash_on_hand / (committed_burn + new_monthly_cost), 1)
+    else:
+        committed_runway = float('inf')
+    
     # Log activity
     log_activity(
         db, 
@@ -109,7 +234,8 @@ def simulate_hiring_scenario(db: Session, user_id: int, new_hires: int, avg_sala
             "avg_salary": avg_salary,
             "result": {
                 "current_runway": current_runway,
-                "simulated_runway": simulated_runway
+                "simulated_runway": simulated_runway,
+                "committed_runway": committed_runway
             }
         })
     )
@@ -119,41 +245,227 @@ def simulate_hiring_scenario(db: Session, user_id: int, new_hires: int, avg_sala
         "current_runway": current_runway,
         "simulated_runway": simulated_runway,
         "simulated_burn": simulated_burn,
-        "current_burn": current_burn
+        "current_burn": current_burn,
+        "committed_burn": committed_burn,
+        "committed_runway": committed_runway
     }
 
 
 from prophet import Prophet
 
+# Minimum number of expense records needed to fit a forecast
+MIN_FORECAST_RECORDS = 2
+FORECAST_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+
+# Training series resolution -> pandas frequency, with horizons in periods.
+# Every period is labelled by its first day; weeks start on Monday.
+FORECAST_RESOLUTIONS = {"daily": "D", "weekly": "W-MON", "monthly": "MS"}
+
+# Part of every forecast fingerprint; bump when the training series changes shape
+# so forecasts stored under the old aggregation are refitted
+FORECAST_SERIES_VERSION = 2
+DEFAULT_FORECAST_HORIZONS = {"daily": 180, "weekly": 26, "monthly": 6}
+MAX_FORECAST_HORIZONS = {"daily": 730, "weekly": 104, "monthly": 24}
+
+# Appended rows, as a fraction of the previously fitted history, beyond
+# which a refit starts cold instead of from the previous parameters
+WARM_START_MAX_APPENDED = 0.25
+
+
+def load_forecast_history(db: Session, user_id: int) -> pd.DataFrame:
+    """Expense history as Prophet's ds/y frame"""
+    snapshot = get_snapshot(db, user_id)
+    expenses = snapshot.amounts < 0  # Only expenses
+    return pd.DataFrame({
+        'ds': snapshot.datetimes(expenses),
+        'y': -snapshot.amounts[expenses]
+    })
+
+
+def expense_history_summary(db: Session, user_id: int) -> dict:
+    """Aggregate summary of the expense history a forecast depends on"""
+    count, total, max_id, first_date, last_date = db.query(
+        func.count(Transaction.id),
+        func.sum(Transaction.amount),
+        func.max(Transaction.id),
+        func.min(Transaction.date),
+        func.max(Transaction.date)
+    ).filter(
+        Transaction.user_id == user_id,
+        Transaction.amount < 0
+    ).one()
+    return {
+        "count": count,
+        "sum": total or 0.0,
+        "max_id": max_id,
+        "first_date": first_date,
+        "last_date": last_date,
+    }
+
+
+def forecast_fingerprint(summary: dict) -> str:
+    """Fingerprint of an expense history summary"""
+    return hashlib.sha256(repr((FORECAST_SERIES_VERSION, sorted(summary.items()))).encode('utf-8')).hexdigest()
+
+
+def aggregate_history(history: pd.DataFrame, resolution: str = "daily") -> pd.DataFrame:
+    """Total expenses per complete period, with empty periods as zero spend
+
+    The last period is dropped unless the history reaches its final day, so
+    a week or month still in progress is not fitted as a fall in spending.
+    """
+    freq = FORECAST_RESOLUTIONS[resolution]
+    series = history.set_index('ds')['y'].resample(freq, label='left', closed='left').sum()
+    if len(series):
+        last_day = series.index[-1] + to_offset(freq) - pd.Timedelta(days=1)
+        if history['ds'].max().normalize() < last_day:
+            series = series.iloc[:-1]
+    return series.reset_index()
+
+
+def forecast_variant(resolution: str, horizon: int, include_history: bool) -> str:
+    """Key for a stored forecast's output shape"""
+    return f"{resolution}:{horizon}:{int(include_history)}"
+
+
+def prophet_params(model: Prophet) -> dict:
+    """Fitted Prophet parameters in the shape Stan accepts as initialization"""
+    params = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        params[name] = float(model.params[name][0][0])
+    for name in ['delta', 'beta']:
+        params[name] = [float(value) for value in model.params[name][0]]
+    return params
+
+
+def warm_start_init(db: Session, user_id: int, stored, summary: dict):
+    """Previous fit's parameters when the history has only been appended to
+
+    Returns None (cold fit) when there is no previous fit, when rows the
+    previous fit saw were deleted or changed, or when the appended rows
+    amount to a large import.
+    """
+    if not stored or not stored.model_params or stored.history_max_id is None:
+        return None
+    
+    seen_count, seen_sum = db.query(func.count(Transaction.id), func.sum(Transaction.amount)).filter(
+        Transaction.user_id == user_id,
+        Transaction.amount < 0,
+        Transaction.id <= stored.history_max_id
+    ).one()
+    if seen_count != stored.history_count or not math.isclose(seen_sum or 0.0, stored.history_sum, rel_tol=1e-9):
+        return None
+    
+    appended = summary["count"] - seen_count
+    if appended > WARM_START_MAX_APPENDED * max(seen_count, 1):
+        return None
+    
+    return json.loads(stored.model_params)
+
+
+def fit_forecast(
+    history: pd.DataFrame,
+    resolution: str = "daily",
+    horizon: int = None,
+    include_history: bool = False,
+    init: dict = None
+):
+    """Fit Prophet on a ds/y history and return (columnar forecast, fitted params)
+
+    The history is summed per period before fitting, and only the next
+    `horizon` periods are predicted unless include_history is set. Pure
+    function of its input so it can run in a worker process. `init`
+    warm-starts Stan from a previous fit's parameters.
+    """
+    horizon = horizon or DEFAULT_FORECAST_HORIZONS[resolution]
+    series = aggregate_history(history, resolution)
+    if len(series) < MIN_FORECAST_RECORDS:
+        raise ValueError(f"Not enough history for a {resolution} forecast. Need at least 2 periods.")
+    
+    model = Prophet()
+    with FORECAST_FIT_TIME.time(resolution=resolution, warm_start=str(bool(init)).lower()):
+        if init:
+            # Prophet falls back to its defaults for any vector whose shape changed
+            init = {name: np.asarray(value) if isinstance(value, list) else value for name, value in init.items()}
+            model.fit(series, init=init)
+        else:
+            model.fit(series)
+    future = model.make_future_dataframe(
+        periods=horizon,
+        freq=FORECAST_RESOLUTIONS[resolution],
+        include_history=include_history
+    )
+    with FORECAST_PREDICT_TIME.time(resolution=resolution):
+        forecast = model.predict(future)
+    return frame_payload(forecast[FORECAST_COLUMNS], columnar=True), prophet_params(model)
+
+
+def get_stored_forecast(db: Session, user_id: int, variant: str):
+    return db.query(Forecast).filter(Forecast.user_id == user_id, Forecast.variant == variant).first()
+
+
+def save_forecast(db: Session, user_id: int, variant: str, summary: dict, payload: dict, params: dict = None):
+    """Insert or replace the stored forecast for a user and output variant"""
+    stored = get_stored_forecast(db, user_id, variant)
+    if stored is None:
+        stored = Forecast(user_id=user_id, variant=variant)
+        db.add(stored)
+    stored.fitted_at = datetime.utcnow()
+    stored.data_fingerprint = forecast_fingerprint(summary)
+    stored.result = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+    stored.model_params = json.dumps(params) if params else None
+    stored.history_count = summary["count"]
+    stored.history_max_id = summary["max_id"]
+    stored.history_sum = summary["sum"]
+    db.commit()
+
+
 # This is the function for the ML forecast
-def generate_forecast(db: Session, user_id: int):
-    """Generate ML forecast for a specific user"""
+def generate_forecast(
+    db: Session,
+    user_id: int,
+    columnar: bool = False,
+    resolution: str = "daily",
+    horizon: int = None,
+    include_history: bool = False
+):
+    """Generate ML forecast for a specific user
+
+    Serves the shared result cache entry for the user's data version first,
+    then the stored (batch precomputed) forecast when the expense history
+    is unchanged since it was fitted, and fits on demand otherwise.
+    """
     try:
-        # Get all transactions for this user
-        transactions = db.query(Transaction).filter(
-            Transaction.user_id == user_id,
-            Transaction.amount < 0  # Only expenses
-        ).all()
+        if resolution not in FORECAST_RESOLUTIONS:
+            return {"error": f"Unknown resolution: {resolution}"}
+        horizon = horizon or DEFAULT_FORECAST_HORIZONS[resolution]
+        if not 1 <= horizon <= MAX_FORECAST_HORIZONS[resolution]:
+            return {"error": f"horizon must be between 1 and {MAX_FORECAST_HORIZONS[resolution]} for {resolution} forecasts"}
         
-        if len(transactions) < 2:
-            return {"error": "Not enough transaction data for forecasting. Need at least 2 expense records."}
+        variant = forecast_variant(resolution, horizon, include_history)
+        version = db.query(User.data_version).filter(User.id == user_id).scalar()
+        payload = result_cache.get("forecast", user_id, version, variant) if version is not None else None
         
-        # Convert to DataFrame
-        df = pd.DataFrame([{
-            'ds': t.date,
-            'y': abs(t.amount)
-        } for t in transactions])
+        if payload is None:
+            summary = expense_history_summary(db, user_id)
+            stored = get_stored_forecast(db, user_id, variant)
+            
+            if stored and stored.data_fingerprint == forecast_fingerprint(summary):
+                payload = orjson.loads(stored.result)
+            else:
+                history = load_forecast_history(db, user_id)
+                if len(history) < MIN_FORECAST_RECORDS:
+                    return {"error": "Not enough transaction data for forecasting. Need at least 2 expense records."}
+                
+                init = warm_start_init(db, user_id, stored, summary)
+                payload, params = fit_forecast(history, resolution, horizon, include_history, init)
+                save_forecast(db, user_id, variant, summary, payload, params)
+            
+            if version is not None:
+                result_cache.put("forecast", user_id, version, payload, variant)
         
-        df['ds'] = pd.to_datetime(df['ds'])
-        
-        # Create, fit, and predict
-        model = Prophet()
-        model.fit(df)
-        future = model.make_future_dataframe(periods=180)
-        forecast = model.predict(future)
-        
-        # Return only the relevant columns as a dictionary
-        return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].to_dict('records')
+        # Return as parallel arrays or records
+        return payload if columnar else columns_to_records(payload)
     
     except Exception as e:
         return {"error": str(e)}
@@ -171,5 +483,14 @@ def log_activity(db: Session, user_id: int, action: str, details: str = None):
         db.add(activity)
         db.commit()
     except Exception as e:
-        print(f"Error logging activity: {e}")
-        db.rollback()
\ No newline at end of file
+        logger.warning("activity_log.error", extra={"user_id": user_id, "action": action, "error": str(e)})
+        db.rollback()
+
+
+# Data version utility
+def bump_data_version(db: Session, user_id: int):
+    """Increment the user's data version (committed with the caller's transaction)"""
+    db.query(User).filter(User.id == user_id).update(
+        {User.data_version: User.data_version + 1},
+        synchronize_session=False
+    )
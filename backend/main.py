@@ -1,60 +1,79 @@
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Literal
 from pydantic import BaseModel
 from datetime import datetime, date
-import random
 import json
+import os
+import time
+import orjson
 
 # Import our modules
-from database import engine, get_db, Base
+from database import engine, get_db, Base, add_missing_columns
 from models import User, Transaction, ActivityLog, Upload, UploadTransaction
 from auth import (
     UserRegister, UserLogin, Token, 
     authenticate_user, create_user, create_access_token,
     get_current_user
 )
-from logic import calculate_financials, simulate_hiring_scenario, generate_forecast, log_activity
+from logic import (
+    calculate_financials, simulate_hiring_scenario, generate_forecast, log_activity, bump_data_version,
+    load_financial_baseline, monthly_cash_flows, window_financials, range_totals
+)
+from activity_archive import activity_page
+from snapshot import get_snapshot, snapshot_cache, snapshot_row
+from recurring import recurring_payments
+from search import install_search, search_transactions
+from category_forecast import generate_category_forecast
+from log_config import configure_logging
+from profiling import ProfilingMiddleware, ProfilingRoute, profiling_enabled
+from metrics import (
+    MetricsMiddleware, instrument_engine, render_metrics, CSV_PARSE_TIME, CONTENT_TYPE as METRICS_CONTENT_TYPE
+)
+from date_formats import date_format_cache, parse_dates, parse_date_string
+from upload_handler import CSVUploadHandler, UploadSizeLimitMiddleware
+from exporter import stream_export, MEDIA_TYPES
+from simulation import SimulationGridRequest, run_simulation_grid, run_monte_carlo
+from bulk_edit import BulkDeleteRequest, BulkUpdateRequest, bulk_delete, bulk_update, release_emptied_uploads
+from bulk_import import (
+    TransactionCreate, BulkTransactionImporter, iter_ndjson_lines, new_transaction_id, DEFAULT_CHUNK_SIZE
+)
+from responses import (
+    FastJSONResponse, rows_payload,
+    make_etag, etag_matches, cache_headers, result_headers, not_modified
+)
 
-# Create database tables
+# Create database tables (and columns added since an existing database was created) and the full-text search index
 Base.metadata.create_all(bind=engine)
+add_missing_columns(engine)
+install_search(engine)
 
-# Pydantic models
-class TransactionCreate(BaseModel):
-    date: Optional[str] = None
-    description: str
-    amount: float
-    category: str
-    vendor: Optional[str] = None
-    notes: Optional[str] = None
+# Structured logs and per-query database timing
+configure_logging()
+instrument_engine(engine)
 
+# Pydantic models
 class HiringScenario(BaseModel):
     new_hires: int
     avg_salary: float
 
-class TransactionResponse(BaseModel):
-    id: int
-    transaction_id: str
-    date: datetime
-    description: str
-    amount: float
-    category: str
-    vendor: Optional[str] = None
-    notes: Optional[str] = None
-    
-    class Config:
-        from_attributes = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
-
 class CashUpdate(BaseModel):
     cash_on_hand: float
 
 # Initialize FastAPI
 app = FastAPI(title="FinSight AI API")
 
+# Opt-in request profiling; nothing is installed unless PROFILE_TOKEN is set
+if profiling_enabled():
+    app.router.route_class = ProfilingRoute
+
+# Shared CSV upload handler
+csv_handler = CSVUploadHandler()
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -64,6 +83,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses above this size (bytes)
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
+
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
+# Refuse oversized uploads while the body is received, not after it is spooled
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=csv_handler.max_upload_bytes)
+
+# Request metrics (added last so it wraps the other middleware)
+app.add_middleware(MetricsMiddleware)
+
+# Optional bearer token required to scrape /metrics
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Columns returned by the transaction list endpoints
+TRANSACTION_COLUMNS = ["id", "transaction_id", "date", "description", "amount", "category", "vendor", "notes"]
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Prometheus scrape endpoint"""
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 # --- Authentication Endpoints ---
 @app.post("/api/auth/register", response_model=Token)
 def register(user_data: UserRegister, db: Session = Depends(get_db)):
@@ -120,11 +165,84 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
 # --- Financial Data Endpoints ---
 @app.get("/api/financial-data")
 def get_financial_data(
+    request: Request,
+    response: Response,
+    window: Optional[int] = Query(None, ge=1, le=120, description="Trailing months to average over (default: all history)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get financial overview data"""
-    return calculate_financials(db, current_user.id)
+    etag = make_etag("financial-data", current_user.id, current_user.data_version, window)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    result = window_financials(db, current_user.id, window) if window else calculate_financials(db, current_user.id)
+    response.headers.update(result_headers(etag, result))
+    return result
+
+
+@app.get("/api/financial-data/range")
+def get_financial_range(
+    request: Request,
+    response: Response,
+    start: date,
+    end: date,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Expense and revenue totals between two dates (inclusive)"""
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    
+    etag = make_etag("financial-range", current_user.id, current_user.data_version, start, end)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    result = range_totals(db, current_user.id, start, end, current_user.data_version)
+    response.headers.update(result_headers(etag, result))
+    return result
+
+
+@app.get("/api/recurring")
+def get_recurring_payments(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Recurring payments and income (subscriptions, payroll, rent, retainers) found in the history"""
+    etag = make_etag("recurring", current_user.id, current_user.data_version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    result = recurring_payments(db, current_user.id, current_user.data_version)
+    response.headers.update(result_headers(etag, result))
+    return result
+
+
+@app.get("/api/financial-data/monte-carlo", response_class=FastJSONResponse)
+def get_monte_carlo_runway(
+    paths: int = 50000,
+    months: int = 36,
+    method: Literal["bootstrap", "normal"] = "bootstrap",
+    seed: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Probabilistic runway from simulated cash paths"""
+    baseline = load_financial_baseline(db, current_user.id)
+    financials = calculate_financials(db, current_user.id, baseline=baseline)
+    if "error" in financials:
+        raise HTTPException(status_code=400, detail=financials["error"])
+    
+    _, snapshot = baseline
+    monthly = monthly_cash_flows(snapshot)
+    try:
+        result = run_monte_carlo(financials, monthly, paths, months, method, seed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return FastJSONResponse(result)
 
 
 @app.put("/api/cash-on-hand")
@@ -134,22 +252,61 @@ def update_cash_on_hand(
     db: Session = Depends(get_db)
 ):
     """Update cash on hand"""
+    version = current_user.data_version
     current_user.cash_on_hand = cash_data.cash_on_hand
+    bump_data_version(db, current_user.id)
     db.commit()
+    snapshot_cache.apply(current_user.id, version)
     
     log_activity(db, current_user.id, "UPDATE_CASH", f"Updated cash on hand to {cash_data.cash_on_hand}")
     
     return {"success": True, "cash_on_hand": current_user.cash_on_hand}
 
-@app.get("/api/forecast")
+@app.get("/api/forecast", response_class=FastJSONResponse)
 def get_forecast(
+    request: Request,
+    format: Literal["records", "columnar"] = "records",
+    resolution: Literal["daily", "weekly", "monthly"] = "daily",
+    horizon: Optional[int] = Query(None, ge=1, description="Periods to forecast (default depends on resolution)"),
+    include_history: bool = False,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get ML-powered expense forecast"""
-    return generate_forecast(db, current_user.id)
+    etag = make_etag(
+        "forecast", current_user.id, current_user.data_version, format, resolution, horizon, include_history
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    result = generate_forecast(
+        db, current_user.id, columnar=format == "columnar",
+        resolution=resolution, horizon=horizon, include_history=include_history
+    )
+    return FastJSONResponse(result, headers=result_headers(etag, result))
 
 
+@app.get("/api/forecast/categories", response_class=FastJSONResponse)
+def get_category_forecast(
+    request: Request,
+    format: Literal["records", "columnar"] = "records",
+    resolution: Literal["daily", "weekly", "monthly"] = "weekly",
+    horizon: Optional[int] = Query(None, ge=1, description="Periods to forecast (default depends on resolution)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Per-category expense forecasts with a reconciled total"""
+    etag = make_etag(
+        "forecast-categories", current_user.id, current_user.data_version, format, resolution, horizon
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    result = generate_category_forecast(
+        db, current_user.id, columnar=format == "columnar", resolution=resolution, horizon=horizon
+    )
+    return FastJSONResponse(result, headers=result_headers(etag, result))
+
 # --- Transaction Endpoints ---
 @app.post("/api/transactions")
 def add_transaction(
@@ -159,17 +316,13 @@ def add_transaction(
 ):
     """Add a new transaction"""
     try:
-        if transaction.date:
-            from dateutil import parser
-            txn_date = parser.parse(transaction.date)
-        else:
-            txn_date = datetime.utcnow()
-    except Exception:
-        txn_date = datetime.utcnow()
+        txn_date = parse_date_string(transaction.date) if transaction.date else datetime.utcnow()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     new_transaction = Transaction(
         user_id=current_user.id,
-        transaction_id=f"txn_{random.randint(10000, 99999)}",
+        transaction_id=new_transaction_id(),
         date=txn_date,
         description=transaction.description,
         amount=transaction.amount,
@@ -178,9 +331,12 @@ def add_transaction(
         notes=transaction.notes
     )
     
+    version = current_user.data_version
     db.add(new_transaction)
+    bump_data_version(db, current_user.id)
     db.commit()
     db.refresh(new_transaction)
+    snapshot_cache.apply(current_user.id, version, added=[snapshot_row(new_transaction)])
     
     log_activity(
         db,
@@ -191,37 +347,111 @@ def add_transaction(
     
     return {"success": True, "transaction": new_transaction}
 
-@app.get("/api/transactions")
+@app.post("/api/transactions/bulk")
+async def bulk_add_transactions(
+    request: Request,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Add many transactions from a JSON array or a streamed NDJSON body"""
+    importer = BulkTransactionImporter(db, current_user.id, chunk_size)
+    
+    if "ndjson" in request.headers.get("content-type", ""):
+        # Insert chunks as the body streams in
+        async for line in iter_ndjson_lines(request.stream()):
+            if importer.add(line):
+                await run_in_threadpool(importer.flush)
+    else:
+        try:
+            rows = orjson.loads(await request.body())
+        except orjson.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of transactions")
+        await run_in_threadpool(importer.add_many, rows)
+    
+    return await run_in_threadpool(importer.finish)
+
+@app.post("/api/transactions/bulk-delete")
+def bulk_delete_transactions(
+    payload: BulkDeleteRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Delete every transaction matching a filter (ids, upload, vendor, category, dates) in one statement"""
+    if payload.filter.is_empty():
+        raise HTTPException(status_code=400, detail="Give at least one filter criterion")
+    return bulk_delete(db, current_user.id, current_user.data_version, payload.filter, payload.dry_run)
+
+@app.post("/api/transactions/bulk-update")
+def bulk_update_transactions(
+    payload: BulkUpdateRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Set category, vendor or notes on every transaction matching a filter in one statement"""
+    if payload.filter.is_empty():
+        raise HTTPException(status_code=400, detail="Give at least one filter criterion")
+    try:
+        return bulk_update(
+            db, current_user.id, current_user.data_version, payload.filter, payload.changes, payload.dry_run
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/transactions", response_class=FastJSONResponse)
 def get_transactions(
     skip: int = 0,
     limit: int = 100,
     category: Optional[str] = None,
+    format: Literal["records", "columnar"] = "records",
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get transaction history with pagination and filtering"""
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
+    # Select plain columns rather than hydrating ORM objects
+    query = db.query(*[getattr(Transaction, col) for col in TRANSACTION_COLUMNS]).filter(
+        Transaction.user_id == current_user.id
+    )
     
     if category:
         query = query.filter(Transaction.category == category)
     
-    transactions = query.order_by(Transaction.date.desc()).offset(skip).limit(limit).all()
-    
-    # Convert to dict manually
-    result = []
-    for txn in transactions:
-        result.append({
-            "id": txn.id,
-            "transaction_id": txn.transaction_id,
-            "date": txn.date.isoformat(),
-            "description": txn.description,
-            "amount": txn.amount,
-            "category": txn.category,
-            "vendor": txn.vendor,
-            "notes": txn.notes
-        })
+    rows = query.order_by(Transaction.date.desc()).offset(skip).limit(limit).all()
     
-    return result
+    return FastJSONResponse(rows_payload(rows, TRANSACTION_COLUMNS, columnar=format == "columnar"))
+
+@app.get("/api/transactions/search", response_class=FastJSONResponse)
+def search_transactions_endpoint(
+    q: str = Query(..., min_length=1, description="Words to find in description, vendor or notes (prefixes match)"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    sort: Literal["relevance", "date"] = "relevance",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    category: Optional[str] = None,
+    format: Literal["records", "columnar"] = "records",
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Full-text transaction search, ranked by relevance or newest first"""
+    try:
+        rows, next_cursor = search_transactions(
+            db, current_user.id, q, limit, cursor, sort,
+            start_date, end_date, min_amount, max_amount, category
+        )
+    except ValueError as e:
+        # A malformed cursor, or one from another sort order or query
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    columns = TRANSACTION_COLUMNS + ["score"]
+    return FastJSONResponse(
+        rows_payload([[row[col] for col in columns] for row in rows], columns, columnar=format == "columnar"),
+        headers=headers
+    )
 
 @app.delete("/api/transactions/{transaction_id}")
 def delete_transaction(
@@ -238,48 +468,65 @@ def delete_transaction(
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
+    version = current_user.data_version
+    upload_id = transaction.upload_id
     db.delete(transaction)
+    db.flush()
+    release_emptied_uploads(db, current_user.id, [upload_id])
+    bump_data_version(db, current_user.id)
     db.commit()
+    snapshot_cache.apply(current_user.id, version, deleted=[transaction_id])
     
     log_activity(db, current_user.id, "DELETE_TRANSACTION", f"Deleted transaction {transaction_id}")
     
     return {"success": True}
 
+# --- Export Endpoints ---
+@app.get("/api/export/transactions")
+def export_transactions(
+    format: Literal["csv", "ndjson", "parquet"] = "csv",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[List[str]] = Query(None),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream the user's transactions as CSV, NDJSON or Parquet"""
+    filename = f"transactions_{datetime.utcnow().strftime('%Y-%m-%d')}.{format}"
+    return StreamingResponse(
+        stream_export(current_user.id, format, start_date, end_date, category),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # --- Activity Log Endpoints ---
-@app.get("/api/activity")
+@app.get("/api/activity", response_class=FastJSONResponse)
 def get_activity_log(
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=1000),
+    before: Optional[int] = Query(None, description="Return entries older than this activity id"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get recent activity log"""
-    activities = db.query(ActivityLog).filter(
-        ActivityLog.user_id == current_user.id
-    ).order_by(ActivityLog.timestamp.desc()).limit(limit).all()
-    
-    return [{
-        "id": a.id,
-        "action": a.action,
-        "details": a.details,
-        "timestamp": a.timestamp.isoformat()
-    } for a in activities]
+    """Get recent activity log, paging back into archived history with `before`"""
+    entries, next_before = activity_page(db, current_user.id, limit, before)
+    headers = {"X-Next-Before": str(next_before)} if next_before is not None else None
+    return FastJSONResponse(entries, headers=headers)
 
 # --- Statistics Endpoints ---
 @app.get("/api/stats/categories")
 def get_category_stats(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get spending by category"""
-    transactions = db.query(Transaction).filter(
-        Transaction.user_id == current_user.id
-    ).all()
+    etag = make_etag("stats-categories", current_user.id, current_user.data_version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
     
-    category_totals = {}
-    for t in transactions:
-        if t.category not in category_totals:
-            category_totals[t.category] = 0
-        category_totals[t.category] += abs(t.amount)
+    snapshot = get_snapshot(db, current_user.id, current_user.data_version)
+    category_totals = snapshot.category_totals()
     
     categories = [
         {"category": cat, "total": total}
@@ -299,32 +546,82 @@ def simulate_hiring(
     from logic import simulate_hiring_scenario
     return simulate_hiring_scenario(db, current_user.id, scenario.new_hires, scenario.avg_salary)
 
+@app.post("/api/simulate/grid", response_class=FastJSONResponse)
+def simulate_grid(
+    grid: SimulationGridRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Simulate every combination of hires, salaries, start months and revenue growth"""
+    financials = calculate_financials(db, current_user.id)
+    if "error" in financials:
+        raise HTTPException(status_code=400, detail=financials["error"])
+    
+    try:
+        result = run_simulation_grid(financials, grid)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return FastJSONResponse(result)
+
 # --- CSV Upload Endpoints ---
 @app.post("/api/upload/csv")
 async def upload_csv(
     file: UploadFile = File(...),
+    force: bool = False,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Upload and analyze CSV file"""
     import pandas as pd
-    from io import StringIO
     
+    filepath = None
     try:
-        content = await file.read()
-        content_str = content.decode('utf-8')
-        df = pd.read_csv(StringIO(content_str))
+        filepath, file_hash = await csv_handler.save_upload(file)
+        
+        # Identical re-upload: hand back the staged upload without reparsing
+        if not force:
+            existing = db.query(Upload).filter(
+                Upload.user_id == current_user.id,
+                Upload.file_hash == file_hash
+            ).order_by(Upload.upload_date.desc()).first()
+            if existing and existing.status == "imported":
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"This file was already imported (upload {existing.id}, "
+                           f"{existing.imported_count} transactions); upload it with force=true to import it again"
+                )
+            if existing:
+                return {
+                    "upload_id": existing.id,
+                    "filename": existing.filename,
+                    "total_transactions": existing.total_transactions,
+                    "analysis": json.loads(existing.analysis_results) if existing.analysis_results else None,
+                    "duplicate": True,
+                    "status": existing.status
+                }
+        
+        parse_started = time.perf_counter()
+        df = await run_in_threadpool(pd.read_csv, filepath, encoding='utf-8')
         
         required_cols = ['Date', 'Description', 'Amount']
         missing_cols = [col for col in required_cols if col not in df.columns]
         if missing_cols:
             raise HTTPException(status_code=400, detail=f"Missing required columns: {', '.join(missing_cols)}")
         
+        # Infer the date format once per file (remembered per user and header layout)
+        column_map = {col: col for col in df.columns}
+        date_format = date_format_cache.resolve(current_user.id, column_map, df['Date'])
+        df['Date'] = parse_dates(df['Date'], date_format)
+        if df['Date'].isna().any():
+            bad_rows = [int(i) + 2 for i in df.index[df['Date'].isna()][:5]]
+            raise HTTPException(status_code=400, detail=f"Unrecognised dates on rows: {', '.join(map(str, bad_rows))}")
+        
         transactions = []
         for idx, row in df.iterrows():
             txn = {
                 'id': idx,
-                'date': str(row['Date']),
+                'date': row['Date'].to_pydatetime(),
                 'description': str(row['Description']),
                 'amount': float(row['Amount']),
                 'category': str(row.get('Category', 'Operations')),
@@ -332,12 +629,14 @@ async def upload_csv(
                 'notes': str(row.get('Notes', '')) if pd.notna(row.get('Notes')) else None
             }
             transactions.append(txn)
+        CSV_PARSE_TIME.observe(time.perf_counter() - parse_started)
         
         upload = Upload(
             user_id=current_user.id,
             filename=file.filename,
             status="completed",
             total_transactions=len(transactions),
+            file_hash=file_hash,
             analysis_results=json.dumps({
                 'total_transactions': len(transactions),
                 'summary': {
@@ -347,15 +646,18 @@ async def upload_csv(
                 }
             })
         )
+        version = current_user.data_version
         db.add(upload)
+        bump_data_version(db, current_user.id)
         db.commit()
         db.refresh(upload)
+        snapshot_cache.apply(current_user.id, version)
         
         for txn in transactions:
             staged_txn = UploadTransaction(
                 upload_id=upload.id,
                 transaction_id=f"staged_{upload.id}_{txn['id']}",
-                date=pd.to_datetime(txn['date']),
+                date=txn['date'],
                 description=txn['description'],
                 amount=txn['amount'],
                 category=txn['category'],
@@ -371,10 +673,17 @@ async def upload_csv(
             "upload_id": upload.id,
             "filename": file.filename,
             "total_transactions": len(transactions),
-            "analysis": json.loads(upload.analysis_results)
+            "analysis": json.loads(upload.analysis_results),
+            "duplicate": False,
+            "status": upload.status
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Upload failed: {str(e)}")
+    finally:
+        if filepath:
+            csv_handler.cleanup_file(filepath)
 
 @app.post("/api/upload/{upload_id}/confirm")
 def confirm_upload(
@@ -386,27 +695,37 @@ def confirm_upload(
     upload = db.query(Upload).filter(Upload.id == upload_id, Upload.user_id == current_user.id).first()
     if not upload:
         raise HTTPException(status_code=404, detail="Upload not found")
+    if upload.status == "imported":
+        raise HTTPException(status_code=400, detail="Upload already imported")
     
     staged_txns = db.query(UploadTransaction).filter(UploadTransaction.upload_id == upload_id).all()
     imported_count = 0
+    imported = []
     
     for staged in staged_txns:
         txn = Transaction(
             user_id=current_user.id,
-            transaction_id=f"txn_{random.randint(10000, 99999)}",
+            transaction_id=new_transaction_id(),
             date=staged.date,
             description=staged.description,
             amount=staged.amount,
             category=staged.category or "Operations",
             vendor=staged.vendor,
-            notes=staged.notes
+            notes=staged.notes,
+            upload_id=upload.id
         )
         db.add(txn)
+        imported.append(txn)
         imported_count += 1
     
+    version = current_user.data_version
     upload.imported_count = imported_count
     upload.status = "imported"
+    bump_data_version(db, current_user.id)
+    db.flush()
+    added = [snapshot_row(txn) for txn in imported]
     db.commit()
+    snapshot_cache.apply(current_user.id, version, added=added)
     
     log_activity(db, current_user.id, "IMPORT_TRANSACTIONS", f"Imported {imported_count} transactions")
     
@@ -0,0 +1,255 @@
+"""
+Metrics
+In-process counters, gauges and histograms exposed in Prometheus text format
+
+Metrics live in the memory of each worker process, so with several uvicorn
+workers every scrape sees one worker's numbers; scrape them per process or
+run a single worker. Fits running in the forecast process pools are timed
+inside those processes and are not reported here.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional, Tuple
+import bisect
+import math
+import threading
+import time
+from sqlalchemy import event
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; tuned for API requests that range from sub-millisecond cache hits to Prophet fits
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 500)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(10), " ").replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in sorted(items):
+            yield from self._samples(key, value)
+
+    def _samples(self, key, value) -> Iterable[str]:
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last slot is +Inf), then sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self, key, value) -> Iterable[str]:
+        counts, total = value
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+        yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+        yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+REGISTRY = []
+
+
+def render_metrics() -> bytes:
+    """Every registered metric in Prometheus text exposition format"""
+    lines = [line for metric in REGISTRY for line in metric.render()]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# --- Metric definitions ---
+HTTP_REQUESTS = Counter(
+    "finsight_http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+HTTP_LATENCY = Histogram(
+    "finsight_http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+HTTP_IN_FLIGHT = Gauge(
+    "finsight_http_requests_in_flight", "HTTP requests currently being served", ("method",)
+)
+REQUEST_DB_QUERIES = Histogram(
+    "finsight_http_request_db_queries", "Database queries issued per HTTP request", ("route",),
+    buckets=COUNT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    "finsight_http_request_db_seconds", "Database time spent per HTTP request", ("route",)
+)
+DB_QUERIES = Counter(
+    "finsight_db_queries_total", "Database queries executed", ("statement",)
+)
+DB_QUERY_TIME = Histogram(
+    "finsight_db_query_duration_seconds", "Database query latency", ("statement",), buckets=QUERY_BUCKETS
+)
+FORECAST_FIT_TIME = Histogram(
+    "finsight_forecast_fit_seconds", "Prophet model fit time", ("resolution", "warm_start")
+)
+FORECAST_PREDICT_TIME = Histogram(
+    "finsight_forecast_predict_seconds", "Prophet predict time", ("resolution",)
+)
+CSV_PARSE_TIME = Histogram(
+    "finsight_csv_parse_seconds", "Uploaded CSV parse and clean time", ()
+)
+
+
+# --- Per-request database accounting ---
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _statement_kind(statement: str) -> str:
+    """First SQL keyword, so statement labels stay low-cardinality"""
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+def instrument_engine(engine):
+    """Time every cursor execution on an engine and charge it to the current request"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        kind = _statement_kind(statement)
+        DB_QUERIES.inc(statement=kind)
+        DB_QUERY_TIME.observe(elapsed, statement=kind)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+
+# --- ASGI middleware ---
+class MetricsMiddleware:
+    """Records latency, status, in-flight count and DB usage for every HTTP request
+
+    Routes are labelled by their path template (e.g. /api/upload/{upload_id}),
+    and requests that match no route share one "unmatched" label.
+    """
+
+    def __init__(self, app, exclude_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method=method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec(method=method)
+            _request_stats.reset(token)
+
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS.inc(method=method, route=route, status=status_code)
+            HTTP_LATENCY.observe(elapsed, method=method, route=route)
+            REQUEST_DB_QUERIES.observe(stats.queries, route=route)
+            REQUEST_DB_TIME.observe(stats.db_seconds, route=route)
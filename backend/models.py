@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -11,6 +11,7 @@ class User(Base):
     email = Column(String(255), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     cash_on_hand = Column(Float, default=7500000.0)  # Default 75 lakhs
+    data_version = Column(Integer, default=0, nullable=False)  # Bumped on every data mutation
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -29,6 +30,7 @@ class Transaction(Base):
     category = Column(String(100), nullable=False)
     vendor = Column(String(255), nullable=True)
     notes = Column(Text, nullable=True)
+    upload_id = Column(Integer, ForeignKey("uploads.id"), index=True, nullable=True)  # Set when imported from a CSV upload
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -36,6 +38,8 @@ class Transaction(Base):
 
 class ActivityLog(Base):
     __tablename__ = "activity_logs"
+    # Per-user newest-first paging
+    __table_args__ = (Index("ix_activity_logs_user_id_id", "user_id", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -57,6 +61,7 @@ class Upload(Base):
     total_transactions = Column(Integer, default=0)
     imported_count = Column(Integer, default=0)
     analysis_results = Column(Text, nullable=True)  # JSON string
+    file_hash = Column(String(64), index=True, nullable=True)  # SHA-256 of the uploaded file
     
     # Relationship
     user = relationship("User")
@@ -81,3 +86,28 @@ class UploadTransaction(Base):
     
     # Relationship
     upload = relationship("Upload", back_populates="staged_transactions")
+
+class Forecast(Base):
+    __tablename__ = "forecasts"
+    __table_args__ = (UniqueConstraint("user_id", "variant"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    variant = Column(String(50), nullable=False)  # resolution:horizon:include_history
+    fitted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    data_fingerprint = Column(String(64), nullable=False)  # Hash of the expense history the fit used
+    result = Column(Text, nullable=False)  # JSON, columnar forecast
+    model_params = Column(Text, nullable=True)  # JSON, fitted Prophet parameters for warm starts
+    history_count = Column(Integer, nullable=True)  # Expense rows the fit saw
+    history_max_id = Column(Integer, nullable=True)
+    history_sum = Column(Float, nullable=True)
+    
+    # Relationship
+    user = relationship("User")
+
+class DatabaseInstance(Base):
+    __tablename__ = "database_instance"
+    
+    id = Column(Integer, primary_key=True)  # Single row, id 1
+    instance_id = Column(String(32), nullable=False)  # Random, generated when the database is created
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
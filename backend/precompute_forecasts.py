@@ -0,0 +1,94 @@
+"""
+Forecast Precompute
+Nightly batch job that refits stored forecasts for every tenant whose data changed
+
+Usage:
+    python -m precompute_forecasts [--workers N] [--force] [--resolution daily weekly ...]
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import os
+import time
+
+from database import engine, Base, SessionLocal
+from models import User
+from logic import (
+    MIN_FORECAST_RECORDS, FORECAST_RESOLUTIONS, DEFAULT_FORECAST_HORIZONS,
+    expense_history_summary, forecast_fingerprint, forecast_variant, load_forecast_history,
+    warm_start_init, fit_forecast, get_stored_forecast, save_forecast
+)
+
+
+def precompute_forecasts(workers: int = None, force: bool = False, resolutions=("daily", "weekly")):
+    """Refit forecasts for changed tenants across a process pool
+
+    Each resolution is precomputed at its default horizon, the variant the
+    dashboard requests.
+    """
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    started = time.perf_counter()
+    fitted = skipped = too_little = failed = 0
+
+    try:
+        user_ids = [user_id for (user_id,) in db.query(User.id).order_by(User.id).all()]
+        print(f"Checking forecasts for {len(user_ids)} users...")
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = {}
+            for user_id in user_ids:
+                summary = expense_history_summary(db, user_id)
+                history = None
+                for resolution in resolutions:
+                    horizon = DEFAULT_FORECAST_HORIZONS[resolution]
+                    variant = forecast_variant(resolution, horizon, False)
+                    stored = get_stored_forecast(db, user_id, variant)
+                    if not force and stored and stored.data_fingerprint == forecast_fingerprint(summary):
+                        skipped += 1
+                        continue
+
+                    if history is None:
+                        history = load_forecast_history(db, user_id)
+                    if len(history) < MIN_FORECAST_RECORDS:
+                        too_little += 1
+                        continue
+
+                    init = None if force else warm_start_init(db, user_id, stored, summary)
+                    future = pool.submit(fit_forecast, history, resolution, horizon, False, init)
+                    jobs[future] = (user_id, variant, summary)
+
+            for future in as_completed(jobs):
+                user_id, variant, summary = jobs[future]
+                try:
+                    payload, params = future.result()
+                    save_forecast(db, user_id, variant, summary, payload, params)
+                    fitted += 1
+                    print(f"✓ User {user_id}: {variant} forecast refreshed")
+                except Exception as e:
+                    failed += 1
+                    db.rollback()
+                    print(f"✗ User {user_id} ({variant}): {e}")
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✓ Fitted {fitted}, unchanged {skipped}, not enough data {too_little}, failed {failed} "
+          f"in {elapsed:.1f}s")
+    return {"fitted": fitted, "skipped": skipped, "too_little": too_little, "failed": failed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute forecasts for all users")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Worker processes for Prophet fits (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="Refit every user even if their data is unchanged")
+    parser.add_argument("--resolution", nargs="+", choices=list(FORECAST_RESOLUTIONS),
+                        default=["daily", "weekly"], help="Forecast resolutions to precompute")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("FinSight AI - Forecast Precompute")
+    print("=" * 60)
+    precompute_forecasts(args.workers, args.force, args.resolution)
+    print("=" * 60)
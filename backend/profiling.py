@@ -0,0 +1,195 @@
+"""
+Request Profiling
+Opt-in per-request profiles for reproducing slow tenants in production
+
+Profiling is only installed when PROFILE_TOKEN is set, and a request is only
+profiled when it carries that token in an X-Profile header or a ?profile=
+query parameter. Without PROFILE_TOKEN neither the middleware nor the route
+wrapper exists, so normal requests pay nothing.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import reduce, wraps
+from typing import Optional
+from urllib.parse import parse_qs
+import asyncio
+import cProfile
+import glob
+import hmac
+import os
+import pstats
+import re
+import threading
+import time
+from fastapi.routing import APIRoute
+
+from log_config import get_logger
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+PROFILER = os.getenv("PROFILER", "auto")  # auto | cprofile | pyinstrument
+
+logger = get_logger(__name__)
+
+_session: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+
+# cProfile hooks are per interpreter thread and clash if two requests share
+# the event loop thread, so only one request is profiled at a time
+_active = threading.Lock()
+
+
+def profiling_enabled() -> bool:
+    return bool(PROFILE_TOKEN)
+
+
+def profiler_kind(requested: str = PROFILER) -> str:
+    """pyinstrument when requested (or on auto) and installed, else cProfile"""
+    if requested in ("auto", "pyinstrument"):
+        try:
+            import pyinstrument  # noqa: F401
+            return "pyinstrument"
+        except ImportError:
+            pass
+    return "cprofile"
+
+
+class ProfileSession:
+    """Profiles collected for one request across the event loop and threadpool threads"""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.results = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def profile(self, in_thread: bool = False):
+        """Profile the current thread for the duration of the block"""
+        if self.kind == "pyinstrument":
+            from pyinstrument import Profiler
+            profiler = Profiler(async_mode="disabled" if in_thread else "enabled")
+            profiler.start()
+            try:
+                yield
+            finally:
+                result = profiler.stop()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                result = profiler
+        with self._lock:
+            self.results.append(result)
+
+    def save(self, directory: str, route: str, user_id, duration: float) -> str:
+        """Write the merged profile and return its path"""
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", route).strip("-") or "root"
+        stem = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}_{slug}_user-{user_id or 'anon'}_{duration * 1000:.0f}ms"
+
+        if self.kind == "pyinstrument":
+            from pyinstrument.renderers import HTMLRenderer
+            from pyinstrument.session import Session
+            path = os.path.join(directory, stem + ".html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(HTMLRenderer().render(reduce(Session.combine, self.results)))
+        else:
+            # Open with snakeviz or `python -m pstats`
+            path = os.path.join(directory, stem + ".prof")
+            pstats.Stats(*self.results).dump_stats(path)
+        return path
+
+
+def rotate_profiles(directory: str, keep: int):
+    """Delete all but the newest `keep` profiles"""
+    paths = sorted(
+        glob.glob(os.path.join(directory, "*.prof")) + glob.glob(os.path.join(directory, "*.html")),
+        key=os.path.getmtime
+    )
+    for path in paths[:max(len(paths) - keep, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def profiled_endpoint(endpoint):
+    """Wrap a sync endpoint so its threadpool thread is profiled too
+
+    Async endpoints run on the event loop thread, which the middleware
+    already profiles, so they are returned unchanged.
+    """
+    if asyncio.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        session = _session.get()
+        if session is None:
+            return endpoint(*args, **kwargs)
+        with session.profile(in_thread=True):
+            return endpoint(*args, **kwargs)
+
+    return wrapper
+
+
+class ProfilingRoute(APIRoute):
+    """Route class that makes sync endpoints visible to the request profiler"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, profiled_endpoint(endpoint), **kwargs)
+
+
+class ProfilingMiddleware:
+    """Profiles requests that present the profiling token and saves one file per request"""
+
+    def __init__(self, app, token: str = PROFILE_TOKEN, directory: str = PROFILE_DIR,
+                 keep: int = PROFILE_KEEP, kind: str = PROFILER):
+        self.app = app
+        self.token = token.encode("utf-8")
+        self.directory = directory
+        self.keep = keep
+        self.kind = profiler_kind(kind)
+
+    def _requested(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                return hmac.compare_digest(value, self.token)
+        values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile")
+        return bool(values) and hmac.compare_digest(values[0].encode("utf-8"), self.token)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not _active.acquire(blocking=False):
+            logger.warning("profile.busy", extra={"path": scope["path"]})
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(self.kind)
+        context_token = _session.set(session)
+        started = time.perf_counter()
+        try:
+            with session.profile():
+                await self.app(scope, receive, send)
+        finally:
+            duration = time.perf_counter() - started
+            _session.reset(context_token)
+            _active.release()
+
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            user_id = scope.get("state", {}).get("user_id")
+            try:
+                path = session.save(self.directory, route, user_id, duration)
+                rotate_profiles(self.directory, self.keep)
+                logger.info("profile.saved", extra={
+                    "path": path, "route": route, "user_id": user_id, "duration_ms": round(duration * 1000, 1)
+                })
+            except Exception:
+                logger.exception("profile.save_error", extra={"route": route})
@@ -0,0 +1,221 @@
+"""
+Recurring Payments
+Subscriptions, bills, payroll and retainers detected in a tenant's transaction history
+
+Payments are grouped by payee (the snapshot's normalized vendor, or the
+description when there is none). Each payee's amounts are then split into
+series wherever the sorted amounts jump by more than AMOUNT_GAP, so a bill
+whose price drifts slowly stays one series while two plans from the same
+vendor separate. Same-day payments in a series count as one occurrence. A
+series is recurring when its mean interval is close to a known period and
+most occurrences land in the calendar period after the previous one (the
+next week, month, quarter or year), with a spread of intervals that
+depends on the period. Detection is a couple of sorts and array
+reductions, O(n log n) in the tenant's history.
+
+The detected series are memoised on the snapshot. When a snapshot only
+gained rows, just the payees in those rows are re-detected.
+"""
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import User
+from snapshot import NAT, TransactionSnapshot, get_snapshot
+from result_cache import result_cache
+
+# Period name -> length in days
+PERIODS = {"weekly": 7.0, "biweekly": 14.0, "monthly": 30.44, "quarterly": 91.31, "yearly": 365.25}
+DAYS_PER_MONTH = PERIODS["monthly"]
+
+# Fewest occurrences that count as a series, by period
+MIN_OCCURRENCES = {"weekly": 6, "biweekly": 5, "monthly": 4, "quarterly": 4, "yearly": 3}
+
+# Largest interval standard deviation / mean, by period: invoices settle on a
+# different day each month, but annual renewals fall on much the same date
+MAX_INTERVAL_CV = {"weekly": 0.3, "biweekly": 0.3, "monthly": 0.5, "quarterly": 0.2, "yearly": 0.05}
+
+AMOUNT_GAP = 0.25  # log-amount jump between sorted payments that starts a new series (~28%)
+PERIOD_TOLERANCE = 0.15  # mean interval within 15% of the period
+MIN_ON_SCHEDULE = 0.8  # share of intervals that step exactly one calendar period
+RECENT_OCCURRENCES = 3  # the expected amount averages the latest occurrences
+ACTIVE_PERIODS = 1.5  # periods without a payment before a series counts as lapsed
+
+NS_PER_DAY = 86_400 * 10**9
+AMOUNT_SCALE = 10**9  # log-amount resolution of the sort key; 40 bits cover any realistic range
+
+_PERIOD_NAMES = list(PERIODS)
+_PERIOD_DAYS = np.array(list(PERIODS.values()))
+_MIN_OCCURRENCES = np.array([MIN_OCCURRENCES[name] for name in PERIODS])
+_MAX_INTERVAL_CV = np.array([MAX_INTERVAL_CV[name] for name in PERIODS])
+
+
+def calendar_periods(days: np.ndarray) -> np.ndarray:
+    """Calendar period number of each day (days since the epoch), one row per entry in PERIODS"""
+    weeks = (days + 3) // 7  # the epoch was a Thursday; weeks start on Monday
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    return np.stack([weeks, weeks // 2, months, months // 3, months // 12])
+
+
+def detect_series(snapshot: TransactionSnapshot, mask: Optional[np.ndarray] = None) -> Dict[str, List[Dict]]:
+    """Recurring series by payee, from all rows or only those selected by mask"""
+    selected = (snapshot.dates != NAT) & (snapshot.amounts != 0)
+    if mask is not None:
+        selected &= mask
+    rows = np.flatnonzero(selected)
+    if len(rows) == 0:
+        return {}
+
+    payee_codes, payee_names = pd.factorize(snapshot.payees[rows])
+    days = snapshot.dates[rows] // NS_PER_DAY
+    amounts = snapshot.amounts[rows]
+    income = amounts > 0
+    log_amounts = np.log(np.abs(amounts))
+
+    # Series: each payee's income and expenses sorted by size, split at large jumps.
+    # Sorting one packed int64 key is several times faster than np.lexsort.
+    scaled = np.round((log_amounts - log_amounts.min()) * AMOUNT_SCALE).astype(np.int64)
+    order = np.argsort((payee_codes << 41) | (income.astype(np.int64) << 40) | scaled)
+    starts = np.ones(len(order), dtype=bool)
+    starts[1:] = ((np.diff(payee_codes[order]) != 0) | (np.diff(income[order]) != 0)
+                  | (np.diff(log_amounts[order]) > AMOUNT_GAP))
+    series = np.empty(len(order), dtype=np.int64)
+    series[order] = np.cumsum(starts) - 1
+    series_count = int(series.max()) + 1
+    series_payee = np.empty(series_count, dtype=np.int64)
+    series_payee[series] = payee_codes
+
+    # Occurrences: one per series and day, grouped by series in date order
+    order = np.argsort((series << 32) | (days - days.min()))
+    sorted_series, sorted_days = series[order], days[order]
+    starts = np.ones(len(order), dtype=bool)
+    starts[1:] = (np.diff(sorted_series) != 0) | (np.diff(sorted_days) != 0)
+    first_rows = np.flatnonzero(starts)
+    last_rows = np.r_[first_rows[1:] - 1, len(order) - 1]
+    occurrence_series = sorted_series[first_rows]
+    occurrence_days = sorted_days[first_rows]
+    occurrence_amounts = np.add.reduceat(amounts[order], first_rows)
+    occurrence_rows = rows[order[last_rows]]
+
+    counts = np.bincount(occurrence_series, minlength=series_count)
+    first = np.r_[0, np.cumsum(counts)[:-1]]
+    last = first + counts - 1
+
+    # Nearest period to the mean interval; the intervals of one series sum to last - first day
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = (occurrence_days[last] - occurrence_days[first]) / (counts - 1)
+        error = np.abs(mean[:, None] / _PERIOD_DAYS[None, :] - 1)
+    nearest = error.argmin(axis=1)
+
+    # Share of intervals that move exactly one calendar period of the series' kind, and their spread
+    periods = calendar_periods(occurrence_days)[nearest[occurrence_series], np.arange(len(occurrence_days))]
+    within = occurrence_series[1:] == occurrence_series[:-1]
+    steps = np.bincount(occurrence_series[1:], weights=within & (np.diff(periods) == 1), minlength=series_count)
+    intervals = np.diff(occurrence_days).astype(np.float64)
+    squares = np.bincount(occurrence_series[1:], weights=within * intervals ** 2, minlength=series_count)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        on_schedule = steps / (counts - 1)
+        cv = np.sqrt(np.maximum(squares / (counts - 1) - mean ** 2, 0)) / mean
+
+    recurring = np.flatnonzero(
+        (counts >= _MIN_OCCURRENCES[nearest]) & (mean > 0)
+        & (error[np.arange(series_count), nearest] <= PERIOD_TOLERANCE)
+        & (on_schedule >= MIN_ON_SCHEDULE) & (cv <= _MAX_INTERVAL_CV[nearest])
+    )
+
+    # Expected amount: the mean of the latest occurrences
+    recent = np.minimum(counts, RECENT_OCCURRENCES)
+    latest = last[occurrence_series] - np.arange(len(occurrence_days)) < RECENT_OCCURRENCES
+    expected = np.bincount(occurrence_series, weights=occurrence_amounts * latest, minlength=series_count) / recent
+
+    categories = snapshot.category_names(occurrence_rows[last[recurring]])
+    detected: Dict[str, List[Dict]] = {}
+    for index, category in zip(recurring, categories):
+        period = _PERIOD_NAMES[nearest[index]]
+        detected.setdefault(payee_names[series_payee[index]], []).append({
+            "payee": payee_names[series_payee[index]],
+            "type": "income" if expected[index] > 0 else "expense",
+            "category": category,
+            "period": period,
+            "interval_days": float(mean[index]),
+            "regularity": float(on_schedule[index]),
+            "occurrences": int(counts[index]),
+            "first_day": int(occurrence_days[first[index]]),
+            "last_day": int(occurrence_days[last[index]]),
+            "amount": float(abs(expected[index])),
+            "monthly_amount": float(abs(expected[index]) * DAYS_PER_MONTH / PERIODS[period]),
+        })
+    return detected
+
+
+def extend_series(previous: Dict[str, List[Dict]], snapshot: TransactionSnapshot, covered: int) -> Dict[str, List[Dict]]:
+    """Bring series detected over the first `covered` rows up to date with the rows after them"""
+    if covered == snapshot.size:
+        return previous
+    touched = set(pd.unique(snapshot.payees[covered:]))
+    detected = {payee: series for payee, series in previous.items() if payee not in touched}
+    detected.update(detect_series(snapshot, pd.Series(snapshot.payees).isin(touched).to_numpy()))
+    return detected
+
+
+def snapshot_series(snapshot: TransactionSnapshot) -> Dict[str, List[Dict]]:
+    return snapshot.derived("recurring", detect_series, extend_series)
+
+
+def _day(day: int) -> str:
+    return str(np.datetime64(day, "D"))
+
+
+def recurring_payments(db: Session, user_id: int, data_version: int = None) -> Dict:
+    """Recurring series with the committed monthly spend and income of the active ones
+
+    A series is active while its last payment is no more than ACTIVE_PERIODS
+    periods before the tenant's latest transaction, so statements imported
+    some time ago are judged against their own end date.
+    """
+    if data_version is None:
+        data_version = db.execute(select(User.data_version).where(User.id == user_id)).scalar_one()
+    cached = result_cache.get("recurring", user_id, data_version)
+    if cached is not None:
+        return cached
+
+    snapshot = get_snapshot(db, user_id, data_version)
+    valid = snapshot.dates[snapshot.dates != NAT]
+    as_of = int(valid.max() // NS_PER_DAY) if len(valid) else None
+
+    payments = []
+    committed_spend = recurring_income = 0.0
+    for series in snapshot_series(snapshot).values():
+        for entry in series:
+            active = as_of - entry["last_day"] <= ACTIVE_PERIODS * PERIODS[entry["period"]]
+            if active and entry["type"] == "expense":
+                committed_spend += entry["monthly_amount"]
+            elif active:
+                recurring_income += entry["monthly_amount"]
+            payments.append({
+                "payee": entry["payee"],
+                "type": entry["type"],
+                "category": entry["category"],
+                "period": entry["period"],
+                "interval_days": round(entry["interval_days"], 1),
+                "regularity": round(entry["regularity"], 3),
+                "occurrences": entry["occurrences"],
+                "first_date": _day(entry["first_day"]),
+                "last_date": _day(entry["last_day"]),
+                "next_expected": _day(entry["last_day"] + round(entry["interval_days"])),
+                "amount": round(entry["amount"], 2),
+                "monthly_amount": round(entry["monthly_amount"], 2),
+                "active": bool(active),
+            })
+    payments.sort(key=lambda p: (not p["active"], -p["monthly_amount"]))
+
+    result = {
+        "as_of": _day(as_of) if as_of is not None else None,
+        "committed_monthly_spend": round(committed_spend, 2),
+        "recurring_monthly_income": round(recurring_income, 2),
+        "payments": payments
+    }
+    result_cache.put("recurring", user_id, data_version, result)
+    return result
@@ -0,0 +1,106 @@
+"""
+Fast JSON Responses
+orjson-backed response class and payload helpers for the large read endpoints
+"""
+from typing import Dict, Iterable, List, Sequence, Union
+import hashlib
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi import Request
+from fastapi.responses import Response
+
+Payload = Union[List[Dict], Dict[str, List]]
+
+
+def _default(obj):
+    """Fallback encoder for types orjson does not handle natively"""
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        # Non-contiguous arrays are not handled by OPT_SERIALIZE_NUMPY
+        return np.ascontiguousarray(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson
+
+    Return it directly from an endpoint so FastAPI skips jsonable_encoder.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+
+
+def frame_payload(df: pd.DataFrame, columnar: bool = False) -> Payload:
+    """Records (or parallel column arrays) from a DataFrame, datetimes as ISO strings"""
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime('%Y-%m-%dT%H:%M:%S')
+
+    if columnar:
+        return {col: df[col].tolist() for col in df.columns}
+    return df.to_dict('records')
+
+
+def rows_payload(rows: Iterable[Sequence], columns: Sequence[str], columnar: bool = False) -> Payload:
+    """Records (or parallel column arrays) from plain result rows"""
+    if columnar:
+        rows = list(rows)
+        if not rows:
+            return {col: [] for col in columns}
+        return {col: list(values) for col, values in zip(columns, zip(*rows))}
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def columns_to_records(columns: Dict[str, List]) -> List[Dict]:
+    """Turn parallel column arrays back into records"""
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+# Conditional GET helpers
+def make_etag(scope: str, user_id: int, data_version: int, *params) -> str:
+    """Strong ETag for a user's view of an endpoint at a given data version"""
+    key = ":".join(str(part) for part in (scope, user_id, data_version, *params))
+    return '"' + hashlib.sha1(key.encode('utf-8')).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(
+        tag == etag or tag == f"W/{etag}" for tag in candidates
+    )
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """Headers that let the browser keep the response and revalidate it"""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def result_headers(etag: str, result) -> Dict[str, str]:
+    """cache_headers for a computed result, or none for an error payload
+
+    Errors such as a failed forecast fit can be transient, so they must not
+    be revalidated as 304 until the data version changes.
+    """
+    if isinstance(result, dict) and "error" in result:
+        return {"Cache-Control": "no-store"}
+    return cache_headers(etag)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
@@ -0,0 +1,236 @@
+"""
+Shared Result Cache
+Computed per-user results in a local SQLite file shared by every worker process
+
+Entries are keyed by the database's identity, scope, user id, the user's
+data_version and any parameters, so a data change makes every older entry
+unreachable; those are deleted when the next version is stored. The
+identity hashes the database URL with a random instance id stored in the
+database when it is created. Two databases sharing one cache file (tests,
+benchmarks, a recreated database at the same URL) therefore never see
+each other's results. Each write is a single SQLite transaction, and the
+file runs in WAL mode so workers read while another writes. When the file
+grows past its budget the least recently read entries are evicted; a
+running total of entry sizes makes that check a one-row read. Keys assume
+data_version only ever increases, so delete the file after restoring a
+database from a backup.
+
+Values are pickled: the file is written and read only by this app on
+local disk, and pickle round-trips the inf runway and numpy values that
+JSON would not.
+"""
+from typing import Any, Dict, Optional
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from dotenv import load_dotenv
+from sqlalchemy.exc import IntegrityError
+
+from database import engine
+from models import DatabaseInstance
+from log_config import get_logger
+
+load_dotenv()
+
+logger = get_logger("result_cache")
+
+# Empty path disables the cache; relative paths are resolved against the backend directory
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", os.path.join("cache", "results.db"))
+if RESULT_CACHE_PATH:
+    RESULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), RESULT_CACHE_PATH)
+RESULT_CACHE_MB = float(os.getenv("RESULT_CACHE_MB", "256"))
+
+# A read refreshes an entry's access time only when it is older than this,
+# so hot keys don't turn every read into a write
+TOUCH_INTERVAL = 60.0
+
+# Bumped when the table layout changes; an older file's entries are dropped
+SCHEMA_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    db TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_results_user ON results (db, user_id, scope, version);
+CREATE INDEX IF NOT EXISTS ix_results_accessed ON results (accessed_at);
+
+-- Running total of results.size, kept by triggers so eviction never scans the table
+CREATE TABLE IF NOT EXISTS result_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total_size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO result_meta SELECT 1, COALESCE(SUM(size), 0) FROM results;
+CREATE TRIGGER IF NOT EXISTS results_size_insert AFTER INSERT ON results BEGIN
+    UPDATE result_meta SET total_size = total_size + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS results_size_update AFTER UPDATE OF size ON results BEGIN
+    UPDATE result_meta SET total_size = total_size + new.size - old.size;
+END;
+CREATE TRIGGER IF NOT EXISTS results_size_delete AFTER DELETE ON results BEGIN
+    UPDATE result_meta SET total_size = total_size - old.size;
+END;
+"""
+
+
+def database_identity(bind=engine) -> str:
+    """Hash of the database URL and the instance id generated when the database was created"""
+    with bind.connect() as conn:
+        DatabaseInstance.__table__.create(conn, checkfirst=True)
+        conn.commit()
+        instance_id = conn.execute(DatabaseInstance.__table__.select()).first()
+        if instance_id is None:
+            try:
+                conn.execute(DatabaseInstance.__table__.insert().values(id=1, instance_id=uuid.uuid4().hex))
+                conn.commit()
+            except IntegrityError:
+                # Another worker created it first
+                conn.rollback()
+            instance_id = conn.execute(DatabaseInstance.__table__.select()).first()
+    url = bind.url.render_as_string(hide_password=False)
+    return hashlib.sha256(f"{url}\0{instance_id.instance_id}".encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(db: str, scope: str, user_id: int, version: int, params: str = "") -> str:
+    return f"{db}:{scope}:{user_id}:{version}:{params}"
+
+
+class ResultCache:
+    """Size-bounded key-value store in one SQLite file, one connection per thread and process"""
+
+    def __init__(self, path: str, max_bytes: int, bind=engine):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.bind = bind
+        self._local = threading.local()
+        self._db: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    @property
+    def db(self) -> str:
+        """Identity of the database whose results this process reads and writes"""
+        if self._db is None:
+            self._db = database_identity(self.bind)
+        return self._db
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so they are tied to the process id too
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS results")
+                conn.execute("DROP TABLE IF EXISTS result_meta")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, scope: str, user_id: int, version: int, params: str = "") -> Optional[Any]:
+        """The stored value, or None on a miss (or when the cache is unavailable)"""
+        if not self.enabled:
+            return None
+        try:
+            key = cache_key(self.db, scope, user_id, version, params)
+            conn = self._connection()
+            row = conn.execute("SELECT value, accessed_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] > TOUCH_INTERVAL:
+                conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            return pickle.loads(row[0])
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError) as e:
+            logger.warning("result_cache.read_error", extra={"scope": scope, "user_id": user_id, "error": str(e)})
+            return None
+
+    def put(self, scope: str, user_id: int, version: int, value: Any, params: str = ""):
+        """Store a value, drop the user's older versions in this scope and evict to the budget"""
+        if not self.enabled:
+            return
+        db = self.db
+        key = cache_key(db, scope, user_id, version, params)
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # An upsert rather than INSERT OR REPLACE, whose implicit delete skips the size trigger
+                conn.execute(
+                    "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "value = excluded.value, size = excluded.size, created_at = excluded.created_at, "
+                    "accessed_at = excluded.accessed_at",
+                    (key, db, scope, user_id, version, blob, len(blob), now, now)
+                )
+                conn.execute(
+                    "DELETE FROM results WHERE db = ? AND user_id = ? AND scope = ? AND version < ?",
+                    (db, user_id, scope, version)
+                )
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning("result_cache.write_error", extra={"key": key, "error": str(e)})
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT total_size FROM result_meta").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY accessed_at"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM results WHERE key = ?", victims)
+        logger.debug("result_cache.evicted", extra={"entries": len(victims)})
+
+    def invalidate_user(self, user_id: int):
+        if not self.enabled:
+            return
+        try:
+            self._connection().execute("DELETE FROM results WHERE db = ? AND user_id = ?", (self.db, user_id))
+        except sqlite3.Error as e:
+            logger.warning("result_cache.write_error", extra={"user_id": user_id, "error": str(e)})
+
+    def clear(self):
+        if self.enabled:
+            self._connection().execute("DELETE FROM results")
+
+    def stats(self) -> Dict:
+        if not self.enabled:
+            return {"enabled": False}
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), (SELECT total_size FROM result_meta) FROM results"
+        ).fetchone()
+        return {"enabled": True, "path": self.path, "db": self.db, "entries": entries, "bytes": size,
+                "max_bytes": self.max_bytes}
+
+
+result_cache = ResultCache(RESULT_CACHE_PATH, int(RESULT_CACHE_MB * 1024 * 1024))
@@ -0,0 +1,248 @@
+"""
+Transaction Search
+Full-text search over transaction description, vendor and notes
+
+SQLite keeps an FTS5 index (external content over `transactions`) in sync
+with triggers. PostgreSQL uses a stored generated tsvector column with a
+GIN index, which the database maintains itself. Other backends fall back
+to LIKE filters without ranking.
+
+Usage:
+    python -m search --rebuild [--optimize]
+"""
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+import argparse
+import base64
+import hashlib
+import re
+import time
+import orjson
+from sqlalchemy import and_, column, func, literal, literal_column, or_, select, table, text, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models import Transaction
+from log_config import get_logger
+
+logger = get_logger("search")
+
+FTS_TABLE = "transactions_fts"
+
+# Column weights for ranking: a vendor hit counts more than a notes hit
+FTS_WEIGHTS = {"description": 1.0, "vendor": 1.5, "notes": 0.5}
+
+MAX_QUERY_TERMS = 16
+
+SEARCH_COLUMNS = ["id", "transaction_id", "date", "description", "amount", "category", "vendor", "notes"]
+
+SQLITE_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        description, vendor, notes,
+        content='transactions', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, description, vendor, notes)
+        VALUES (new.id, new.description, new.vendor, new.notes);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, vendor, notes)
+        VALUES ('delete', old.id, old.description, old.vendor, old.notes);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF description, vendor, notes ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, vendor, notes)
+        VALUES ('delete', old.id, old.description, old.vendor, old.notes);
+        INSERT INTO {FTS_TABLE}(rowid, description, vendor, notes)
+        VALUES (new.id, new.description, new.vendor, new.notes);
+    END""",
+]
+
+POSTGRES_SCHEMA = [
+    """ALTER TABLE transactions ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(vendor, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(notes, '')), 'C')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_search_vector ON transactions USING GIN (search_vector)",
+]
+
+
+def install_search(engine: Engine):
+    """Create the search index and its triggers, indexing existing rows the first time"""
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+            ).first()
+            for statement in SQLITE_SCHEMA:
+                conn.execute(text(statement))
+        if not exists:
+            rebuild_index(engine)
+    elif dialect == "postgresql":
+        # The generated column is filled for existing rows when it is added
+        with engine.begin() as conn:
+            for statement in POSTGRES_SCHEMA:
+                conn.execute(text(statement))
+
+
+def rebuild_index(engine: Engine) -> float:
+    """Re-index every transaction from the content table; returns seconds taken"""
+    started = time.perf_counter()
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    elif engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text("REINDEX INDEX ix_transactions_search_vector"))
+    elapsed = time.perf_counter() - started
+    logger.info("search.rebuilt", extra={"seconds": round(elapsed, 3)})
+    return elapsed
+
+
+def optimize_index(engine: Engine):
+    """Merge the FTS5 index segments (SQLite only)"""
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+
+
+def query_terms(q: str) -> List[str]:
+    """Word tokens of a user query; punctuation and operators are dropped"""
+    return re.findall(r"\w+", q.lower())[:MAX_QUERY_TERMS]
+
+
+def search_digest(sort: str, terms: List[str], *filters) -> str:
+    """Short hash of a search's terms, sort and filters; a cursor only pages the search it came from"""
+    return hashlib.sha256(orjson.dumps([sort, terms, *filters])).hexdigest()[:16]
+
+
+def encode_cursor(sort: str, digest: str, key, row_id: int) -> str:
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    return base64.urlsafe_b64encode(orjson.dumps([sort, digest, key, row_id])).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort: str, digest: str) -> Tuple:
+    """The (sort key, id) a cursor resumes after
+
+    Raises ValueError for a malformed cursor, or one from a different sort
+    order or search.
+    """
+    try:
+        cursor_sort, cursor_digest, key, row_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if cursor_sort == sort and cursor_digest == digest:
+            key = datetime.fromisoformat(key) if sort == "date" else float(key)
+            return key, int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if cursor_sort != sort:
+        raise ValueError(f"Cursor is for sort={cursor_sort}, not sort={sort}")
+    raise ValueError("Cursor is for a different search; start again without it")
+
+
+def _match_clause(dialect: str, terms: List[str]):
+    """WHERE clause and score column (lower is better) for every term as a prefix, all required"""
+    if dialect == "sqlite":
+        fts = table(FTS_TABLE, column("rowid"))
+        match = " ".join(f'"{term}"*' for term in terms)
+        weights = ", ".join(str(weight) for weight in FTS_WEIGHTS.values())
+        score = literal_column(f"bm25({FTS_TABLE}, {weights})")
+        source = fts.join(Transaction.__table__, Transaction.id == fts.c.rowid)
+        return source, text(f"{FTS_TABLE} MATCH :match").bindparams(match=match), score
+
+    if dialect == "postgresql":
+        vector = literal_column("transactions.search_vector")
+        tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        return Transaction.__table__, vector.op("@@")(tsquery), -func.ts_rank(vector, tsquery)
+
+    clauses = [
+        or_(*(getattr(Transaction, col).ilike(f"%{term}%") for col in FTS_WEIGHTS))
+        for term in terms
+    ]
+    return Transaction.__table__, and_(*clauses), literal(0.0)
+
+
+def search_transactions(
+    db: Session,
+    user_id: int,
+    q: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    sort: str = "relevance",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    category: Optional[str] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """A page of matching transactions and the cursor for the next page (None at the end)
+
+    Relevance pages are ordered by score then id, date pages newest first;
+    the cursor is the sort key of the last row returned, tagged with the
+    sort and a digest of the search. Raises ValueError for a cursor that
+    does not belong to this search.
+    """
+    terms = query_terms(q)
+    digest = search_digest(sort, terms, start_date, end_date, min_amount, max_amount, category)
+    after = decode_cursor(cursor, sort, digest) if cursor else None
+    if not terms:
+        return [], None
+
+    source, match, score = _match_clause(db.get_bind().dialect.name, terms)
+    filters = [match, Transaction.user_id == user_id]
+    if start_date:
+        filters.append(Transaction.date >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        filters.append(Transaction.date < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+    if min_amount is not None:
+        filters.append(Transaction.amount >= min_amount)
+    if max_amount is not None:
+        filters.append(Transaction.amount <= max_amount)
+    if category:
+        filters.append(Transaction.category == category)
+
+    matches = select(
+        *(getattr(Transaction, col) for col in SEARCH_COLUMNS), score.label("score")
+    ).select_from(source).where(*filters).subquery()
+
+    if sort == "date":
+        order = (matches.c.date.desc(), matches.c.id.desc())
+        key_column = matches.c.date
+    else:
+        order = (matches.c.score, matches.c.id)
+        key_column = matches.c.score
+
+    stmt = select(matches)
+    if after:
+        if sort == "date":
+            stmt = stmt.where(tuple_(matches.c.date, matches.c.id) < tuple_(*after))
+        else:
+            stmt = stmt.where(tuple_(matches.c.score, matches.c.id) > tuple_(*after))
+    rows = db.execute(stmt.order_by(*order).limit(limit + 1)).mappings().all()
+
+    results = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = results[-1]
+        next_cursor = encode_cursor(sort, digest, last[key_column.name], last["id"])
+    return results, next_cursor
+
+
+if __name__ == "__main__":
+    from database import engine, Base
+
+    parser = argparse.ArgumentParser(description="Build the transaction search index")
+    parser.add_argument("--rebuild", action="store_true", help="Re-index every existing transaction")
+    parser.add_argument("--optimize", action="store_true", help="Merge index segments afterwards (SQLite)")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    install_search(engine)
+    if args.rebuild:
+        print(f"✓ Rebuilt search index in {rebuild_index(engine):.1f}s")
+    if args.optimize:
+        optimize_index(engine)
+        print("✓ Optimized search index")
@@ -0,0 +1,234 @@
+"""
+Scenario Simulation
+Vectorized what-if grids over a shared financial baseline
+"""
+from typing import Dict, List, Optional, Union
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+MAX_SCENARIOS = 50_000
+MAX_MONTHS = 120
+
+
+class SimulationRange(BaseModel):
+    start: float
+    stop: float  # inclusive
+    step: float = 1
+
+
+Axis = Union[List[float], SimulationRange]
+
+
+class SimulationGridRequest(BaseModel):
+    new_hires: Axis = [0]
+    avg_salary: Axis = [0]
+    start_month: Axis = [0]  # months from now before the hires start costing
+    revenue_growth: Axis = [0.0]  # monthly growth rate, e.g. 0.05 for 5%
+    months: int = 36
+    include_trajectories: bool = True
+
+
+def axis_values(axis: Axis) -> np.ndarray:
+    """Expand a list or inclusive range into a 1-D array"""
+    if isinstance(axis, SimulationRange):
+        if axis.step <= 0:
+            raise ValueError("Range step must be positive")
+        count = int(np.floor((axis.stop - axis.start) / axis.step + 1e-9)) + 1
+        return axis.start + axis.step * np.arange(max(count, 0))
+    return np.asarray(axis, dtype=float)
+
+
+def cash_runway(cash: np.ndarray, cash_on_hand: float) -> np.ndarray:
+    """Fractional months until each trajectory first goes negative (NaN if never)"""
+    below = cash < 0
+    ran_out = below.any(axis=-1)
+    first = below.argmax(axis=-1)
+
+    rows = np.arange(cash.shape[0])
+    previous = np.where(first > 0, cash[rows, np.maximum(first - 1, 0)], cash_on_hand)
+    outflow = previous - cash[rows, first]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        runway = first + np.where(outflow > 0, previous / outflow, 0.0)
+
+    return np.where(ran_out, np.round(runway, 1), np.nan)
+
+
+def simulate_grid(
+    cash_on_hand: float,
+    monthly_burn: float,
+    monthly_revenue: float,
+    new_hires: np.ndarray,
+    avg_salary: np.ndarray,
+    start_month: np.ndarray,
+    revenue_growth: np.ndarray,
+    months: int = 36
+) -> Dict[str, np.ndarray]:
+    """Cash trajectories for every combination of the four scenario axes
+
+    The axes are broadcast against each other as (hires, salary, start,
+    growth, month) and flattened into one row per scenario.
+    """
+    month = np.arange(1, months + 1)
+
+    hire_cost = (new_hires[:, None] * avg_salary[None, :])[:, :, None, None, None]
+    active = (month[None, :] > start_month[:, None])[None, None, :, None, :]
+    revenue = (monthly_revenue * (1 + revenue_growth[:, None]) ** month[None, :])[None, None, None, :, :]
+
+    flow = revenue - monthly_burn - hire_cost * active
+    cash = cash_on_hand + np.cumsum(flow, axis=-1)
+    cash = cash.reshape(-1, months)
+
+    hires, salary, start, growth = [
+        axis.ravel() for axis in np.meshgrid(new_hires, avg_salary, start_month, revenue_growth, indexing='ij')
+    ]
+
+    return {
+        "new_hires": hires,
+        "avg_salary": salary,
+        "start_month": start,
+        "revenue_growth": growth,
+        "monthly_cost": hires * salary,
+        "runway_months": cash_runway(cash, cash_on_hand),
+        "cash": np.round(cash, 2),
+    }
+
+
+def run_simulation_grid(financials: Dict, request: SimulationGridRequest) -> Dict:
+    """Validate the request, run the grid over the user's baseline and build the payload"""
+    axes = [axis_values(getattr(request, name))
+            for name in ("new_hires", "avg_salary", "start_month", "revenue_growth")]
+    if any(len(axis) == 0 for axis in axes):
+        raise ValueError("Every scenario axis needs at least one value")
+
+    scenario_count = int(np.prod([len(axis) for axis in axes]))
+    if scenario_count > MAX_SCENARIOS:
+        raise ValueError(f"Grid has {scenario_count} scenarios; the limit is {MAX_SCENARIOS}")
+    if not 1 <= request.months <= MAX_MONTHS:
+        raise ValueError(f"months must be between 1 and {MAX_MONTHS}")
+
+    cash_on_hand = financials["cash_on_hand"]
+    monthly_burn = financials["avg_monthly_burn"]
+    monthly_revenue = financials.get("avg_monthly_revenue", 0)
+    result = simulate_grid(cash_on_hand, monthly_burn, monthly_revenue, *axes, months=request.months)
+    if not request.include_trajectories:
+        result.pop("cash")
+
+    # The baseline runs through the same model (net of revenue) as a cell with no
+    # hires and no growth, so the two always agree; NaN (null) means beyond the horizon
+    no_change = [np.zeros(1)] * 4
+    current_runway = simulate_grid(cash_on_hand, monthly_burn, monthly_revenue, *no_change,
+                                   months=request.months)["runway_months"][0]
+
+    return {
+        "baseline": {
+            "cash_on_hand": cash_on_hand,
+            "avg_monthly_burn": monthly_burn,
+            "avg_monthly_revenue": monthly_revenue,
+            "net_monthly_burn": monthly_burn - monthly_revenue,
+            "current_runway": float(current_runway),
+            "gross_runway": financials["runway_months"],
+        },
+        "months": request.months,
+        "scenario_count": scenario_count,
+        "scenarios": result,
+    }
+
+
+# --- Monte Carlo runway ---
+MAX_PATHS = 200_000
+CASH_BAND_SAMPLE = 5_000
+
+
+def simulate_runway_paths(
+    cash_on_hand: float,
+    monthly_expenses: np.ndarray,
+    monthly_revenue: np.ndarray,
+    paths: int = 50_000,
+    months: int = 36,
+    method: str = "bootstrap",
+    seed: Optional[int] = None
+) -> Dict:
+    """Simulate cash paths from the historical monthly distribution
+
+    bootstrap resamples whole historical months, so each draw keeps that
+    month's expenses and revenue together; normal fits a normal
+    distribution to the monthly net cash flow.
+    """
+    rng = np.random.default_rng(seed)
+    shape = (paths, months)
+    net_history = monthly_revenue - monthly_expenses
+
+    if method == "bootstrap":
+        net = net_history[rng.integers(0, len(net_history), size=shape)]
+    elif method == "normal":
+        net = rng.normal(net_history.mean(), net_history.std(), size=shape)
+    else:
+        raise ValueError(f"Unknown method: {method}")
+
+    cash = np.cumsum(net, axis=1)
+    cash += cash_on_hand
+    runway = cash_runway(cash, cash_on_hand)
+
+    # Paths that never run out are censored at the horizon. Their runway is only
+    # known to exceed it, so rank them last and take order statistics rather than
+    # interpolating between them (inf - inf); a censored percentile is beyond the horizon.
+    censored = np.isnan(runway)
+    percentiles = np.percentile(np.where(censored, np.inf, runway), [10, 50, 90], method="inverted_cdf")
+    labels = ("p10", "p50", "p90")
+
+    # Survival: share of paths still solvent at the end of each month
+    below = cash < 0
+    first_negative = np.where(below.any(axis=1), below.argmax(axis=1), months)
+    ran_out_by = np.cumsum(np.bincount(first_negative, minlength=months + 1)[:months])
+    survival = 1 - ran_out_by / paths
+
+    # Paths are i.i.d., so cash bands from a leading subsample are representative
+    bands = np.percentile(cash[:CASH_BAND_SAMPLE], [10, 50, 90], axis=0)
+
+    return {
+        "paths": paths,
+        "months": months,
+        "method": method,
+        "seed": seed,
+        "runway_percentiles": {
+            label: (round(float(value), 1) if np.isfinite(value) else None)
+            for label, value in zip(labels, percentiles)
+        },
+        "runway_beyond_horizon": [label for label, value in zip(labels, percentiles) if not np.isfinite(value)],
+        "probability_cash_out": float(1 - censored.mean()),
+        "survival_curve": np.round(survival, 4),
+        "cash_percentiles": {
+            label: np.round(band, 2) for label, band in zip(labels, bands)
+        },
+    }
+
+
+def run_monte_carlo(
+    financials: Dict,
+    monthly: pd.DataFrame,
+    paths: int = 50_000,
+    months: int = 36,
+    method: str = "bootstrap",
+    seed: Optional[int] = None
+) -> Dict:
+    """Validate parameters and run the Monte Carlo engine over a user's monthly history"""
+    if monthly.empty:
+        raise ValueError("Not enough transaction history for a Monte Carlo runway")
+    if not 1 <= paths <= MAX_PATHS:
+        raise ValueError(f"paths must be between 1 and {MAX_PATHS}")
+    if not 1 <= months <= MAX_MONTHS:
+        raise ValueError(f"months must be between 1 and {MAX_MONTHS}")
+
+    result = simulate_runway_paths(
+        financials["cash_on_hand"],
+        monthly['expenses'].to_numpy(dtype=float),
+        monthly['revenue'].to_numpy(dtype=float),
+        paths=paths,
+        months=months,
+        method=method,
+        seed=seed
+    )
+    result["history_months"] = len(monthly)
+    result["point_estimate_runway"] = financials["runway_months"]
+    return result
@@ -0,0 +1,364 @@
+"""
+Transaction Snapshots
+Per-user columnar copies of the transaction table held in memory for the read paths
+
+A snapshot is a set of parallel NumPy arrays (id, date as int64 nanoseconds,
+amount, dictionary-encoded category, interned payee names) stamped with
+the user's data_version. Readers compare that stamp with the stored version
+and rebuild on mismatch, so writes from other workers or scripts are picked
+up without any coordination. Writes in this process patch the snapshot
+instead of dropping it.
+
+Structures derived from a snapshot are memoised on it. A snapshot made by
+appending rows hands its derived values on, so they can be extended with
+the new rows instead of rebuilt.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from collections import OrderedDict
+import os
+import re
+import sys
+import threading
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import User, Transaction
+from log_config import get_logger
+
+logger = get_logger("snapshot")
+
+SNAPSHOT_CACHE_MB = float(os.getenv("SNAPSHOT_CACHE_MB", "256"))
+
+NAT = np.iinfo(np.int64).min
+
+# (id, date, amount, category, vendor, description) - the lean select a snapshot is built from
+SnapshotRow = Tuple[int, object, float, str, Optional[str], str]
+SNAPSHOT_COLUMNS = (Transaction.id, Transaction.date, Transaction.amount, Transaction.category,
+                    Transaction.vendor, Transaction.description)
+
+_DATES = re.compile(r"\d{1,4}[/.-]\d{1,2}(?:[/.-]\d{2,4})?")
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize_payee(name: str) -> str:
+    """Lower-cased words without punctuation, dates or reference numbers (3+ digits)
+
+    Short numbers stay, so "emp_01" and "emp_02" remain different payees.
+    """
+    words = _SEPARATORS.split(_DATES.sub(" ", name.lower()))
+    normalized = " ".join(word for word in words if word and sum(c.isdigit() for c in word) < 3)
+    return normalized or name.strip().lower()
+
+
+class TransactionSnapshot:
+    """Immutable columnar view of one user's transactions; updates return a new snapshot"""
+
+    __slots__ = ("version", "ids", "dates", "amounts", "category_codes", "categories", "payees",
+                 "_prefix_index", "_derived", "_inherited")
+
+    def __init__(self, version: int, ids: np.ndarray, dates: np.ndarray, amounts: np.ndarray,
+                 category_codes: np.ndarray, categories: List[str], payees: np.ndarray,
+                 inherited: Optional[Dict[str, Tuple[int, Any]]] = None):
+        self.version = version
+        self.ids = ids
+        self.dates = dates
+        self.amounts = amounts
+        self.category_codes = category_codes
+        self.categories = categories
+        self.payees = payees  # normalized vendor, or description when there is no vendor
+        self._prefix_index = None
+        self._derived: Dict[str, Any] = {}
+        # name -> (rows covered, value) from the snapshot this one extends
+        self._inherited = inherited or {}
+
+    @classmethod
+    def from_rows(cls, version: int, rows: Sequence[SnapshotRow],
+                  categories: Optional[List[str]] = None) -> "TransactionSnapshot":
+        """Encode result rows, extending an existing category dictionary when given one"""
+        categories = list(categories or [])
+        lookup = {name: code for code, name in enumerate(categories)}
+
+        row_ids, row_dates, row_amounts, row_categories, row_vendors, row_descriptions = zip(*rows) if rows else ((),) * 6
+        ids = np.array(row_ids, dtype=np.int64)
+        dates = pd.DatetimeIndex(row_dates).as_unit("ns").asi8
+        amounts = np.array(row_amounts, dtype=np.float64)
+
+        # Factorize each string column, then map the distinct values onto the dictionary
+        codes, uniques = pd.factorize(np.array(row_categories, dtype=object))
+        for category in uniques:
+            if category not in lookup:
+                lookup[category] = len(categories)
+                categories.append(sys.intern(category))
+        mapping = np.array([lookup[category] for category in uniques], dtype=np.int32)
+        category_codes = mapping[codes] if len(codes) else np.empty(0, dtype=np.int32)
+
+        # Payee: the vendor when there is one, otherwise the description
+        codes, uniques = pd.factorize(np.array(row_vendors, dtype=object))
+        names = np.array([sys.intern(normalize_payee(vendor)) if vendor else "" for vendor in uniques] + [""],
+                         dtype=object)
+        payees = names[codes]  # -1 (no vendor) picks the trailing empty name
+        missing = np.flatnonzero(payees == "")
+        if len(missing):
+            codes, uniques = pd.factorize(np.array(row_descriptions, dtype=object)[missing])
+            names = np.array([sys.intern(normalize_payee(description)) for description in uniques] + [""],
+                             dtype=object)
+            payees[missing] = names[codes]
+        return cls(version, ids, dates, amounts, category_codes, categories, payees)
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    @property
+    def array_nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.ids, self.dates, self.amounts, self.category_codes, self.payees))
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held: the arrays plus each distinct string once"""
+        arrays = self.array_nbytes
+        strings = {id(s): sys.getsizeof(s) for s in self.categories}
+        strings.update((id(s), sys.getsizeof(s)) for s in self.payees)
+        return arrays + sum(strings.values())
+
+    def _handed_on(self) -> Dict[str, Tuple[int, Any]]:
+        """Derived values for a successor whose first rows are exactly these rows"""
+        handed = dict(self._inherited)
+        handed.update((name, (self.size, value)) for name, value in self._derived.items())
+        return handed
+
+    def with_version(self, version: int) -> "TransactionSnapshot":
+        return TransactionSnapshot(version, self.ids, self.dates, self.amounts,
+                                   self.category_codes, self.categories, self.payees, self._handed_on())
+
+    def append(self, version: int, rows: Sequence[SnapshotRow]) -> "TransactionSnapshot":
+        added = TransactionSnapshot.from_rows(version, rows, self.categories)
+        return TransactionSnapshot(
+            version,
+            np.concatenate([self.ids, added.ids]),
+            np.concatenate([self.dates, added.dates]),
+            np.concatenate([self.amounts, added.amounts]),
+            np.concatenate([self.category_codes, added.category_codes]),
+            added.categories,
+            np.concatenate([self.payees, added.payees]),
+            self._handed_on(),
+        )
+
+    def remove(self, version: int, ids: Iterable[int]) -> "TransactionSnapshot":
+        keep = ~np.isin(self.ids, np.fromiter(ids, dtype=np.int64))
+        return TransactionSnapshot(
+            version, self.ids[keep], self.dates[keep], self.amounts[keep],
+            self.category_codes[keep], self.categories, self.payees[keep],
+        )
+
+    # --- Read helpers ---
+    def datetimes(self, mask: Optional[np.ndarray] = None) -> pd.DatetimeIndex:
+        dates = self.dates if mask is None else self.dates[mask]
+        return pd.DatetimeIndex(dates.view("datetime64[ns]"))
+
+    def category_names(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        codes = self.category_codes if mask is None else self.category_codes[mask]
+        return np.asarray(self.categories, dtype=object)[codes]
+
+    def month_index(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Distinct months (datetime64[M]), each row's month position, and the valid-date mask"""
+        valid = self.dates != NAT
+        months = self.dates[valid].view("datetime64[ns]").astype("datetime64[M]")
+        uniques, inverse = np.unique(months, return_inverse=True)
+        return uniques, inverse, valid
+
+    def prefix_index(self) -> "PrefixIndex":
+        """Date-ordered cumulative sums, built on first use for this version"""
+        if self._prefix_index is None:
+            self._prefix_index = PrefixIndex(self.dates, self.amounts)
+        return self._prefix_index
+
+    def derived(self, name: str, build: Callable[["TransactionSnapshot"], Any],
+                extend: Optional[Callable[[Any, "TransactionSnapshot", int], Any]] = None) -> Any:
+        """Memoised build(snapshot)
+
+        When this snapshot was made by appending to one that had the value,
+        extend(value, snapshot, rows_covered) brings it up to date instead.
+        """
+        if name in self._derived:
+            return self._derived[name]
+        inherited = self._inherited.get(name)
+        if inherited is not None and extend is not None:
+            covered, value = inherited
+            value = extend(value, self, covered)
+        else:
+            value = build(self)
+        self._derived[name] = value
+        return value
+
+    def category_totals(self, absolute: bool = True) -> Dict[str, float]:
+        amounts = np.abs(self.amounts) if absolute else self.amounts
+        totals = np.bincount(self.category_codes, weights=amounts, minlength=len(self.categories))
+        present = np.bincount(self.category_codes, minlength=len(self.categories)) > 0
+        return {self.categories[code]: float(totals[code]) for code in np.flatnonzero(present)}
+
+
+class PrefixIndex:
+    """Cumulative expense and revenue sums over transactions in date order
+
+    The total for any date range is two binary searches and a subtraction.
+    """
+
+    __slots__ = ("dates", "cum_expenses", "cum_revenue")
+
+    def __init__(self, dates: np.ndarray, amounts: np.ndarray):
+        valid = dates != NAT
+        order = np.argsort(dates[valid], kind="stable")
+        self.dates = dates[valid][order]
+        amounts = amounts[valid][order]
+        self.cum_expenses = np.concatenate(([0.0], np.cumsum(-np.minimum(amounts, 0))))
+        self.cum_revenue = np.concatenate(([0.0], np.cumsum(np.maximum(amounts, 0))))
+
+    @property
+    def size(self) -> int:
+        return len(self.dates)
+
+    def totals(self, start: Optional[np.datetime64] = None, end: Optional[np.datetime64] = None) -> Tuple[float, float, int]:
+        """Expenses (positive), revenue and transaction count for start <= date < end"""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, _ns(start), side="left"))
+        hi = self.size if end is None else int(np.searchsorted(self.dates, _ns(end), side="left"))
+        hi = max(hi, lo)
+        return (
+            float(self.cum_expenses[hi] - self.cum_expenses[lo]),
+            float(self.cum_revenue[hi] - self.cum_revenue[lo]),
+            hi - lo,
+        )
+
+    def month_span(self) -> Tuple[np.datetime64, np.datetime64]:
+        """First and last months with transactions (datetime64[M]); requires size > 0"""
+        return (self.dates[0].astype("datetime64[ns]").astype("datetime64[M]"),
+                self.dates[-1].astype("datetime64[ns]").astype("datetime64[M]"))
+
+
+def _ns(value) -> np.int64:
+    return np.datetime64(value, "ns").astype(np.int64)
+
+
+def build_snapshot(db: Session, user_id: int, version: int) -> TransactionSnapshot:
+    # Core execution skips the ORM's per-row result processing
+    rows = db.connection().execute(
+        select(*SNAPSHOT_COLUMNS).where(Transaction.user_id == user_id)
+    ).all()
+    return TransactionSnapshot.from_rows(version, rows)
+
+
+class SnapshotCache:
+    """LRU of snapshots by user id, evicting whole tenants beyond a memory budget"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, Tuple[TransactionSnapshot, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int, version: int) -> Optional[TransactionSnapshot]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0].version != version:
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[0]
+
+    def put(self, user_id: int, snapshot: TransactionSnapshot, nbytes: Optional[int] = None):
+        size = snapshot.nbytes if nbytes is None else nbytes
+        with self._lock:
+            self._discard(user_id)
+            if size > self.max_bytes:
+                return
+            self._entries[user_id] = (snapshot, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                evicted, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                logger.debug("snapshot.evicted", extra={"user_id": evicted})
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._discard(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def apply(self, user_id: int, from_version: int, added: Sequence[SnapshotRow] = (),
+              deleted: Iterable[int] = ()):
+        """Patch a cached snapshot after a committed write that bumped data_version once
+
+        from_version is the version the writer read before bumping. A snapshot
+        at any other version has missed a write and is dropped instead.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is None:
+            return
+        snapshot, size = entry
+        if snapshot.version != from_version:
+            self.invalidate(user_id)
+            return
+
+        version = from_version + 1
+        patched = snapshot
+        deleted = list(deleted)
+        if deleted:
+            patched = patched.remove(version, deleted)
+        if added:
+            patched = patched.append(version, added)
+        if patched is snapshot:
+            patched = snapshot.with_version(version)
+        # Adjust the recorded size by the change in array memory rather than
+        # re-walking every payee string on each write
+        self.put(user_id, patched, size + patched.array_nbytes - snapshot.array_nbytes)
+
+    def _discard(self, user_id: int):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+
+snapshot_cache = SnapshotCache(int(SNAPSHOT_CACHE_MB * 1024 * 1024))
+
+
+def current_version(db: Session, user_id: int) -> int:
+    return db.execute(select(User.data_version).where(User.id == user_id)).scalar_one()
+
+
+def get_snapshot(db: Session, user_id: int, version: Optional[int] = None) -> TransactionSnapshot:
+    """The user's snapshot at their current data_version, built on a miss
+
+    The version (often read at authentication) and the rows come from
+    different statements, so a write can commit in between. Writes bump
+    data_version in the same transaction, so if it is unchanged after the
+    rows were read they belong to that version. Otherwise the rows may
+    already hold the write, and caching them under the old version would
+    let the writer's patch apply it twice. The build then only serves this
+    request.
+    """
+    if version is None:
+        version = current_version(db, user_id)
+    snapshot = snapshot_cache.get(user_id, version)
+    if snapshot is None:
+        snapshot = build_snapshot(db, user_id, version)
+        if current_version(db, user_id) == version:
+            snapshot_cache.put(user_id, snapshot)
+        else:
+            logger.debug("snapshot.raced_write", extra={"user_id": user_id, "version": version})
+    return snapshot
+
+
+def snapshot_row(txn: Transaction) -> SnapshotRow:
+    return (txn.id, txn.date, txn.amount, txn.category, txn.vendor, txn.description)
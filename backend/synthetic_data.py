@@ -0,0 +1,276 @@
+"""
+Synthetic Tenant Generator
+Seeded, production-scale transaction histories and bank statement CSVs for benchmarks
+
+Usage:
+    python -m synthetic_data --size 100k --csv statement.csv [--format uk_bank] [--seed 7]
+    python -m synthetic_data --size 1k --tenants 5 --load
+"""
+from typing import Dict, Optional
+from datetime import datetime
+import argparse
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models import User, Transaction
+
+# Named tenant sizes (transactions)
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# description, vendor, category, monthly amount, day of month
+RECURRING_VENDORS = [
+    ("AWS Monthly Bill", "Amazon Web Services", "Cloud Services", 45000, 5),
+    ("Google Cloud Platform", "Google Cloud", "Cloud Services", 28000, 10),
+    ("DigitalOcean Hosting", "DigitalOcean", "Cloud Services", 12000, 15),
+    ("GitHub Enterprise", "GitHub", "Software", 15000, 7),
+    ("Slack Business Plan", "Slack", "Software", 8000, 8),
+    ("Figma Professional", "Figma", "Software", 6000, 12),
+    ("Notion Team Plan", "Notion", "Software", 4000, 14),
+    ("Office Rent", "WeWork", "Office", 85000, 1),
+    ("Internet & Utilities", "Airtel", "Office", 8000, 2),
+    ("Google Ads Campaign", "Google Ads", "Marketing", 75000, 6),
+    ("LinkedIn Ads", "LinkedIn", "Marketing", 35000, 9),
+    ("Legal Retainer", "Khaitan & Co", "Professional Services", 40000, 20),
+    ("Accounting Services", "Deloitte", "Professional Services", 30000, 25),
+    ("Health Insurance Premium", "ICICI Lombard", "HR", 60000, 3),
+]
+
+# category, weight, lognormal mean, lognormal sigma, (description, vendor) choices
+VARIABLE_SPEND = [
+    ("Operations", 0.30, 7.5, 1.0, [("Uber ride", "Uber"), ("Courier charges", "Blue Dart"), ("Team lunch", "Swiggy")]),
+    ("Office", 0.20, 7.8, 0.9, [("Office supplies", "Amazon Business"), ("Pantry restock", "BigBasket"), ("Printer toner", "HP")]),
+    ("Software", 0.15, 8.5, 0.8, [("Zoom add-on licences", "Zoom"), ("Jira seats", "Atlassian"), ("Datadog usage", "Datadog")]),
+    ("Marketing", 0.15, 9.5, 1.1, [("Conference sponsorship", "NASSCOM"), ("Facebook Ads", "Meta"), ("Swag order", "Printrove")]),
+    ("Contractors", 0.10, 10.5, 0.7, [("Freelance design work", "Upwork"), ("Contract developer", "Toptal")]),
+    ("Professional Services", 0.10, 10.0, 0.8, [("Recruitment fee", "Naukri"), ("Consulting engagement", "KPMG")]),
+]
+
+CLIENTS = ["Acme Corp", "Globex", "Initech", "Umbrella", "Stark Industries", "Wayne Enterprises",
+           "Hooli", "Soylent", "Cyberdyne", "Tyrell", "Wonka", "Gringotts"]
+
+# Seasonality multipliers by calendar month (Jan..Dec)
+SPEND_SEASONALITY = np.array([0.9, 0.9, 1.1, 1.0, 0.95, 0.9, 0.85, 0.9, 1.0, 1.1, 1.2, 1.3])
+REVENUE_SEASONALITY = np.array([0.9, 0.95, 1.15, 1.0, 1.0, 0.9, 0.85, 0.9, 1.05, 1.1, 1.15, 1.2])
+
+ANOMALY_RATE = 0.001
+DUPLICATE_RATE = 0.0005
+
+# Statement layouts recognised by the upload column mapping
+BANK_FORMATS: Dict[str, Dict] = {
+    "finsight": {
+        "columns": {"date": "Date", "transaction_id": "Transaction ID", "description": "Description",
+                    "amount": "Amount", "category": "Category", "vendor": "Vendor", "notes": "Notes"},
+        "date_format": "%Y-%m-%d",
+    },
+    "uk_bank": {
+        "columns": {"date": "Transaction Date", "description": "Details", "amount": "Value",
+                    "category": "Type", "notes": "Memo"},
+        "date_format": "%d/%m/%Y",
+    },
+    "us_bank": {
+        "columns": {"date": "Txn Date", "description": "Desc", "amount": "Transaction Amount",
+                    "vendor": "Payee", "notes": "Remarks"},
+        "date_format": "%m/%d/%Y",
+    },
+    "india_bank": {
+        "columns": {"date": "Txn_Date", "description": "Particulars", "amount": "Txn Amount",
+                    "category": "Txn Type", "vendor": "Merchant", "notes": "Comments"},
+        "date_format": "%d-%m-%Y %H:%M:%S",
+    },
+}
+
+
+def span_months(n_transactions: int) -> int:
+    """History length for a tenant of this size"""
+    if n_transactions <= 10_000:
+        return 12
+    if n_transactions <= 200_000:
+        return 24
+    return 36
+
+
+def _pick(rng: np.random.Generator, options: list, size: int):
+    return np.asarray(options, dtype=object)[rng.integers(0, len(options), size)]
+
+
+def generate_transactions(
+    n_transactions: int,
+    seed: int = 0,
+    end: Optional[datetime] = None
+) -> pd.DataFrame:
+    """Exactly n_transactions rows of a realistic tenant history, oldest first
+
+    Combines monthly salary batches, recurring vendor bills with slow price
+    growth, seasonal client revenue, weekday-weighted variable spend, and a
+    small share of outlier amounts and near-duplicate rows.
+    """
+    rng = np.random.default_rng(seed)
+    months = span_months(n_transactions)
+    end = pd.Timestamp(end or datetime(2025, 12, 31)).normalize()
+    month_starts = pd.date_range(end=end, periods=months, freq="MS")
+    days = pd.date_range(month_starts[0], end, freq="D")
+    month_index = np.arange(months)
+
+    frames = []
+
+    # Salary batch on the 1st: headcount grows with the tenant's size
+    employees = max(5, n_transactions // 2000)
+    base_salary = rng.lognormal(11.3, 0.35, employees)
+    salary = base_salary[None, :] * (1.08 ** (month_index // 12))[:, None]
+    frames.append(pd.DataFrame({
+        "date": np.repeat(month_starts, employees),
+        "description": [f"Salary - Employee {e:04d}" for e in range(employees)] * months,
+        "amount": -np.round(salary.ravel(), 2),
+        "category": "Salaries",
+        "vendor": None,
+        "notes": "Monthly payroll",
+    }))
+
+    # Recurring vendors, a few percent of jitter and ~1% monthly price growth
+    for description, vendor, category, amount, day in RECURRING_VENDORS:
+        amounts = amount * 1.01 ** month_index * rng.normal(1, 0.03, months)
+        frames.append(pd.DataFrame({
+            "date": month_starts + pd.Timedelta(days=day - 1),
+            "description": description,
+            "amount": -np.round(amounts, 2),
+            "category": category,
+            "vendor": vendor,
+            "notes": "Recurring",
+        }))
+
+    # Client invoices on a random day each month, seasonal
+    clients = [CLIENTS[i % len(CLIENTS)] + (f" {i // len(CLIENTS) + 1}" if i >= len(CLIENTS) else "")
+               for i in range(max(3, n_transactions // 5000))]
+    retainer = rng.lognormal(12.5, 0.6, len(clients))
+    season = REVENUE_SEASONALITY[month_starts.month - 1]
+    invoice = retainer[None, :] * season[:, None] * rng.normal(1, 0.1, (months, len(clients)))
+    frames.append(pd.DataFrame({
+        "date": np.repeat(month_starts, len(clients)) + pd.to_timedelta(rng.integers(0, 28, months * len(clients)), unit="D"),
+        "description": [f"Client Payment - {client}" for client in clients] * months,
+        "amount": np.round(invoice.ravel(), 2),
+        "category": "Revenue",
+        "vendor": clients * months,
+        "notes": "Invoice settled",
+    }))
+
+    fixed = pd.concat(frames, ignore_index=True)
+    fixed = fixed[fixed["date"] <= end]
+    n_duplicates = int(n_transactions * DUPLICATE_RATE)
+    n_variable = max(n_transactions - len(fixed) - n_duplicates, 0)
+
+    # Variable spend: fewer purchases at weekends, more in busy months
+    weights = np.where(days.dayofweek < 5, 1.0, 0.3) * SPEND_SEASONALITY[days.month - 1]
+    dates = days[rng.choice(len(days), n_variable, p=weights / weights.sum())]
+    category_weights = np.array([spec[1] for spec in VARIABLE_SPEND])
+    categories = rng.choice(len(VARIABLE_SPEND), n_variable, p=category_weights / category_weights.sum())
+
+    descriptions = np.empty(n_variable, dtype=object)
+    vendors = np.empty(n_variable, dtype=object)
+    amounts = np.empty(n_variable)
+    category_names = np.empty(n_variable, dtype=object)
+    for index, (category, _, mean, sigma, choices) in enumerate(VARIABLE_SPEND):
+        rows = np.flatnonzero(categories == index)
+        picks = rng.integers(0, len(choices), len(rows))
+        descriptions[rows] = [choices[p][0] for p in picks]
+        vendors[rows] = [choices[p][1] for p in picks]
+        amounts[rows] = rng.lognormal(mean, sigma, len(rows))
+        category_names[rows] = category
+
+    # Outliers: a handful of purchases tens of times larger than usual
+    anomalies = rng.random(n_variable) < ANOMALY_RATE
+    amounts[anomalies] *= rng.uniform(20, 50, anomalies.sum())
+
+    variable = pd.DataFrame({
+        "date": dates + pd.to_timedelta(rng.integers(8 * 3600, 20 * 3600, n_variable), unit="s"),
+        "description": descriptions,
+        "amount": -np.round(amounts, 2),
+        "category": category_names,
+        "vendor": vendors,
+        "notes": np.where(anomalies, "Needs review", None),
+    })
+
+    df = pd.concat([fixed, variable], ignore_index=True)
+    df = df.sample(n=min(len(df), n_transactions - n_duplicates), random_state=seed)
+
+    # Near-duplicates: same date and amount, re-worded description
+    duplicates = df.sample(n=min(n_duplicates, len(df)), random_state=seed + 1).copy()
+    duplicates["description"] = duplicates["description"] + " (ref)"
+    duplicates["notes"] = "Possible duplicate"
+
+    df = pd.concat([df, duplicates], ignore_index=True).sort_values("date", kind="stable", ignore_index=True)
+    df.insert(0, "transaction_id", [f"txn_s{seed}_{i:07d}" for i in range(len(df))])
+    return df
+
+
+def write_statement(df: pd.DataFrame, path, bank_format: str = "finsight"):
+    """Write transactions as a CSV statement in one of the BANK_FORMATS layouts"""
+    layout = BANK_FORMATS[bank_format]
+    statement = df[list(layout["columns"])].rename(columns=layout["columns"])
+    date_column = layout["columns"]["date"]
+    statement[date_column] = pd.to_datetime(statement[date_column]).dt.strftime(layout["date_format"])
+    statement.to_csv(path, index=False)
+
+
+def load_tenant(db: Session, user_id: int, df: pd.DataFrame, chunk_size: int = 50_000) -> int:
+    """Insert a generated history for a user with chunked executemany inserts"""
+    created_at = datetime.utcnow()
+    records = df.assign(user_id=user_id, created_at=created_at).to_dict("records")
+    for start in range(0, len(records), chunk_size):
+        for record in records[start:start + chunk_size]:
+            record["date"] = record["date"].to_pydatetime()
+            if pd.isna(record["vendor"]):
+                record["vendor"] = None
+            if pd.isna(record["notes"]):
+                record["notes"] = None
+        db.execute(insert(Transaction), records[start:start + chunk_size])
+        db.commit()
+    return len(records)
+
+
+def create_tenant(db: Session, email: str, company_name: str, password_hash: str, cash_on_hand: float = 7500000.0) -> User:
+    user = User(company_name=company_name, email=email, password_hash=password_hash, cash_on_hand=cash_on_hand)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic FinSight tenants")
+    parser.add_argument("--size", default="1k", help=f"Transactions per tenant: {', '.join(SIZES)} or a number")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--csv", help="Write the first tenant as a CSV statement to this path")
+    parser.add_argument("--format", default="finsight", choices=list(BANK_FORMATS))
+    parser.add_argument("--tenants", type=int, default=1)
+    parser.add_argument("--load", action="store_true",
+                        help="Create synthetic-<n>@finsight.ai users (password: synthetic123) and load their data")
+    args = parser.parse_args()
+
+    size = SIZES.get(args.size.lower()) or int(args.size)
+
+    if args.csv:
+        df = generate_transactions(size, args.seed)
+        write_statement(df, args.csv, args.format)
+        print(f"✓ Wrote {len(df):,} transactions to {args.csv} ({args.format})")
+
+    if args.load:
+        from database import engine, Base, SessionLocal
+        from auth import get_password_hash
+
+        Base.metadata.create_all(bind=engine)
+        password_hash = get_password_hash("synthetic123")
+        db = SessionLocal()
+        try:
+            for tenant in range(args.tenants):
+                seed = args.seed + tenant
+                email = f"synthetic-{seed}@finsight.ai"
+                if db.query(User.id).filter(User.email == email).first():
+                    print(f"✓ {email} already exists, skipping")
+                    continue
+                user = create_tenant(db, email, f"Synthetic Tenant {seed}", password_hash)
+                count = load_tenant(db, user.id, generate_transactions(size, seed))
+                print(f"✓ Loaded {count:,} transactions for {email}")
+        finally:
+            db.close()
@@ -0,0 +1,43 @@
+"""
+API test fixtures: the app against a throwaway SQLite database
+"""
+import os
+import tempfile
+
+# Point the app at a scratch database and result cache before any backend module is imported
+_DB_DIR = tempfile.mkdtemp(prefix="finsight-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ["RESULT_CACHE_PATH"] = f"{_DB_DIR}/results.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import itertools
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from database import SessionLocal
+
+_tenants = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def auth(client):
+    """Authorization headers for a freshly registered company"""
+    name = f"tenant{next(_tenants)}"
+    response = client.post("/api/auth/register", json={
+        "company_name": name, "email": f"{name}@finsight.ai", "password": "correct-horse"
+    })
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
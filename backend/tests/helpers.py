@@ -0,0 +1,17 @@
+"""
+Shared test helpers
+"""
+
+
+def statement_bytes(rows) -> bytes:
+    """CSV statement of (date, description, amount, category, vendor) rows"""
+    lines = ["Date,Description,Amount,Category,Vendor"] + [",".join(map(str, row)) for row in rows]
+    return "\n".join(lines).encode()
+
+
+def upload_csv(client, auth, rows, force=False):
+    """Upload a statement and return the response body"""
+    response = client.post("/api/upload/csv", params={"force": force} if force else None, headers=auth,
+                           files={"file": ("statement.csv", statement_bytes(rows), "text/csv")})
+    assert response.status_code == 200, response.text
+    return response.json()
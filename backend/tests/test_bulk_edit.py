@@ -0,0 +1,63 @@
+from helpers import statement_bytes, upload_csv
+
+STATEMENT = [(f"2025-11-{day:02d}", f"Bad import row {day}", -100 * day, "Operations", "Acme") for day in range(1, 11)]
+
+
+def test_deleted_import_can_be_confirmed_again(client, auth):
+    upload = upload_csv(client, auth, STATEMENT)
+    confirm = f"/api/upload/{upload['upload_id']}/confirm"
+    assert client.post(confirm, headers=auth).json()["imported_count"] == 10
+    assert client.post(confirm, headers=auth).status_code == 400
+
+    deleted = client.post("/api/transactions/bulk-delete", headers=auth,
+                          json={"filter": {"upload_id": upload["upload_id"]}}).json()
+    assert deleted["deleted"] == 10 and deleted["uploads_released"] == 1
+
+    again = upload_csv(client, auth, STATEMENT)
+    assert again["duplicate"] and again["upload_id"] == upload["upload_id"] and again["status"] == "completed"
+    assert client.post(confirm, headers=auth).json()["imported_count"] == 10
+
+
+def test_partial_delete_keeps_upload_imported(client, auth):
+    upload = upload_csv(client, auth, STATEMENT)
+    client.post(f"/api/upload/{upload['upload_id']}/confirm", headers=auth)
+    transactions = client.get("/api/transactions", headers=auth).json()
+    assert client.delete(f"/api/transactions/{transactions[0]['id']}", headers=auth).status_code == 200
+
+    deleted = client.post("/api/transactions/bulk-delete", headers=auth,
+                          json={"filter": {"upload_id": upload["upload_id"], "end_date": "2025-11-05"}}).json()
+    assert deleted["uploads_released"] == 0
+    assert client.post(f"/api/upload/{upload['upload_id']}/confirm", headers=auth).status_code == 400
+
+
+def test_reupload_of_an_imported_file_says_so(client, auth):
+    upload = upload_csv(client, auth, STATEMENT)
+    client.post(f"/api/upload/{upload['upload_id']}/confirm", headers=auth)
+    again = client.post("/api/upload/csv", headers=auth, files={
+        "file": ("statement.csv", statement_bytes(STATEMENT), "text/csv")
+    })
+    assert again.status_code == 409
+    assert f"upload {upload['upload_id']}" in again.json()["detail"]
+
+    forced = upload_csv(client, auth, STATEMENT, force=True)
+    assert not forced["duplicate"] and forced["upload_id"] != upload["upload_id"]
+
+
+def test_recategorize_refreshes_stored_category_forecasts(client, auth):
+    rows = [(f"{2024 + (month - 1) // 12}-{(month - 1) % 12 + 1:02d}-{day:02d}", f"{vendor} {month}",
+             -amount, category, vendor)
+            for month in range(1, 16) for day, vendor, category, amount in ((3, "Landlord", "Rent", 5000),
+                                                                           (9, "Acme", "Software", 800))]
+    upload = upload_csv(client, auth, rows)
+    client.post(f"/api/upload/{upload['upload_id']}/confirm", headers=auth)
+
+    def categories():
+        forecast = client.get("/api/forecast/categories", headers=auth, params={"resolution": "monthly"}).json()
+        return set(forecast["categories"]) | set(forecast["skipped"])
+
+    assert categories() == {"Rent", "Software"}
+    updated = client.post("/api/transactions/bulk-update", headers=auth, json={
+        "filter": {"category": "Software"}, "changes": {"category": "Cloud"}
+    }).json()
+    assert updated["updated"] == 15
+    assert categories() == {"Rent", "Cloud"}
@@ -0,0 +1,84 @@
+import asyncio
+
+import orjson
+
+from bulk_import import BulkTransactionImporter, iter_ndjson_lines
+from models import Transaction
+from snapshot import current_version
+from synthetic_data import create_tenant
+
+
+def split_lines(chunks):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [line async for line in iter_ndjson_lines(stream())]
+
+    return asyncio.run(collect())
+
+
+def row(day, amount=-100.0):
+    return {"date": f"2025-03-{day:02d}", "description": f"Row {day}", "amount": amount, "category": "Operations"}
+
+
+def test_lines_split_across_chunks():
+    body = b'{"a": 1}\n\n{"b": 22}\n  \n{"c": 333}'
+    expected = [b'{"a": 1}', b'{"b": 22}', b'{"c": 333}']
+    assert split_lines([body]) == expected
+    assert split_lines([body[i:i + 1] for i in range(len(body))]) == expected
+    assert split_lines([body[:3], body[3:9], body[9:10], body[10:]]) == expected
+    assert split_lines([b"x" * 10] * 1000 + [b"\nlast\n"]) == [b"x" * 10000, b"last"]
+
+
+def test_invalid_rows_are_reported_and_the_rest_inserted(db):
+    user_id = create_tenant(db, "bulk-errors@finsight.ai", "Bulk Errors", password_hash="-").id
+    importer = BulkTransactionImporter(db, user_id, chunk_size=10)
+    importer.add_many([
+        orjson.dumps(row(1)),
+        b"{not json",
+        {"description": "No amount", "category": "Operations"},
+        row(2) | {"date": "someday"},
+        row(3),
+    ])
+    report = importer.finish()
+
+    assert (report["received"], report["inserted"], report["failed"]) == (5, 2, 3)
+    assert [error["row"] for error in report["errors"]] == [1, 2, 3]
+    assert report["errors"][0]["error"].startswith("Invalid JSON")
+    assert "amount" in report["errors"][1]["error"]
+    assert "someday" in report["errors"][2]["error"]
+    assert db.query(Transaction).filter(Transaction.user_id == user_id).count() == 2
+
+
+def test_each_chunk_commits_and_bumps_the_data_version(db):
+    user_id = create_tenant(db, "bulk-chunks@finsight.ai", "Bulk Chunks", password_hash="-").id
+    version = current_version(db, user_id)
+    importer = BulkTransactionImporter(db, user_id, chunk_size=4)
+
+    importer.add_many([row(day) for day in range(1, 10)])
+    assert importer.inserted == 8 and len(importer.pending) == 1
+    assert current_version(db, user_id) == version + 2
+
+    assert importer.finish()["inserted"] == 9
+    assert current_version(db, user_id) == version + 3
+    assert db.query(Transaction).filter(Transaction.user_id == user_id).count() == 9
+
+
+def test_ndjson_endpoint_streams_chunks(client, auth):
+    lines = [orjson.dumps(row(day, amount=-10.0 * day)) for day in range(1, 8)] + [b'{"amount": "lots"}']
+    body = b"\n".join(lines)
+    assert client.post("/api/transactions/bulk", headers=auth, json=[row(28)]).json()["inserted"] == 1
+    before = client.get("/api/financial-data", headers=auth).headers["ETag"]
+
+    response = client.post("/api/transactions/bulk", params={"chunk_size": 3}, headers={
+        **auth, "Content-Type": "application/x-ndjson"
+    }, content=[body[i:i + 5] for i in range(0, len(body), 5)])
+    report = response.json()
+    assert response.status_code == 200, response.text
+    assert (report["received"], report["inserted"], report["failed"]) == (8, 7, 1)
+    assert report["errors"][0]["row"] == 7
+
+    assert len(client.get("/api/transactions", headers=auth).json()) == 8
+    assert client.get("/api/financial-data", headers=auth).headers["ETag"] != before
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from bulk_loader import load_frames
+from models import Transaction
+from synthetic_data import create_tenant
+
+
+def statement(prefix):
+    return pd.DataFrame({
+        "Transaction ID": [f"{prefix}_T1", f"{prefix}_T2", f"{prefix}_T3"],
+        "Date": ["2025-04-01", "2025-04-02", "2025-04-03"],
+        "Description": ["Invoice", "Rent", "Software"],
+        "Amount": ["5000", "-2000", "-300"],
+        "Category": ["Revenue", "Rent", "Software"],
+    })
+
+
+def test_reload_into_the_same_account_is_skipped(db):
+    user_id = create_tenant(db, "loader-same@finsight.ai", "Loader Same", password_hash="-").id
+    frame = statement("same")
+    first = load_frames(db, user_id, [frame.iloc[:2]])
+    assert (first["inserted"], first["skipped"], first["conflicts"]) == (2, 0, 0)
+
+    again = load_frames(db, user_id, [frame])
+    assert (again["inserted"], again["skipped"], again["conflicts"]) == (1, 2, 0)
+    # Totals cover only what this run inserted
+    assert (again["total_revenue"], again["total_expenses"]) == (0.0, -300.0)
+    assert again["category_totals"] == {"Software": -300.0}
+
+
+def test_ids_owned_by_another_account_are_conflicts(db):
+    owner = create_tenant(db, "loader-owner@finsight.ai", "Loader Owner", password_hash="-").id
+    other = create_tenant(db, "loader-other@finsight.ai", "Loader Other", password_hash="-").id
+    frame = statement("shared")
+    load_frames(db, owner, [frame.iloc[:2]])
+
+    result = load_frames(db, other, [frame])
+    assert (result["inserted"], result["skipped"], result["conflicts"]) == (1, 0, 2)
+    assert sorted(result["conflicting_ids"]) == ["shared_T1", "shared_T2"]
+    assert result["category_totals"] == {"Software": -300.0}
+    assert db.query(Transaction).filter(Transaction.user_id == owner).count() == 2
+    assert db.query(Transaction).filter(Transaction.user_id == other).count() == 1
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from date_formats import DateFormatCache, infer_date_format, parse_date_string
+
+COLUMNS = {"Date": "Date", "Description": "Description", "Amount": "Amount"}
+
+
+def test_remembered_format_is_replaced_when_the_column_does_not_fit():
+    cache = DateFormatCache()
+    assert cache.resolve(1, COLUMNS, pd.Series(["25/01/2024", "13/02/2024"])) == "%d/%m/%Y"
+
+    # A US export whose sampled rows are all ambiguous; the one unambiguous row falls between samples
+    ambiguous = [f"0{month}/0{day}/2024" for month in range(1, 10) for day in range(1, 10)] * 10
+    us = pd.Series(ambiguous[:1] + ["01/13/2024"] + ambiguous[1:])
+    assert infer_date_format(us) == "%m/%d/%Y"
+    assert cache.resolve(1, COLUMNS, us) == "%m/%d/%Y"
+    assert cache.resolve(1, COLUMNS, pd.Series(["02/03/2024"])) == "%m/%d/%Y"
+
+
+def test_unrecognised_column_forgets_the_remembered_format():
+    cache = DateFormatCache()
+    cache.resolve(1, COLUMNS, pd.Series(["2024-01-25"]))
+    assert cache.resolve(1, COLUMNS, pd.Series(["soon", "later"])) is None
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-01-05", datetime(2024, 1, 5)),
+    ("05/01/2024", datetime(2024, 1, 5)),
+    ("Jan 5 2024", datetime(2024, 1, 5)),
+    ("5th January 2024", datetime(2024, 1, 5)),
+])
+def test_parse_date_string(value, expected):
+    assert parse_date_string(value) == expected
+
+
+def test_manual_entry_with_an_unparseable_date_is_rejected(client, auth):
+    response = client.post("/api/transactions", headers=auth, json={
+        "date": "someday", "description": "Office chairs", "amount": -12000, "category": "Operations"
+    })
+    assert response.status_code == 400
+    assert client.get("/api/transactions", headers=auth).json() == []
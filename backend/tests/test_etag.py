@@ -0,0 +1,60 @@
+import re
+import pytest
+from sqlalchemy import event
+
+from database import engine
+
+TRANSACTION_SCAN = re.compile(r"^\s*SELECT\b.*\bFROM transactions\b", re.IGNORECASE | re.DOTALL)
+
+
+@pytest.fixture
+def transaction_scans():
+    """Count the SELECTs against the transactions table"""
+    scans = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if TRANSACTION_SCAN.search(statement):
+            scans.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield scans
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def add_transaction(client, auth, amount):
+    response = client.post("/api/transactions", headers=auth, json={
+        "date": "2025-10-01", "description": "Office rent", "amount": amount, "category": "Rent"
+    })
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.parametrize("path", ["/api/financial-data", "/api/stats/categories"])
+def test_revalidation_skips_transaction_queries(client, auth, transaction_scans, path):
+    add_transaction(client, auth, -50000)
+    first = client.get(path, headers=auth)
+    assert first.status_code == 200
+    assert transaction_scans, "the first read should load the transactions"
+    etag = first.headers["ETag"]
+
+    transaction_scans.clear()
+    revalidated = client.get(path, headers={**auth, "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
+    assert transaction_scans == []
+
+    add_transaction(client, auth, -20000)
+    changed = client.get(path, headers={**auth, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_error_payloads_get_no_etag(client, auth):
+    # No expense history yet: the forecast is an error that may clear up
+    response = client.get("/api/forecast", headers=auth)
+    assert "error" in response.json()
+    assert "ETag" not in response.headers
+    assert response.headers["Cache-Control"] == "no-store"
+
+    add_transaction(client, auth, -50000)
+    add_transaction(client, auth, -20000)
+    assert "ETag" in client.get("/api/financial-data", headers=auth).headers
@@ -0,0 +1,41 @@
+import tracemalloc
+import pytest
+
+from exporter import stream_export
+from synthetic_data import create_tenant, generate_transactions, load_tenant
+
+BATCH_SIZE = 500
+SIZES = [2_000, 20_000]
+
+
+@pytest.fixture(scope="module")
+def tenants():
+    from database import SessionLocal
+    db = SessionLocal()
+    users = {}
+    for rows in SIZES:
+        user = create_tenant(db, f"export-{rows}@finsight.ai", f"Export {rows}", password_hash="-")
+        load_tenant(db, user.id, generate_transactions(rows, seed=rows))
+        users[rows] = user.id
+    db.close()
+    return users
+
+
+def peak_memory(user_id: int, fmt: str) -> int:
+    """Peak traced memory while consuming an export stream"""
+    tracemalloc.start()
+    try:
+        for _ in stream_export(user_id, fmt, batch_size=BATCH_SIZE):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson", "parquet"])
+def test_export_memory_does_not_grow_with_history(tenants, fmt):
+    # Warm up so lazy imports are not counted against the smaller tenant
+    peak_memory(tenants[SIZES[0]], fmt)
+    small, large = (peak_memory(tenants[rows], fmt) for rows in SIZES)
+    # Ten times the rows must fit in the same batch-sized budget
+    assert large < 1.5 * small + 1_000_000, f"{fmt}: {small:,} bytes at {SIZES[0]:,} rows, {large:,} at {SIZES[1]:,}"
@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from category_forecast import run_rate_series
+from logic import aggregate_history
+
+
+def history(start, end, amount=100.0):
+    ds = pd.date_range(start, end, freq="D") + pd.Timedelta(hours=12)
+    return pd.DataFrame({"ds": ds, "y": amount})
+
+
+@pytest.mark.parametrize("resolution, first_labels", [
+    ("weekly", ["2025-01-06", "2025-01-13"]),  # Mondays
+    ("monthly", ["2025-01-01", "2025-02-01"]),
+])
+def test_periods_are_labelled_by_their_first_day(resolution, first_labels):
+    series = aggregate_history(history("2025-01-06", "2025-03-31"), resolution)
+    assert series["ds"].dt.strftime("%Y-%m-%d").tolist()[:2] == first_labels
+    assert series["y"].iloc[1] == 100.0 * (7 if resolution == "weekly" else 28)
+
+
+@pytest.mark.parametrize("resolution, end, last_label", [
+    ("weekly", "2025-03-09", "2025-03-03"),   # ends on a Sunday: the last week is complete
+    ("weekly", "2025-03-12", "2025-03-03"),   # ends on a Wednesday: that week is dropped
+    ("monthly", "2025-03-31", "2025-03-01"),
+    ("monthly", "2025-03-15", "2025-02-01"),
+    ("daily", "2025-03-15", "2025-03-15"),
+])
+def test_incomplete_last_period_is_dropped(resolution, end, last_label):
+    series = aggregate_history(history("2025-01-06", end), resolution)
+    assert series["ds"].iloc[-1].strftime("%Y-%m-%d") == last_label
+    assert series["y"].min() > 0  # no partial period reads as a fall in spend
+
+
+def test_run_rate_dates_follow_the_last_complete_period():
+    spend = history("2025-01-06", "2025-03-12")
+    forecast = run_rate_series(spend, spend, "weekly", 2)
+    assert forecast["ds"] == ["2025-03-10T00:00:00", "2025-03-17T00:00:00"]
+    assert forecast["yhat"] == [700.0, 700.0]
@@ -0,0 +1,78 @@
+import os
+import sqlite3
+
+from sqlalchemy import create_engine
+
+from database import Base
+from result_cache import ResultCache, database_identity
+
+
+def scratch_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def test_databases_sharing_a_cache_file_never_share_results(tmp_path):
+    path = str(tmp_path / "results.db")
+    first = ResultCache(path, 1 << 20, bind=scratch_engine(tmp_path / "first.db"))
+    second = ResultCache(path, 1 << 20, bind=scratch_engine(tmp_path / "second.db"))
+
+    first.put("financials", 1, 3, {"runway_months": 12.0})
+    assert first.get("financials", 1, 3) == {"runway_months": 12.0}
+    assert second.get("financials", 1, 3) is None
+
+    # A newer version in one database leaves the other's entries alone
+    second.put("financials", 1, 4, {"runway_months": 2.0})
+    second.invalidate_user(1)
+    assert first.get("financials", 1, 3) == {"runway_months": 12.0}
+
+
+def test_recreated_database_gets_a_new_identity(tmp_path):
+    engine = scratch_engine(tmp_path / "app.db")
+    identity = database_identity(engine)
+    assert database_identity(engine) == identity
+    engine.dispose()
+
+    os.remove(tmp_path / "app.db")
+    assert database_identity(scratch_engine(tmp_path / "app.db")) != identity
+
+
+def test_cache_file_from_an_older_layout_is_reset(tmp_path):
+    path = str(tmp_path / "results.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE results (key TEXT PRIMARY KEY, scope TEXT, user_id INTEGER, version INTEGER, "
+                     "value BLOB, size INTEGER, created_at REAL, accessed_at REAL)")
+        conn.execute("INSERT INTO results VALUES ('financials:1:3:', 'financials', 1, 3, x'00', 1, 0, 0)")
+    cache = ResultCache(path, 1 << 20, bind=scratch_engine(tmp_path / "app.db"))
+    assert cache.get("financials", 1, 3) is None
+    cache.put("financials", 1, 3, {"runway_months": 12.0})
+    assert cache.stats()["entries"] == 1
+
+
+def test_running_size_total_tracks_every_write(tmp_path):
+    path = str(tmp_path / "results.db")
+    cache = ResultCache(path, 4000, bind=scratch_engine(tmp_path / "app.db"))
+
+    def totals():
+        with sqlite3.connect(path) as conn:
+            return (conn.execute("SELECT total_size FROM result_meta").fetchone()[0],
+                    conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0])
+
+    for user_id in range(1, 6):
+        cache.put("financials", user_id, 1, b"x" * 500)
+    cache.put("financials", 1, 1, b"x" * 900)  # replaced in place
+    cache.put("financials", 2, 2, b"x" * 100)  # drops version 1
+    running, actual = totals()
+    assert running == actual and 2500 < actual < 2700
+
+    for user_id in range(6, 10):
+        cache.put("financials", user_id, 1, b"x" * 500)  # evicts the oldest
+    running, actual = totals()
+    assert running == actual <= 4000
+    assert cache.get("financials", 3, 1) is None and cache.get("financials", 9, 1) is not None
+
+    cache.invalidate_user(9)
+    assert totals()[0] == totals()[1] == cache.stats()["bytes"]
+    cache.clear()
+    assert totals() == (0, 0)
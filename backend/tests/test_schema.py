@@ -0,0 +1,43 @@
+from sqlalchemy import create_engine, inspect, text
+
+from database import Base, add_missing_columns
+import models  # noqa: F401  (registers the tables)
+
+# The tables as they were before data_version, file_hash, upload_id and forecast variants
+OLD_SCHEMA = [
+    """CREATE TABLE users (id INTEGER PRIMARY KEY, company_name VARCHAR(255) NOT NULL, email VARCHAR(255) NOT NULL,
+       password_hash VARCHAR(255) NOT NULL, cash_on_hand FLOAT, created_at DATETIME)""",
+    """CREATE TABLE uploads (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, filename VARCHAR(255) NOT NULL,
+       status VARCHAR(50) NOT NULL, upload_date DATETIME NOT NULL, total_transactions INTEGER,
+       imported_count INTEGER, analysis_results TEXT)""",
+    """CREATE TABLE transactions (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, transaction_id VARCHAR(100),
+       date DATETIME, description VARCHAR(500) NOT NULL, amount FLOAT NOT NULL, category VARCHAR(100) NOT NULL,
+       vendor VARCHAR(255), notes TEXT, created_at DATETIME)""",
+    """CREATE TABLE forecasts (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL UNIQUE, fitted_at DATETIME NOT NULL,
+       data_fingerprint VARCHAR(64) NOT NULL, result TEXT NOT NULL)""",
+    "INSERT INTO users (id, company_name, email, password_hash) VALUES (1, 'Old Co', 'old@finsight.ai', '-')",
+    "INSERT INTO transactions (user_id, description, amount, category) VALUES (1, 'Rent', -1000, 'Rent')",
+    "INSERT INTO forecasts (user_id, fitted_at, data_fingerprint, result) VALUES (1, '2025-01-01', 'x', '{}')",
+]
+
+
+def test_old_database_gains_new_columns(tmp_path):
+    old = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with old.begin() as conn:
+        for statement in OLD_SCHEMA:
+            conn.execute(text(statement))
+    Base.metadata.create_all(bind=old)
+
+    added = add_missing_columns(old, Base.metadata)
+    assert {"users.data_version", "uploads.file_hash", "transactions.upload_id", "forecasts.variant"} <= set(added)
+    assert add_missing_columns(old, Base.metadata) == []
+
+    inspector = inspect(old)
+    for table in Base.metadata.sorted_tables:
+        assert {column["name"] for column in inspector.get_columns(table.name)} >= set(table.columns.keys())
+    assert "ix_transactions_upload_id" in {index["name"] for index in inspector.get_indexes("transactions")}
+    with old.connect() as conn:
+        assert conn.execute(text("SELECT data_version FROM users")).scalar_one() == 0
+        assert conn.execute(text("SELECT count(*) FROM transactions")).scalar_one() == 1
+        # Stored forecasts are derived data; the old per-user layout is rebuilt empty
+        assert conn.execute(text("SELECT count(*) FROM forecasts")).scalar_one() == 0
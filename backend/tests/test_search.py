@@ -0,0 +1,50 @@
+import pytest
+
+SEARCH = "/api/transactions/search"
+
+
+@pytest.fixture
+def invoices(client, auth):
+    rows = [{"date": f"2025-{month:02d}-{day:02d}", "description": f"Acme invoice {month}-{day}",
+             "amount": -100.0 * day, "category": "Software", "vendor": "Acme"}
+            for month in range(1, 4) for day in (5, 15, 25)]
+    for row in rows:
+        assert client.post("/api/transactions", headers=auth, json=row).status_code == 200
+    return rows
+
+
+def pages(client, auth, **params):
+    ids, cursor = [], None
+    while True:
+        response = client.get(SEARCH, headers=auth, params={**params, "limit": 4, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        ids += [row["id"] for row in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+
+
+@pytest.mark.parametrize("sort", ["relevance", "date"])
+def test_cursor_pages_through_every_match_once(client, auth, invoices, sort):
+    ids = pages(client, auth, q="acme invoice", sort=sort)
+    assert len(ids) == len(set(ids)) == len(invoices)
+
+
+def test_cursor_from_another_search_is_rejected(client, auth, invoices):
+    first = client.get(SEARCH, headers=auth, params={"q": "acme", "limit": 2})
+    cursor = first.headers["X-Next-Cursor"]
+
+    other_sort = client.get(SEARCH, headers=auth, params={"q": "acme", "limit": 2, "sort": "date", "cursor": cursor})
+    assert other_sort.status_code == 400
+    assert "sort" in other_sort.json()["detail"]
+
+    other_query = client.get(SEARCH, headers=auth, params={"q": "invoice", "limit": 2, "cursor": cursor})
+    assert other_query.status_code == 400
+    other_filter = client.get(SEARCH, headers=auth, params={"q": "acme", "limit": 2, "category": "Rent", "cursor": cursor})
+    assert other_filter.status_code == 400
+
+    garbage = client.get(SEARCH, headers=auth, params={"q": "acme", "cursor": "not-a-cursor"})
+    assert garbage.status_code == 400
+
+    same = client.get(SEARCH, headers=auth, params={"q": "Acme!", "limit": 2, "cursor": cursor})
+    assert same.status_code == 200  # the same terms, however they are typed
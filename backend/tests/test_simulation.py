@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from sqlalchemy import event, func, select
+
+from database import engine
+from models import ActivityLog
+from simulation import SimulationGridRequest, run_simulation_grid, simulate_runway_paths
+
+
+@pytest.mark.parametrize("revenue", [0.0, 400_000.0, 1_200_000.0])
+def test_zero_hire_cell_matches_baseline(revenue):
+    financials = {"cash_on_hand": 7_500_000.0, "avg_monthly_burn": 1_000_000.0,
+                  "avg_monthly_revenue": revenue, "runway_months": 7.5}
+    grid = run_simulation_grid(financials, SimulationGridRequest(new_hires=[0, 2], avg_salary=[150_000], months=24))
+    baseline = grid["baseline"]
+    assert baseline["net_monthly_burn"] == 1_000_000.0 - revenue
+    assert baseline["gross_runway"] == 7.5
+
+    zero_hires = grid["scenarios"]["new_hires"] == 0
+    np.testing.assert_equal(grid["scenarios"]["runway_months"][zero_hires], [baseline["current_runway"]])
+    if revenue < 1_000_000.0:
+        assert baseline["current_runway"] == pytest.approx(7_500_000.0 / (1_000_000.0 - revenue), abs=0.05)
+    else:
+        assert np.isnan(baseline["current_runway"])  # never runs out within the horizon
+
+
+def test_grid_endpoint_does_not_write(client, auth, db):
+    client.post("/api/transactions", headers=auth, json={
+        "date": "2025-10-01", "description": "Payroll", "amount": -900_000, "category": "Salaries"
+    })
+    writes = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith("SELECT"):
+            writes.append(statement)
+
+    logged = db.execute(select(func.count()).select_from(ActivityLog)).scalar_one()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.post("/api/simulate/grid", headers=auth, json={"new_hires": [0, 1], "avg_salary": [100_000]})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    assert writes == []
+    assert db.execute(select(func.count()).select_from(ActivityLog)).scalar_one() == logged
+
+
+@pytest.mark.filterwarnings("error")
+@pytest.mark.parametrize("revenue", [0.85, 1.0, 1.15])
+def test_censored_runway_percentiles(revenue):
+    # Around break-even none, most or nearly all paths outlast the horizon
+    expenses = np.array([1.0, 1.3, 0.7, 1.0]) * 100_000
+    income = np.array([1.0, 0.8, 1.2, 1.0]) * 100_000 * revenue
+    result = simulate_runway_paths(100_000.0, expenses, income, paths=2_000, months=24, seed=7)
+    percentiles = result["runway_percentiles"]
+    assert set(result["runway_beyond_horizon"]) == {label for label, value in percentiles.items() if value is None}
+    finite = [value for value in percentiles.values() if value is not None]
+    assert finite == sorted(finite) and all(0 < value <= 24 for value in finite)
+    # A percentile is beyond the horizon exactly when that share of paths never ran out
+    for label, share in (("p10", 0.1), ("p50", 0.5), ("p90", 0.9)):
+        assert (percentiles[label] is None) == (result["probability_cash_out"] < share)
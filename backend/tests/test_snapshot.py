@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from database import SessionLocal
+from logic import bump_data_version
+from models import Transaction
+from snapshot import current_version, get_snapshot, snapshot_cache, snapshot_row
+from synthetic_data import create_tenant, generate_transactions, load_tenant
+
+
+def test_write_between_version_read_and_build_is_not_counted_twice(db):
+    user_id = create_tenant(db, "race@finsight.ai", "Race", password_hash="-").id
+    load_tenant(db, user_id, generate_transactions(200, seed=45))
+    stale = current_version(db, user_id)  # read at authentication
+    snapshot_cache.invalidate(user_id)
+
+    # Another request commits a write before this one reads the rows...
+    writer = SessionLocal()
+    txn = Transaction(user_id=user_id, transaction_id="race_1", date=datetime(2025, 6, 1),
+                      description="Late write", amount=-500.0, category="Operations")
+    writer.add(txn)
+    bump_data_version(writer, user_id)
+    writer.flush()
+    added = [snapshot_row(txn)]
+    writer.commit()
+
+    # ...and patches the cache only after this request has built its snapshot
+    assert get_snapshot(db, user_id, stale).size == 201
+    snapshot_cache.apply(user_id, stale, added=added)
+    writer.close()
+
+    latest = get_snapshot(db, user_id, current_version(db, user_id))
+    assert latest.size == 201
+    assert sorted(latest.ids.tolist()) == sorted(set(latest.ids.tolist()))
@@ -0,0 +1,75 @@
+import asyncio
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+import pytest
+
+from upload_handler import MULTIPART_OVERHEAD, UploadSizeLimitMiddleware
+
+LIMIT = 4096
+
+
+@pytest.fixture(scope="module")
+def limited():
+    """A tiny app behind the middleware that records whether the endpoint ran"""
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.post("/api/upload/csv")
+    async def upload(file: UploadFile = File(...)):
+        app.state.calls += 1
+        return {"size": len(await file.read())}
+
+    app.add_middleware(UploadSizeLimitMiddleware, max_bytes=LIMIT)
+    return TestClient(app)
+
+
+def test_upload_within_limit_is_received(limited):
+    response = limited.post("/api/upload/csv", files={"file": ("a.csv", b"x" * LIMIT, "text/csv")})
+    assert response.status_code == 200 and response.json() == {"size": LIMIT}
+
+
+def test_declared_oversized_body_is_refused_unread(limited):
+    calls = limited.app.state.calls
+    response = limited.post("/api/upload/csv", files={"file": ("a.csv", b"x" * (LIMIT + MULTIPART_OVERHEAD + 1), "text/csv")})
+    assert response.status_code == 413
+    assert limited.app.state.calls == calls
+
+
+def test_streamed_oversized_body_is_cut_off(limited):
+    calls = limited.app.state.calls
+    response = limited.post("/api/upload/csv", content=(b"x" * 8192 for _ in range(100)),
+                            headers={"Content-Type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+    assert limited.app.state.calls == calls
+
+
+def test_middleware_stops_reading_past_the_limit():
+    chunks = []
+    sent = []
+
+    async def receive():
+        chunks.append(1)
+        return {"type": "http.request", "body": b"x" * 8192, "more_body": len(chunks) < 100}
+
+    async def send(message):
+        sent.append(message)
+
+    async def read_everything(scope, receive, send):
+        while (await receive()).get("more_body"):
+            pass
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    scope = {"type": "http", "method": "POST", "path": "/api/upload/csv", "headers": []}
+    middleware = UploadSizeLimitMiddleware(read_everything, max_bytes=LIMIT)
+    asyncio.run(middleware(scope, receive, send))
+    assert sent[0]["status"] == 413
+    assert len(chunks) == (LIMIT + MULTIPART_OVERHEAD) // 8192 + 1
+
+
+def test_app_refuses_oversized_upload(client, auth):
+    from main import csv_handler
+    body = b"Date,Description,Amount\n" + b"2025-01-01,x,-1\n" * (csv_handler.max_upload_bytes // 16 + 10_000)
+    response = client.post("/api/upload/csv", headers=auth, files={"file": ("big.csv", body, "text/csv")})
+    assert response.status_code == 413
@@ -7,14 +7,114 @@ import pandas as pd
 from datetime import datetime
 import hashlib
 import os
+import uuid
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 import re
+import time
+from dotenv import load_dotenv
+
+from date_formats import date_format_cache, parse_dates
+from log_config import get_logger
+from metrics import CSV_PARSE_TIME
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Maximum accepted upload size. UploadSizeLimitMiddleware bounds the raw
+# request body while it is received; save_upload checks the file itself.
+MAX_UPLOAD_SIZE_MB = int(os.getenv("MAX_UPLOAD_SIZE_MB", "10"))
+
+# Allowance for the multipart boundaries, part headers and form fields around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _too_large_detail(max_bytes: int) -> str:
+    return f"File size exceeds {max_bytes / (1024 * 1024):g}MB limit"
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """Rejects upload requests with 413 before an oversized body is received
+
+    Starlette spools the whole multipart body to a temporary file before the
+    endpoint runs, so the limit has to be enforced on the raw stream. A
+    Content-Length over the limit is refused without reading the body; a
+    chunked or understated body is counted as it arrives and cut off once
+    it passes the limit.
+    """
+
+    def __init__(self, app, max_bytes: int, path_prefix: str = "/api/upload"):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.max_body = max_bytes + MULTIPART_OVERHEAD
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        length = headers.get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_body:
+            await self._reject(scope, send)
+            return
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            # Body parsing errors are turned into a 400 by FastAPI; answer 413 instead
+            if exceeded:
+                if message["type"] == "http.response.start" and not started:
+                    started = True
+                    await self._reject(scope, send)
+                return
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            if not started:
+                await self._reject(scope, send)
+
+    async def _reject(self, scope, send):
+        logger.info("upload.rejected_too_large", extra={"max_bytes": self.max_bytes})
+        response = JSONResponse({"detail": _too_large_detail(self.max_bytes)}, status_code=413,
+                                headers={"Connection": "close"})
+        await response(scope, None, send)
 
 class CSVUploadHandler:
     """Handle CSV file uploads and parsing"""
     
-    def __init__(self, upload_dir: str = "uploads"):
+    def __init__(
+        self,
+        upload_dir: str = "uploads",
+        chunk_size: int = 1024 * 1024,
+        max_upload_bytes: Optional[int] = None
+    ):
         self.upload_dir = upload_dir
+        self.chunk_size = chunk_size
+        self.max_upload_bytes = max_upload_bytes or MAX_UPLOAD_SIZE_MB * 1024 * 1024
         os.makedirs(upload_dir, exist_ok=True)
         
         # Column name mappings
@@ -27,8 +127,8 @@ class CSVUploadHandler:
             'notes': ['notes', 'memo', 'remarks', 'comments']
         }
     
-    async def save_upload(self, file: UploadFile) -> str:
-        """Save uploaded file and return file path"""
+    async def save_upload(self, file: UploadFile) -> Tuple[str, str]:
+        """Spool uploaded file to disk and return (file path, SHA-256 digest of its content)"""
         # Validate file type
         if not file.filename.endswith('.csv'):
             raise HTTPException(status_code=400, detail="Only CSV files are supported")
@@ -36,23 +136,42 @@ class CSVUploadHandler:
         # Generate unique filename
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         safe_filename = re.sub(r'[^a-zA-Z0-9._-]', '_', file.filename)
-        filename = f"{timestamp}_{safe_filename}"
+        filename = f"{timestamp}_{uuid.uuid4().hex[:8]}_{safe_filename}"
         filepath = os.path.join(self.upload_dir, filename)
+        partial_path = f"{filepath}.part"
         
-        # Save file
-        content = await file.read()
-        
-        # Validate file size (max 10MB)
-        if len(content) > 10 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="File size exceeds 10MB limit")
-        
-        with open(filepath, 'wb') as f:
-            f.write(content)
+        # Copy the spooled upload to a partial file in chunks, hashing and
+        # counting as we go (UploadSizeLimitMiddleware has already bounded the
+        # request body); disk writes run in the threadpool so they don't block
+        # the event loop
+        hasher = hashlib.sha256()
+        size = 0
+        out = await run_in_threadpool(open, partial_path, 'wb')
+        try:
+            while True:
+                chunk = await file.read(self.chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > self.max_upload_bytes:
+                    raise self._too_large()
+                hasher.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+            await run_in_threadpool(out.close)
+            os.replace(partial_path, filepath)
+        except BaseException:
+            out.close()
+            self.cleanup_file(partial_path)
+            raise
         
-        return filepath
+        return filepath, hasher.hexdigest()
+    
+    def _too_large(self) -> HTTPException:
+        return HTTPException(status_code=413, detail=_too_large_detail(self.max_upload_bytes))
     
-    def parse_csv(self, filepath: str) -> Tuple[pd.DataFrame, Dict]:
+    def parse_csv(self, filepath: str, user_id: Optional[int] = None) -> Tuple[pd.DataFrame, Dict]:
         """Parse CSV file and return DataFrame with metadata"""
+        started = time.perf_counter()
         try:
             # Try different encodings
             encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
@@ -82,7 +201,8 @@ class CSVUploadHandler:
                 )
             
             # Parse and validate data
-            df = self._clean_data(df)
+            date_format = date_format_cache.resolve(user_id, column_map, df['date'])
+            df = self._clean_data(df, date_format)
             
             metadata = {
                 'total_rows': len(df),
@@ -91,9 +211,11 @@ class CSVUploadHandler:
                     'start': df['date'].min().isoformat() if not df.empty else None,
                     'end': df['date'].max().isoformat() if not df.empty else None
                 },
-                'column_mapping': column_map
+                'column_mapping': column_map,
+                'date_format': date_format
             }
             
+            CSV_PARSE_TIME.observe(time.perf_counter() - started)
             return df, metadata
             
         except Exception as e:
@@ -112,10 +234,10 @@ class CSVUploadHandler:
         
         return column_map
     
-    def _clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _clean_data(self, df: pd.DataFrame, date_format: Optional[str] = None) -> pd.DataFrame:
         """Clean and validate transaction data"""
-        # Parse dates
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+        # Parse dates with the format inferred for this file
+        df['date'] = parse_dates(df['date'], date_format)
         
         # Remove rows with invalid dates
         df = df.dropna(subset=['date'])
@@ -177,4 +299,4 @@ class CSVUploadHandler:
             if os.path.exists(filepath):
                 os.remove(filepath)
         except Exception as e:
-            print(f"Error cleaning up file {filepath}: {e}")
+            logger.warning("upload.cleanup_error", extra={"path": filepath, "error": str(e)})
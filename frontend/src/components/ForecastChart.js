@@ -30,7 +30,7 @@ function ForecastChart() {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    axios.get('http://127.0.0.1:8000/api/forecast')
+    axios.get('http://127.0.0.1:8000/api/forecast?resolution=weekly')
       .then(response => {
         const forecast = response.data;
 
@@ -40,10 +40,8 @@ function ForecastChart() {
           return;
         }
 
-        const filteredForecast = forecast.filter((item, index) => index % 7 === 0);
-
-        const labels = filteredForecast.map(item => new Date(item.ds).toLocaleDateString('en-US', { month: 'short', day: 'numeric' }));
-        const predictedValues = filteredForecast.map(item => item.yhat);
+        const labels = forecast.map(item => new Date(item.ds).toLocaleDateString('en-US', { month: 'short', day: 'numeric' }));
+        const predictedValues = forecast.map(item => item.yhat);
 
         const dataForChart = {
           labels: labels,
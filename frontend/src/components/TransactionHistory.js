@@ -41,8 +41,10 @@ function TransactionHistory() {
 
   const handleExport = async () => {
     try {
-      const response = await axios.get('http://127.0.0.1:8000/api/export/transactions');
-      const blob = new Blob([response.data.csv_data], { type: 'text/csv' });
+      const response = await axios.get('http://127.0.0.1:8000/api/export/transactions', {
+        responseType: 'blob'
+      });
+      const blob = new Blob([response.data], { type: 'text/csv' });
       const url = window.URL.createObjectURL(blob);
       const a = document.createElement('a');
       a.href = url;